@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Benchmark: streaming row extractor vs. the previous BeautifulSoup path.
+
+Compares, on an Online Radio Box playlist page:
+
+- ``bs4``: build a full BeautifulSoup tree from the whole page and walk its
+  rows (what ``get_from_onlineradiobox`` did before), and
+- ``stream``: ``BaseStationFetcher._extract_onlineradiobox`` fed in 16 KiB
+  chunks, which stops at the Live row.
+
+Both are checked to return the same track. Reports mean time per page and
+peak traced memory (tracemalloc).
+
+    python benchmarks/bench_html_extract.py                 # synthetic page
+    python benchmarks/bench_html_extract.py saved_page.html # a saved ORB page
+    python benchmarks/bench_html_extract.py -n 50 --rows 400
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from stations.base import BaseStationFetcher, TrackInfo  # noqa: E402
+
+CHUNK_SIZE = 16 * 1024
+
+
+class _Fetcher(BaseStationFetcher):
+    def get_current_track(self):
+        return None
+
+
+def synthetic_page(rows: int) -> str:
+    """A page shaped like an ORB playlist: heavy head, Live row, then history."""
+    head = "<html><head><title>Playlist</title>" + (
+        "<script>var cfg = {" + ", ".join(f'"k{i}": "{"x" * 40}"' for i in range(400)) + "};</script>"
+    ) + "</head><body>"
+    nav = "<nav>" + "".join(f'<a href="/s/{i}">Station {i}</a>' for i in range(600)) + "</nav>"
+    table = ['<table class="tablelist-schedule"><tbody>']
+    table.append('<tr><td class="tablelist-schedule__time">Live</td>'
+                 '<td><a href="/track/1/">Portishead - Roads</a></td></tr>')
+    for i in range(rows):
+        table.append(f'<tr><td>{(23 - i // 20) % 24:02d}:{59 - i % 60:02d}</td>'
+                     f'<td><a href="/track/{i + 2}/">Artist {i} - Song {i}</a></td></tr>')
+    table.append("</tbody></table>")
+    footer = "<footer>" + "<p>" + "lorem ipsum " * 2000 + "</p></footer></body></html>"
+    return head + nav + "".join(table) + footer
+
+
+def bs4_orb(fetcher: BaseStationFetcher, html: str):
+    """The former BeautifulSoup row walk from get_from_onlineradiobox."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    most_recent = None
+    for row in soup.find_all("tr"):
+        cells = row.find_all("td")
+        if len(cells) < 2:
+            continue
+        first_cell = cells[0].get_text(strip=True)
+        link = cells[1].find("a")
+        track_text = link.get_text(strip=True) if link else cells[1].get_text(strip=True)
+        if " - " not in track_text:
+            continue
+        artist, title = (part.strip() for part in track_text.split(" - ", 1))
+        track = TrackInfo(artist=fetcher.normalize_artist(artist), title=fetcher.normalize_title(title))
+        if first_cell.lower() == "live":
+            return track
+        if first_cell and ":" in first_cell and len(first_cell) <= 6 and most_recent is None:
+            most_recent = track
+    return most_recent
+
+
+def stream_orb(fetcher: BaseStationFetcher, html: str):
+    chunks = (html[i:i + CHUNK_SIZE] for i in range(0, len(html), CHUNK_SIZE))
+    return fetcher._extract_onlineradiobox(chunks)
+
+
+def measure(name, func, fetcher, html, iterations):
+    result = func(fetcher, html)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(fetcher, html)
+    elapsed = (time.perf_counter() - start) / iterations
+
+    tracemalloc.start()
+    func(fetcher, html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:8} {elapsed * 1000:9.2f} ms/page   peak {peak / 1024:9.1f} KiB   -> {result}")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("page", nargs="?", help="Saved Online Radio Box playlist HTML (default: synthetic)")
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=200, help="History rows in the synthetic page")
+    args = parser.parse_args()
+
+    html = Path(args.page).read_text(encoding="utf-8") if args.page else synthetic_page(args.rows)
+    fetcher = _Fetcher("bench")
+    print(f"Page size: {len(html.encode('utf-8')) / 1024:.1f} KiB, {args.iterations} iterations\n")
+
+    bs4_result, bs4_time = measure("bs4", bs4_orb, fetcher, html, args.iterations)
+    stream_result, stream_time = measure("stream", stream_orb, fetcher, html, args.iterations)
+
+    print(f"\nspeedup: {bs4_time / stream_time:.1f}x")
+    if bs4_result != stream_result:
+        print("WARNING: results differ", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
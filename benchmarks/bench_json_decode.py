@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Benchmark: livemeta decoding, stdlib ``json`` vs. ``json_decode``.
+
+Compares, on a livemeta payload:
+
+- ``json``: ``json.loads`` of the whole document followed by the step lookup
+  (what ``get_from_livemeta`` did before via ``response.json()``), and
+- ``typed``: ``json_decode.decode_livemeta`` plus ``LivemetaDocument.step``
+  with whichever backend is installed (msgspec skips the unused steps,
+  orjson/json decode everything).
+
+Both are checked to return the same track. Reports mean time per payload and
+peak traced memory (tracemalloc).
+
+No recorded payload ships with the repository, so the default run uses a
+synthetic payload with livemeta's shape (``steps`` keyed by uid, ``levels``
+pointing into them) and a configurable number of steps. Pass recorded
+payloads as arguments to benchmark real responses; the speedup depends on
+how many steps a station's payload carries.
+
+    python benchmarks/bench_json_decode.py                  # synthetic payload
+    python benchmarks/bench_json_decode.py fip.json jazz.json  # recorded payloads
+    python benchmarks/bench_json_decode.py -n 500 --steps 400
+
+Record a payload with e.g.
+``curl -o fip.json https://api.radiofrance.fr/livemeta/pull/7``.
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from stations import json_decode  # noqa: E402
+from stations.fip import FIPFetcher  # noqa: E402
+
+
+def synthetic_payload(steps: int) -> bytes:
+    """A payload shaped like livemeta: many steps, one level pointing at one."""
+    uids = [f"{i:08x}-uid-{i}" for i in range(steps)]
+    data = {
+        "steps": {
+            uid: {
+                "uid": uid,
+                "title": f"Song {i}",
+                "authors": f"Artist {i}",
+                "titreAlbum": f"Album {i}",
+                "start": 1_700_000_000 + i * 200,
+                "end": 1_700_000_000 + (i + 1) * 200,
+                "embedType": "song",
+                "visual": f"https://example.invalid/visuals/{uid}.jpg",
+                "lienYoutube": f"https://example.invalid/watch?v={uid}",
+                "label": "Some Label",
+                "anneeEditionMusique": 1990 + i % 30,
+                "highlightedPartner": None,
+                "path": f"/{uid}",
+            }
+            for i, uid in enumerate(uids)
+        },
+        "levels": [{"items": uids, "position": steps // 2}],
+    }
+    return json.dumps(data).encode("utf-8")
+
+
+def stdlib_decode(fetcher: FIPFetcher, body: bytes):
+    """The former path: decode everything, then read one step."""
+    data = json.loads(body)
+    document = json_decode.LivemetaDocument(
+        [json_decode.LivemetaLevel(level.get("items") or [], level.get("position"))
+         for level in data.get("levels") or []],
+        data.get("steps") or {},
+        raw_steps=False,
+    )
+    return fetcher._parse_livemeta(document)
+
+
+def typed_decode(fetcher: FIPFetcher, body: bytes):
+    return fetcher._parse_livemeta(json_decode.decode_livemeta(body))
+
+
+def measure(name, func, fetcher, body, iterations):
+    result = func(fetcher, body)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(fetcher, body)
+    elapsed = (time.perf_counter() - start) / iterations
+
+    tracemalloc.start()
+    func(fetcher, body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:8} {elapsed * 1e6:9.1f} us/payload   peak {peak / 1024:9.1f} KiB   -> {result}")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("payloads", nargs="*", help="Recorded livemeta JSON files (default: synthetic)")
+    parser.add_argument("-n", "--iterations", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=200, help="Steps in the synthetic payload")
+    args = parser.parse_args()
+
+    if args.payloads:
+        bodies = [(path, Path(path).read_bytes()) for path in args.payloads]
+    else:
+        bodies = [("synthetic", synthetic_payload(args.steps))]
+
+    fetcher = FIPFetcher()
+    print(f"Backend: {json_decode.BACKEND}, {args.iterations} iterations")
+    status = 0
+    for label, body in bodies:
+        print(f"\n{label}: {len(body) / 1024:.1f} KiB")
+        json_result, json_time = measure("json", stdlib_decode, fetcher, body, args.iterations)
+        typed_result, typed_time = measure("typed", typed_decode, fetcher, body, args.iterations)
+        print(f"speedup: {json_time / typed_time:.1f}x")
+        if json_result != typed_result or (json_result and json_result.album != typed_result.album):
+            print("WARNING: results differ", file=sys.stderr)
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
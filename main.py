@@ -9,7 +9,14 @@ from pathlib import Path
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from scrobbler import RadioScrobbler
+from scrobbler import RadioScrobbler, DEFAULT_MAX_CONCURRENT_POLLS, DEFAULT_INIT_WORKERS, DEFAULT_INIT_TIMEOUT
+from scheduler import DEFAULT_START_JITTER, DEFAULT_POLL_JITTER
+from http_client import configure_http_client, DEFAULT_POOL_MAXSIZE, DEFAULT_TIMEOUT
+from host_limits import DEFAULT_MAX_IN_FLIGHT, DEFAULT_MIN_SPACING
+from ingest import IngestEndpoint, IngestServer, INGEST_PATH
+from now_playing import DEFAULT_PUSH_LEASE
+from spool import ScrobbleSpool, DEFAULT_SPOOL_PATH
+from state_store import StateStore, DEFAULT_STATE_PATH
 from config_loader import load_config
 from utils import setup_logging
 
@@ -34,6 +41,105 @@ def main():
         '--log-file',
         help='Optional log file path'
     )
+    parser.add_argument(
+        '--max-concurrent-polls',
+        type=int,
+        default=int(os.getenv('MAX_CONCURRENT_POLLS', DEFAULT_MAX_CONCURRENT_POLLS)),
+        help=f'Maximum number of stations polled at the same time '
+             f'(default: {DEFAULT_MAX_CONCURRENT_POLLS} or MAX_CONCURRENT_POLLS env var)'
+    )
+    parser.add_argument(
+        '--start-jitter',
+        type=float,
+        default=float(os.getenv('START_JITTER', DEFAULT_START_JITTER)),
+        help=f'Spread station start times over up to this many seconds '
+             f'(default: {DEFAULT_START_JITTER:g} or START_JITTER env var)'
+    )
+    parser.add_argument(
+        '--poll-jitter',
+        type=float,
+        default=float(os.getenv('POLL_JITTER', DEFAULT_POLL_JITTER)),
+        help=f'Random offset per poll as a fraction of poll_interval '
+             f'(default: {DEFAULT_POLL_JITTER:g} or POLL_JITTER env var)'
+    )
+    parser.add_argument(
+        '--http-pool-size',
+        type=int,
+        default=int(os.getenv('HTTP_POOL_MAXSIZE', DEFAULT_POOL_MAXSIZE)),
+        help=f'Keep-alive connections kept per upstream host '
+             f'(default: {DEFAULT_POOL_MAXSIZE} or HTTP_POOL_MAXSIZE env var)'
+    )
+    parser.add_argument(
+        '--http-timeout',
+        type=float,
+        default=float(os.getenv('HTTP_TIMEOUT', DEFAULT_TIMEOUT)),
+        help=f'Timeout in seconds for station requests '
+             f'(default: {DEFAULT_TIMEOUT:g} or HTTP_TIMEOUT env var)'
+    )
+    parser.add_argument(
+        '--host-max-in-flight',
+        type=int,
+        default=int(os.getenv('HTTP_HOST_MAX_IN_FLIGHT', DEFAULT_MAX_IN_FLIGHT)),
+        help=f'Requests to the same upstream host at a time '
+             f'(default: {DEFAULT_MAX_IN_FLIGHT} or HTTP_HOST_MAX_IN_FLIGHT env var)'
+    )
+    parser.add_argument(
+        '--host-min-spacing',
+        type=float,
+        default=float(os.getenv('HTTP_HOST_MIN_SPACING', DEFAULT_MIN_SPACING)),
+        help=f'Seconds between request starts to the same upstream host '
+             f'(default: {DEFAULT_MIN_SPACING:g} or HTTP_HOST_MIN_SPACING env var)'
+    )
+    parser.add_argument(
+        '--init-workers',
+        type=int,
+        default=int(os.getenv('INIT_WORKERS', DEFAULT_INIT_WORKERS)),
+        help=f'Stations initialized (Last.fm login) at the same time '
+             f'(default: {DEFAULT_INIT_WORKERS} or INIT_WORKERS env var)'
+    )
+    parser.add_argument(
+        '--init-timeout',
+        type=float,
+        default=float(os.getenv('INIT_TIMEOUT', DEFAULT_INIT_TIMEOUT)),
+        help=f'Seconds to wait for stations to initialize before polling starts; '
+             f'slower stations join later (default: {DEFAULT_INIT_TIMEOUT:g} or INIT_TIMEOUT env var)'
+    )
+    parser.add_argument(
+        '--spool',
+        default=os.getenv('SCROBBLE_SPOOL', DEFAULT_SPOOL_PATH),
+        help=f'SQLite file holding scrobbles until Last.fm accepts them '
+             f'(default: {DEFAULT_SPOOL_PATH} or SCROBBLE_SPOOL env var)'
+    )
+    parser.add_argument(
+        '--no-spool',
+        action='store_true',
+        help='Do not keep failed scrobbles on disk for retrying'
+    )
+    parser.add_argument(
+        '--state-file',
+        default=os.getenv('STATE_FILE', DEFAULT_STATE_PATH),
+        help=f'JSON file keeping each station\'s last scrobble across restarts '
+             f'(default: {DEFAULT_STATE_PATH} or STATE_FILE env var)'
+    )
+    parser.add_argument(
+        '--ingest-port',
+        type=int,
+        default=int(os.getenv('INGEST_PORT')) if os.getenv('INGEST_PORT') else None,
+        help=f'Serve the push ingest endpoint ({INGEST_PATH}) on this port; '
+             f'requires the INGEST_TOKEN env var (default: off, or INGEST_PORT env var)'
+    )
+    parser.add_argument(
+        '--ingest-host',
+        default=os.getenv('INGEST_HOST', '0.0.0.0'),
+        help='Address the ingest endpoint binds to (default: 0.0.0.0 or INGEST_HOST env var)'
+    )
+    parser.add_argument(
+        '--ingest-lease',
+        type=float,
+        default=float(os.getenv('INGEST_LEASE', DEFAULT_PUSH_LEASE)),
+        help=f'Seconds a station that pushes stays off the poll schedule after its last push '
+             f'(default: {DEFAULT_PUSH_LEASE:g} or INGEST_LEASE env var)'
+    )
     
     args = parser.parse_args()
     
@@ -58,14 +164,53 @@ def main():
         
         logger.info(f"Loaded {len(stations)} station(s)")
         
+        # Shared HTTP pools for all station fetchers; size them so every
+        # concurrent poll can keep its own connection to a busy host
+        configure_http_client(
+            pool_maxsize=max(args.http_pool_size, args.max_concurrent_polls),
+            timeout=args.http_timeout,
+            host_max_in_flight=args.host_max_in_flight,
+            host_min_spacing=args.host_min_spacing,
+        )
+        
+        # Durable scrobble spool, so plays survive Last.fm outages and restarts
+        spool = None
+        if not args.no_spool:
+            spool = ScrobbleSpool(args.spool)
+            logger.info(f"Scrobble spool: {args.spool} ({spool.pending_count()} pending)")
+        
         # Create scrobbler
-        scrobbler = RadioScrobbler(stations)
+        scrobbler = RadioScrobbler(
+            stations,
+            max_concurrent_polls=args.max_concurrent_polls,
+            start_jitter=args.start_jitter,
+            poll_jitter=args.poll_jitter,
+            spool=spool,
+            state_store=StateStore(args.state_file),
+            init_workers=args.init_workers,
+            init_timeout=args.init_timeout,
+        )
         
-        if not scrobbler.stations:
+        if not scrobbler.stations and not scrobbler.pending_stations:
             logger.error("No enabled stations found")
             return 1
         
-        logger.info(f"Starting scrobbler with {len(scrobbler.stations)} station(s)")
+        # Push ingestion; stations that push are taken off the poll schedule
+        if args.ingest_port is not None:
+            token = os.getenv('INGEST_TOKEN')
+            if not token:
+                logger.error("--ingest-port requires the INGEST_TOKEN environment variable")
+                return 1
+            IngestServer(
+                IngestEndpoint(scrobbler.hub, token, lease=args.ingest_lease),
+                host=args.ingest_host,
+                port=args.ingest_port,
+            ).start()
+        
+        logger.info(
+            f"Starting scrobbler with {len(scrobbler.stations)} station(s)"
+            + (f", {len(scrobbler.pending_stations)} still initializing" if scrobbler.pending_stations else "")
+        )
         
         # Run forever
         scrobbler.run_forever()
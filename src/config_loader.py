@@ -85,6 +85,9 @@ def _parse_config_data(config_data: dict) -> List[StationConfig]:
             lastfm_password_hash=station_config.get('lastfm_password_hash'),
             lastfm_password=station_config.get('lastfm_password'),
             poll_interval=station_config.get('poll_interval', 30),
+            max_poll_interval=station_config.get('max_poll_interval'),
+            backfill=bool(station_config.get('backfill', False)),
+            stream_url=station_config.get('stream_url'),
             enabled=station_config.get('enabled', True)
         )
         
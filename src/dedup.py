@@ -0,0 +1,82 @@
+"""Per-station memory of recently scrobbled tracks.
+
+Comparing against the last scrobbled track alone is not enough: when a source
+alternates between two tracks (e.g. Online Radio Box falling back to the
+"most recent" row whenever the Live row is missing), each change looks new
+and both tracks get scrobbled again and again. ``RecentPlays`` remembers the
+last few plays of a station, indexed by ``TrackInfo.key``, and reports a
+track as a repeat if it was scrobbled within the replay window.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+try:
+    from .stations.base import TrackInfo
+except ImportError:
+    from stations.base import TrackInfo
+
+# Plays remembered per station.
+DEFAULT_MAX_PLAYS = 50
+
+# Seconds after a scrobble during which the same track counts as a repeat.
+# Long enough to cover the track itself and a flip back from the next one.
+DEFAULT_REPLAY_WINDOW = 15 * 60
+
+
+class RecentPlays:
+    """Bounded, time-limited set of a station's recent scrobbles."""
+
+    def __init__(self, max_plays: int = DEFAULT_MAX_PLAYS,
+                 window: float = DEFAULT_REPLAY_WINDOW):
+        """
+        Initialize an empty history.
+
+        Args:
+            max_plays: Plays kept; the oldest is dropped beyond this
+            window: Seconds a play suppresses the same track
+        """
+        self.max_plays = max_plays
+        self.window = window
+        # track key -> time until which the track counts as a repeat
+        self._plays: 'OrderedDict[tuple, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen(self, track: TrackInfo, now: Optional[float] = None) -> bool:
+        """True if ``track`` was scrobbled within its replay window."""
+        now = time.time() if now is None else now
+        with self._lock:
+            until = self._plays.get(track.key)
+            if until is None:
+                return False
+            if now >= until:
+                del self._plays[track.key]
+                return False
+            return True
+
+    def record(self, track: TrackInfo, now: Optional[float] = None):
+        """Remember that ``track`` was scrobbled at ``now``."""
+        now = time.time() if now is None else now
+        until = now + self.window
+        # A track known to run longer than the window is covered until it ends
+        if track.next_change_at is not None:
+            until = max(until, track.next_change_at)
+        with self._lock:
+            self._plays[track.key] = until
+            self._plays.move_to_end(track.key)
+            while len(self._plays) > self.max_plays:
+                self._plays.popitem(last=False)
+
+    def forget(self, track: TrackInfo):
+        """Drop ``track`` again, e.g. because its scrobble was rejected."""
+        with self._lock:
+            self._plays.pop(track.key, None)
+
+    def clear(self):
+        with self._lock:
+            self._plays.clear()
+
+    def __len__(self) -> int:
+        return len(self._plays)
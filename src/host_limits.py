@@ -0,0 +1,159 @@
+"""Per-host politeness for station requests.
+
+Several stations share an upstream host (Ness and FM4 both read
+onlineradiobox.com, FIP and Radio Nova both read recenttracks.com). With
+concurrent polling they would hit those hosts in parallel, and a host that
+bans our IP takes every station behind it down. ``HostLimiter`` sits under
+``HttpClient.get`` and, per host:
+
+- allows at most ``max_in_flight`` requests at a time,
+- starts requests at least ``min_spacing`` seconds apart,
+- honours ``Retry-After`` on 429 and 503 responses, and backs off
+  exponentially after a 429 without one (``BACKOFF_BASE`` doubling up to
+  ``BACKOFF_MAX``); the backoff is cleared by the next successful response.
+
+A request that would have to wait longer than ``max_wait`` for a backed-off
+host fails right away with ``HostBackoff``, so a poll is not held for
+minutes and the station's fallback sources get their turn.
+
+Limits come from ``HttpClient`` (``HTTP_HOST_MAX_IN_FLIGHT`` and
+``HTTP_HOST_MIN_SPACING`` in the environment).
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_IN_FLIGHT = 2
+DEFAULT_MIN_SPACING = 0.5
+
+# Backoff after a 429 without Retry-After (seconds).
+BACKOFF_BASE = 5.0
+BACKOFF_MAX = 600.0
+
+# Longest Retry-After honoured (seconds).
+MAX_RETRY_AFTER = 3600.0
+
+# Longest a request waits for its host before failing with HostBackoff.
+DEFAULT_MAX_WAIT = 10.0
+
+
+class HostBackoff(requests.exceptions.RequestException):
+    """The host asked us to back off for longer than a request may wait."""
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait per a ``Retry-After`` header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(float(value), MAX_RETRY_AFTER)
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return min(max(0.0, when - now), MAX_RETRY_AFTER)
+
+
+@dataclass
+class _HostState:
+    in_flight: int = 0
+    next_start: float = 0.0
+    blocked_until: float = 0.0
+    backoff: float = 0.0
+
+
+class HostLimiter:
+    """Concurrency, spacing and backoff per upstream host."""
+
+    def __init__(self, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 min_spacing: float = DEFAULT_MIN_SPACING,
+                 max_wait: float = DEFAULT_MAX_WAIT):
+        """
+        Initialize the limiter.
+
+        Args:
+            max_in_flight: Requests per host at the same time
+            min_spacing: Seconds between request starts to the same host
+            max_wait: Longest a request waits for its host before
+                ``HostBackoff`` is raised
+        """
+        self.max_in_flight = max(1, max_in_flight)
+        self.min_spacing = max(0.0, min_spacing)
+        self.max_wait = max_wait
+        self._hosts: Dict[str, _HostState] = {}
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        """
+        Hold one of the host's request slots for the enclosed request.
+
+        Raises:
+            HostBackoff: If the host is backed off for longer than ``max_wait``
+        """
+        host = urlsplit(url).hostname or ''
+        self._acquire(host)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._hosts[host].in_flight -= 1
+                self._cond.notify_all()
+
+    def record(self, url: str, response: requests.Response):
+        """Update the host's backoff from a response's status and ``Retry-After``."""
+        host = urlsplit(url).hostname or ''
+        now = time.time()
+        status = response.status_code
+        with self._cond:
+            state = self._hosts.setdefault(host, _HostState())
+            if status in (429, 503):
+                delay = parse_retry_after(response.headers.get('Retry-After'), now)
+                if delay is None:
+                    if status != 429:
+                        return
+                    state.backoff = min(max(state.backoff * 2, BACKOFF_BASE), BACKOFF_MAX)
+                    delay = state.backoff
+                state.blocked_until = max(state.blocked_until, now + delay)
+                logger.warning(f"{host} answered {status}; backing off for {delay:.0f}s")
+            elif status < 400:
+                state.backoff = 0.0
+
+    def blocked_for(self, url: str) -> float:
+        """Seconds until the host accepts requests again (0 if it does now)."""
+        state = self._hosts.get(urlsplit(url).hostname or '')
+        if state is None:
+            return 0.0
+        return max(0.0, state.blocked_until - time.time())
+
+    def _acquire(self, host: str):
+        with self._cond:
+            state = self._hosts.setdefault(host, _HostState())
+            deadline = time.time() + self.max_wait
+            while True:
+                now = time.time()
+                if state.blocked_until > deadline:
+                    raise HostBackoff(f"{host} is backed off for {state.blocked_until - now:.0f}s")
+                start_at = max(state.next_start, state.blocked_until)
+                if state.in_flight < self.max_in_flight and start_at <= now:
+                    state.in_flight += 1
+                    state.next_start = now + self.min_spacing
+                    return
+                if now >= deadline:
+                    raise HostBackoff(f"timed out waiting for a request slot on {host}")
+                wait = deadline - now
+                if state.in_flight < self.max_in_flight:
+                    wait = min(wait, start_at - now)
+                self._cond.wait(wait)
@@ -0,0 +1,432 @@
+"""Shared HTTP client used by all station fetchers.
+
+One process-wide ``requests.Session`` with keep-alive connection pools, so
+repeated polls of the same host reuse their TCP/TLS connections instead of
+paying for DNS, connect and handshake every time. urllib3 keeps one pool per
+host; ``pool_connections`` bounds how many host pools are cached and
+``pool_maxsize`` how many idle connections each pool keeps.
+
+``get_parsed`` adds a small response cache on top: it remembers each URL's
+``ETag`` / ``Last-Modified`` validators together with the *parsed* result,
+sends conditional requests, and on ``304 Not Modified`` hands back the
+previous result without parsing again. ``Cache-Control: max-age`` is honored,
+so a response that is still fresh is served without any request at all.
+Pages without useful validators are covered by a body fingerprint: when a
+``200`` body hashes the same as last time, the memoized result is returned
+without running the parser. Results are kept per URL and parser, so the
+current-track and history parsers of one page each get their own. The cache
+is an LRU bounded to ``cache_size`` entries. ``get_streamed`` is the variant
+for large HTML pages whose answer sits near the top: the body is decoded
+chunk by chunk and the connection is closed as soon as the consumer has what
+it needs.
+
+Every request goes through a ``HostLimiter`` (see ``host_limits``): at most
+``host_max_in_flight`` requests per host at a time (counted until the
+response headers arrive), started at least ``host_min_spacing`` seconds
+apart, with ``Retry-After`` and 429 backoff honoured per host.
+
+Requests made inside ``cancellable(event)`` are abandoned once the event is
+set: a request not yet sent raises ``RequestCancelled``, and a streamed body
+stops at the next chunk with its connection closed. Hedged source fetches
+use this to stop the requests that lost the race.
+
+Defaults can be overridden with the ``HTTP_POOL_CONNECTIONS``,
+``HTTP_POOL_MAXSIZE``, ``HTTP_TIMEOUT``, ``HTTP_CACHE_SIZE``,
+``HTTP_HOST_MAX_IN_FLIGHT`` and ``HTTP_HOST_MIN_SPACING`` environment
+variables, or by calling ``configure_http_client`` at startup.
+"""
+
+import codecs
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Optional, Union, Tuple, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from .host_limits import HostLimiter, DEFAULT_MAX_IN_FLIGHT, DEFAULT_MIN_SPACING
+except ImportError:
+    from host_limits import HostLimiter, DEFAULT_MAX_IN_FLIGHT, DEFAULT_MIN_SPACING
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (compatible; RadioScrobbler/1.0)'
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_STREAM_CHUNK_SIZE = 16 * 1024
+DEFAULT_STREAM_MAX_BYTES = 1024 * 1024
+
+Timeout = Union[float, Tuple[float, float]]
+T = TypeVar('T')
+
+# Cache entries are keyed by URL and the parser that produced the result.
+CacheKey = Tuple[str, Callable]
+
+_MAX_AGE_RE = re.compile(r'(?:^|,)\s*max-age\s*=\s*"?(\d+)"?', re.IGNORECASE)
+
+_local = threading.local()
+
+
+class RequestCancelled(requests.exceptions.RequestException):
+    """The request was abandoned because its ``cancellable`` event was set."""
+
+
+@contextmanager
+def cancellable(event: threading.Event) -> Iterator[None]:
+    """Abandon the enclosed requests (on this thread) once ``event`` is set."""
+    previous = getattr(_local, 'cancel', None)
+    _local.cancel = event
+    try:
+        yield
+    finally:
+        _local.cancel = previous
+
+
+def _check_cancelled():
+    event = getattr(_local, 'cancel', None)
+    if event is not None and event.is_set():
+        raise RequestCancelled("request cancelled")
+
+
+@dataclass
+class CacheEntry:
+    """Validators, body fingerprint and parsed result remembered for one URL and parser."""
+    value: Any
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    expires_at: float = 0.0
+    digest: Optional[bytes] = None
+
+
+def _freshness_deadline(response: requests.Response, now: float) -> Optional[float]:
+    """
+    Work out until when a response may be reused without revalidation.
+
+    Returns:
+        Unix time the response stays fresh until (``now`` if it must be
+        revalidated every time), or None if it must not be cached at all
+    """
+    cache_control = response.headers.get('Cache-Control', '')
+    directives = cache_control.lower()
+    if 'no-store' in directives:
+        return None
+    if 'no-cache' in directives:
+        return now
+    match = _MAX_AGE_RE.search(cache_control)
+    if not match:
+        return now
+    try:
+        age = int(response.headers.get('Age', 0))
+    except ValueError:
+        age = 0
+    return now + max(0, int(match.group(1)) - age)
+
+
+def _decoded_chunks(response: requests.Response, chunk_size: int, max_bytes: int) -> Iterator[str]:
+    """Yield the body of a streamed response as text, stopping after ``max_bytes``."""
+    try:
+        decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    read = 0
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        _check_cancelled()
+        read += len(chunk)
+        yield decoder.decode(chunk)
+        if read >= max_bytes:
+            logger.debug(f"{response.url}: stopped reading after {read} bytes")
+            return
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+class HttpClient:
+    """Thin wrapper around a pooled ``requests.Session``."""
+
+    def __init__(self, pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 timeout: Timeout = DEFAULT_TIMEOUT,
+                 user_agent: str = DEFAULT_USER_AGENT,
+                 cache_size: int = DEFAULT_CACHE_SIZE,
+                 host_max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 host_min_spacing: float = DEFAULT_MIN_SPACING):
+        """
+        Initialize the client.
+
+        Args:
+            pool_connections: Number of per-host connection pools to keep
+            pool_maxsize: Maximum keep-alive connections per host
+            timeout: Default request timeout (seconds, or (connect, read) tuple)
+            user_agent: User-Agent header sent with every request
+            cache_size: Maximum number of URLs kept by ``get_parsed``
+            host_max_in_flight: Requests per upstream host at the same time
+            host_min_spacing: Seconds between request starts to the same host
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': user_agent})
+
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.cache_size = max(1, cache_size)
+        self._cache: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_stats = {'fresh': 0, 'not_modified': 0, 'unchanged_body': 0, 'parsed': 0}
+        self.hosts = HostLimiter(max_in_flight=host_max_in_flight, min_spacing=host_min_spacing)
+
+    def get(self, url: str, timeout: Optional[Timeout] = None, **kwargs) -> requests.Response:
+        """
+        Send a GET request through the shared pools.
+
+        Args:
+            url: URL to fetch
+            timeout: Request timeout (defaults to the client's timeout)
+            **kwargs: Passed through to ``requests.Session.get``
+
+        Returns:
+            The response
+
+        Raises:
+            RequestCancelled: If called inside a ``cancellable`` scope whose
+                event is set
+            HostBackoff: If the host asked us to back off for longer than a
+                request may wait
+        """
+        _check_cancelled()
+        with self.hosts.slot(url):
+            _check_cancelled()
+            response = self.session.get(url, timeout=timeout or self.timeout, **kwargs)
+        self.hosts.record(url, response)
+        return response
+
+    def get_parsed(self, url: str, parse: Callable[[requests.Response], T],
+                   headers: Optional[Dict[str, str]] = None,
+                   timeout: Optional[Timeout] = None,
+                   raise_for_status: bool = False) -> Optional[T]:
+        """
+        GET a URL and parse it, reusing the cached result while it is unchanged.
+
+        A fresh cached result (per ``Cache-Control: max-age``) is returned
+        without a request. Otherwise a conditional request is sent with the
+        stored validators, and a ``304`` returns the cached result without
+        calling ``parse``. A ``200`` whose body is byte-identical to the last
+        one also reuses the cached result.
+
+        Results are memoized per URL and parser, so ``parse`` must depend
+        only on the response, and should be a function or bound method
+        rather than a lambda made per call (which would never hit the cache).
+
+        Args:
+            url: URL to fetch
+            parse: Turns a ``200`` response into the value to return and cache
+            headers: Extra request headers
+            timeout: Request timeout (defaults to the client's timeout)
+            raise_for_status: Raise ``requests.HTTPError`` on 4xx/5xx
+                instead of returning None
+
+        Returns:
+            The parsed value, or None if the server answered anything other
+            than 200/304
+        """
+        now = time.time()
+        key = (url, parse)
+        entry = self._cached_entry(key)
+        if entry is not None and entry.expires_at > now:
+            self.cache_stats['fresh'] += 1
+            return entry.value
+
+        response = self.get(url, timeout=timeout, headers=self._conditional_headers(entry, headers))
+
+        if response.status_code == 304 and entry is not None:
+            return self._revalidated(entry, response, now)
+
+        if response.status_code != 200:
+            logger.debug(f"{url} returned {response.status_code}")
+            if raise_for_status:
+                response.raise_for_status()
+            return None
+
+        digest = hashlib.blake2b(response.content, digest_size=16).digest()
+        if entry is not None and entry.digest == digest:
+            value = entry.value
+            self.cache_stats['unchanged_body'] += 1
+        else:
+            value = parse(response)
+            self.cache_stats['parsed'] += 1
+
+        self._store(key, response, now, value, digest)
+        return value
+
+    def get_streamed(self, url: str, consume: Callable[[Iterator[str]], T],
+                     headers: Optional[Dict[str, str]] = None,
+                     timeout: Optional[Timeout] = None,
+                     chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+                     max_bytes: int = DEFAULT_STREAM_MAX_BYTES,
+                     raise_for_status: bool = False) -> Optional[T]:
+        """
+        GET a URL and hand its decoded body to ``consume`` chunk by chunk.
+
+        ``consume`` may stop iterating as soon as it has what it needs; the
+        connection is then closed and the rest of the body is never read. At
+        most ``max_bytes`` are read in any case, which bounds memory per fetch.
+        Freshness and conditional-GET caching work as in ``get_parsed``; body
+        fingerprints do not apply because the body is usually not read fully.
+
+        Args:
+            url: URL to fetch
+            consume: Turns an iterator of text chunks into the value to return and cache
+            headers: Extra request headers
+            timeout: Request timeout (defaults to the client's timeout)
+            chunk_size: Bytes read per network chunk
+            max_bytes: Maximum bytes read from the body
+            raise_for_status: Raise ``requests.HTTPError`` on 4xx/5xx
+                instead of returning None
+
+        Returns:
+            The consumed value, or None if the server answered anything other
+            than 200/304
+        """
+        now = time.time()
+        key = (url, consume)
+        entry = self._cached_entry(key)
+        if entry is not None and entry.expires_at > now:
+            self.cache_stats['fresh'] += 1
+            return entry.value
+
+        response = self.get(url, timeout=timeout, stream=True,
+                            headers=self._conditional_headers(entry, headers))
+        try:
+            if response.status_code == 304 and entry is not None:
+                return self._revalidated(entry, response, now)
+
+            if response.status_code != 200:
+                logger.debug(f"{url} returned {response.status_code}")
+                if raise_for_status:
+                    response.raise_for_status()
+                return None
+
+            value = consume(_decoded_chunks(response, chunk_size, max_bytes))
+            self.cache_stats['parsed'] += 1
+        finally:
+            response.close()
+
+        self._store(key, response, now, value, None)
+        return value
+
+    def _cached_entry(self, key: CacheKey) -> Optional[CacheEntry]:
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+            return entry
+
+    @staticmethod
+    def _conditional_headers(entry: Optional[CacheEntry],
+                             headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry.etag:
+                request_headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                request_headers['If-Modified-Since'] = entry.last_modified
+        return request_headers
+
+    def _revalidated(self, entry: CacheEntry, response: requests.Response, now: float):
+        fresh_until = _freshness_deadline(response, now)
+        entry.expires_at = fresh_until if fresh_until is not None else now
+        self.cache_stats['not_modified'] += 1
+        return entry.value
+
+    def _store(self, key: CacheKey, response: requests.Response, now: float,
+               value: Any, digest: Optional[bytes]):
+        # no-store: keep only our own fingerprint memo, never the validators
+        fresh_until = _freshness_deadline(response, now)
+        new_entry = CacheEntry(value=value, digest=digest, expires_at=now)
+        if fresh_until is not None:
+            new_entry.etag = response.headers.get('ETag')
+            new_entry.last_modified = response.headers.get('Last-Modified')
+            new_entry.expires_at = fresh_until
+        with self._cache_lock:
+            self._cache[key] = new_entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def _env_number(name: str, default, cast):
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {name}={value!r}")
+        return default
+
+
+def _env_settings() -> dict:
+    """HttpClient settings taken from the environment (or module defaults)."""
+    return {
+        'pool_connections': _env_number('HTTP_POOL_CONNECTIONS', DEFAULT_POOL_CONNECTIONS, int),
+        'pool_maxsize': _env_number('HTTP_POOL_MAXSIZE', DEFAULT_POOL_MAXSIZE, int),
+        'timeout': _env_number('HTTP_TIMEOUT', DEFAULT_TIMEOUT, float),
+        'cache_size': _env_number('HTTP_CACHE_SIZE', DEFAULT_CACHE_SIZE, int),
+        'host_max_in_flight': _env_number('HTTP_HOST_MAX_IN_FLIGHT', DEFAULT_MAX_IN_FLIGHT, int),
+        'host_min_spacing': _env_number('HTTP_HOST_MIN_SPACING', DEFAULT_MIN_SPACING, float),
+    }
+
+
+def get_http_client() -> HttpClient:
+    """Return the process-wide HTTP client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient(**_env_settings())
+    return _client
+
+
+def configure_http_client(**kwargs) -> HttpClient:
+    """
+    Replace the process-wide HTTP client.
+
+    Call this at startup, before polling begins.
+
+    Args:
+        **kwargs: Passed to ``HttpClient``; settings not given fall back to
+            the environment variables / defaults
+
+    Returns:
+        The new client
+    """
+    global _client
+    settings = _env_settings()
+    settings.update(kwargs)
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = HttpClient(**settings)
+    return _client
@@ -0,0 +1,231 @@
+"""Push ingestion of now-playing events.
+
+Stations and aggregators that can push their now-playing events post them
+here instead of being polled. A request carries a batch of events for one or
+more stations::
+
+    POST /api/ingest
+    Authorization: Bearer <INGEST_TOKEN>
+
+    {"events": [{"station": "fip", "artist": "...", "title": "...",
+                 "album": "...", "played_at": 1700000000}]}
+
+``played_at`` (Unix time or ISO 8601) and ``album`` are optional. Events are
+handed to the now-playing hub (``NowPlayingHub.ingest``), so they reach the
+same dedup and scrobble path as polled tracks, and a station that pushes is
+not fetched upstream while its push lease lasts.
+
+``IngestEndpoint`` holds the request handling; it is served by the Flask app
+(``/api/ingest``) and, for the multi-station service, by ``IngestServer``, a
+small standard-library HTTP listener. Ingestion is disabled unless a token is
+configured (``INGEST_TOKEN``).
+"""
+
+import hmac
+import json
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from .now_playing import DEFAULT_PUSH_LEASE, NowPlayingHub
+    from .stations.base import TrackInfo
+except ImportError:
+    from now_playing import DEFAULT_PUSH_LEASE, NowPlayingHub
+    from stations.base import TrackInfo
+
+logger = logging.getLogger(__name__)
+
+INGEST_PATH = '/api/ingest'
+
+# Events accepted in one request.
+MAX_INGEST_EVENTS = 500
+
+# Largest request body the listener reads (bytes).
+MAX_INGEST_BODY = 1024 * 1024
+
+
+def _played_at(value: Any, now: float) -> float:
+    """Parse an event's ``played_at`` (Unix time or ISO 8601); missing means now."""
+    if value is None:
+        return now
+    if isinstance(value, bool):
+        raise ValueError("played_at must be a Unix time or an ISO 8601 string")
+    if isinstance(value, (int, float)):
+        if not math.isfinite(value):
+            raise ValueError("played_at must be a finite Unix time")
+        return float(value)
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    raise ValueError("played_at must be a Unix time or an ISO 8601 string")
+
+
+def parse_events(payload: Any, now: Optional[float] = None) -> Tuple[Dict[str, List[TrackInfo]], List[dict]]:
+    """
+    Turn an ingest payload into plays per station.
+
+    Args:
+        payload: Decoded JSON body: ``{"events": [...]}`` or a bare list
+        now: Time given to events without ``played_at``
+
+    Returns:
+        (station name -> plays, list of ``{"index": i, "error": "..."}`` for
+        events that were rejected)
+
+    Raises:
+        ValueError: If the payload is not a list of events or is too large
+    """
+    now = time.time() if now is None else now
+    events = payload.get('events') if isinstance(payload, dict) else payload
+    if not isinstance(events, list):
+        raise ValueError("expected a list of events")
+    if len(events) > MAX_INGEST_EVENTS:
+        raise ValueError(f"at most {MAX_INGEST_EVENTS} events per request")
+
+    plays: Dict[str, List[TrackInfo]] = {}
+    rejected = []
+    for index, event in enumerate(events):
+        try:
+            if not isinstance(event, dict):
+                raise ValueError("event must be an object")
+            station = str(event.get('station') or '').strip().lower()
+            artist = str(event.get('artist') or '').strip()
+            title = str(event.get('title') or '').strip()
+            if not station or not artist or not title:
+                raise ValueError("station, artist and title are required")
+            album = str(event.get('album') or '').strip() or None
+            played_at = min(_played_at(event.get('played_at'), now), now)
+        except (TypeError, ValueError) as e:
+            rejected.append({'index': index, 'error': str(e)})
+            continue
+        plays.setdefault(station, []).append(
+            TrackInfo(artist=artist, title=title, album=album, played_at=played_at)
+        )
+    return plays, rejected
+
+
+class IngestEndpoint:
+    """Authenticates ingest requests and hands their events to the hub."""
+
+    def __init__(self, hub: NowPlayingHub, token: Optional[str],
+                 lease: float = DEFAULT_PUSH_LEASE):
+        """
+        Initialize the endpoint.
+
+        Args:
+            hub: Now-playing hub the events are pushed into
+            token: Bearer token clients must send; ingestion is disabled
+                without one
+            lease: Seconds a pushing station stays off upstream fetches
+                after its last push
+        """
+        self.hub = hub
+        self.token = token or None
+        self.lease = lease
+
+    @property
+    def enabled(self) -> bool:
+        return self.token is not None
+
+    def authorized(self, authorization: Optional[str]) -> bool:
+        """Check an ``Authorization: Bearer <token>`` header in constant time."""
+        if not self.enabled or not authorization:
+            return False
+        scheme, _, credentials = authorization.partition(' ')
+        if scheme.lower() != 'bearer':
+            return False
+        return hmac.compare_digest(credentials.strip().encode(), self.token.encode())
+
+    def handle(self, authorization: Optional[str], payload: Any) -> Tuple[int, dict]:
+        """
+        Process one ingest request.
+
+        Args:
+            authorization: The request's ``Authorization`` header
+            payload: Decoded JSON body
+
+        Returns:
+            (HTTP status, JSON response body)
+        """
+        if not self.enabled:
+            return 404, {'error': 'Ingestion is disabled'}
+        if not self.authorized(authorization):
+            return 401, {'error': 'Invalid or missing bearer token'}
+        try:
+            plays, rejected = parse_events(payload)
+        except ValueError as e:
+            return 400, {'error': str(e)}
+
+        accepted = {}
+        for station, tracks in plays.items():
+            if not self.hub.has_station(station):
+                rejected.append({'station': station, 'error': 'unknown station'})
+                continue
+            self.hub.ingest(station, tracks, lease=self.lease)
+            accepted[station] = len(tracks)
+        if accepted:
+            logger.debug(f"Ingested {sum(accepted.values())} event(s) for {', '.join(accepted)}")
+        return 202, {'accepted': accepted, 'rejected': rejected}
+
+
+class IngestServer:
+    """Standard-library HTTP listener serving ``IngestEndpoint`` on its own port."""
+
+    def __init__(self, endpoint: IngestEndpoint, host: str = '0.0.0.0', port: int = 8080):
+        self.endpoint = endpoint
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ingest", daemon=True)
+        self._thread.start()
+        logger.info(f"Ingest endpoint listening on port {self.port} ({INGEST_PATH})")
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        endpoint = self.endpoint
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.split('?', 1)[0] != INGEST_PATH:
+                    self._reply(404, {'error': 'Not found'})
+                    return
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                except ValueError:
+                    length = -1
+                if not 0 < length <= MAX_INGEST_BODY:
+                    self._reply(413 if length > MAX_INGEST_BODY else 400, {'error': 'Invalid request body size'})
+                    return
+                try:
+                    payload = json.loads(self.rfile.read(length))
+                except ValueError:
+                    self._reply(400, {'error': 'Body is not valid JSON'})
+                    return
+                self._reply(*endpoint.handle(self.headers.get('Authorization'), payload))
+
+            def _reply(self, status: int, body: dict):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                logger.debug(f"ingest: {format % args}")
+
+        return Handler
@@ -1,18 +1,118 @@
-"""Last.fm API client wrapper."""
+"""Last.fm API client wrapper.
 
+Besides one-off ``scrobble`` calls, each client owns a submission queue:
+``submit`` enqueues a play and returns a future, and a background thread
+sends queued plays with one ``track.scrobble`` request per batch (Last.fm
+accepts up to ``MAX_BATCH_SIZE`` per request). A batch is sent as soon as it
+is full or its oldest play has waited ``batch_delay`` seconds, and every
+future resolves to the per-item result Last.fm reported.
+
+The queue is bounded (``max_queue``): a submit that finds it full waits at
+most ``queue_timeout`` seconds, then hands the play to the spool (or fails
+it) instead of blocking the caller, so pollers never stall on Last.fm.
+``get_metrics`` reports queue depth, throughput and latency.
+
+With a ``ScrobbleSpool`` attached, submitted plays are written to disk first.
+Plays whose request fails stay spooled and the flusher resends them with
+exponential backoff, including plays left over from a previous run.
+"""
+
+import hashlib
 import logging
+import threading
 import time
-from typing import Optional
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple, TypeVar
+from xml.dom import minidom
 import pylast
 
+try:
+    from .rate_limit import (PRIORITY_AUTH, PRIORITY_SCROBBLE, TokenBucket,
+                             current_priority, get_rate_limiter, request_priority)
+    from .session_cache import SessionKeyCache, get_session_cache
+    from .spool import ScrobbleSpool
+except ImportError:
+    from rate_limit import (PRIORITY_AUTH, PRIORITY_SCROBBLE, TokenBucket,
+                            current_priority, get_rate_limiter, request_priority)
+    from session_cache import SessionKeyCache, get_session_cache
+    from spool import ScrobbleSpool
+
+T = TypeVar('T')
+
 logger = logging.getLogger(__name__)
 
+# Last.fm accepts at most this many scrobbles per track.scrobble request.
+MAX_BATCH_SIZE = 50
+
+# Seconds a queued scrobble may wait for more plays to share its request.
+DEFAULT_BATCH_DELAY = 2.0
+
+# Seconds all calls on an API key are held back after Last.fm error 29.
+RATE_LIMIT_PAUSE = 30.0
+
+# Plays held in memory per account before submit applies backpressure.
+DEFAULT_MAX_QUEUE = 500
+
+# Seconds submit waits for room in a full queue before giving up.
+DEFAULT_QUEUE_TIMEOUT = 0.1
+
+# Seconds the flusher leaves the spool alone after reading it failed.
+SPOOL_ERROR_DELAY = 30.0
+
+
+@dataclass
+class ScrobbleResult:
+    """Outcome of one queued scrobble."""
+    accepted: bool
+    error: Optional[str] = None
+    # Not accepted yet, but kept in the spool and retried later
+    spooled: bool = False
+    # Answered but not counted by Last.fm (e.g. timestamp too old); final
+    ignored: bool = False
+
+
+@dataclass
+class _PendingScrobble:
+    artist: str
+    title: str
+    timestamp: int
+    album: Optional[str]
+    future: Future = field(default_factory=Future)
+    queued_at: float = field(default_factory=time.monotonic)
+    spool_id: Optional[int] = None
+
+
+class _LimitedNetwork(pylast.LastFMNetwork):
+    """LastFMNetwork whose every API call, auth included, waits on a shared limiter."""
+    
+    def __init__(self, limiter: TokenBucket, **kwargs):
+        self._limiter = limiter
+        super().__init__(**kwargs)
+    
+    @property
+    def limit_rate(self) -> bool:
+        return True
+    
+    @limit_rate.setter
+    def limit_rate(self, value: bool):
+        # pylast's own fixed per-network delay is replaced by the shared limiter
+        pass
+    
+    def _delay_call(self):
+        self._limiter.acquire(current_priority())
+
 
 class LastFMClient:
     """Wrapper around pylast for Last.fm API interactions."""
     
     def __init__(self, username: str, api_key: str, api_secret: str, 
-                 password_hash: Optional[str] = None, password: Optional[str] = None):
+                 password_hash: Optional[str] = None, password: Optional[str] = None,
+                 batch_size: int = MAX_BATCH_SIZE, batch_delay: float = DEFAULT_BATCH_DELAY,
+                 spool: Optional[ScrobbleSpool] = None,
+                 max_queue: int = DEFAULT_MAX_QUEUE,
+                 queue_timeout: float = DEFAULT_QUEUE_TIMEOUT,
+                 session_cache: Optional[SessionKeyCache] = None):
         """
         Initialize Last.fm client.
         
@@ -22,31 +122,120 @@ class LastFMClient:
             api_secret: Last.fm API secret
             password_hash: MD5 hash of password (preferred)
             password: Plain text password (will be hashed if password_hash not provided)
+            batch_size: Queued scrobbles sent per request (at most MAX_BATCH_SIZE)
+            batch_delay: Seconds a queued scrobble waits for a fuller batch
+            spool: Durable store for submitted plays (optional)
+            max_queue: Plays held in memory before submit applies backpressure
+            queue_timeout: Seconds submit waits for room in a full queue
+            session_cache: Store for session keys (defaults to the process-wide
+                cache file)
         """
         self.username = username
         self.logger = logging.getLogger(f"{__name__}.{username}")
         
-        # Create network object
-        self.network = pylast.LastFMNetwork(
-            api_key=api_key,
-            api_secret=api_secret,
-            username=username,
-            password_hash=password_hash,
-        )
+        # Last.fm limits requests per API key, so clients sharing a key share
+        # one limiter
+        self.limiter = get_rate_limiter(api_key)
         
         # If password_hash not provided but password is, hash it
         if not password_hash and password:
-            import hashlib
             password_hash = hashlib.md5(password.encode('utf-8')).hexdigest()
-            self.network = pylast.LastFMNetwork(
+        self._api_key = api_key
+        self._password_hash = password_hash
+        self._auth_lock = threading.Lock()
+        
+        # Reuse a cached session key if there is one; otherwise pylast
+        # authenticates once here and the new key is cached
+        self.session_cache = session_cache or get_session_cache()
+        session_key = self.session_cache.get(api_key, username) if password_hash else None
+        
+        # Create network object
+        with request_priority(PRIORITY_AUTH):
+            self.network = _LimitedNetwork(
+                self.limiter,
                 api_key=api_key,
                 api_secret=api_secret,
                 username=username,
                 password_hash=password_hash,
+                session_key=session_key,
             )
+        if session_key:
+            self.logger.debug("Using cached Last.fm session key")
+        elif self.network.session_key:
+            self.session_cache.set(api_key, username, self.network.session_key)
+        
+        # Submission queue, drained by a flusher thread started on first submit
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.batch_delay = batch_delay
+        self._queue: List[_PendingScrobble] = []
+        self._queue_cond = threading.Condition()
+        self._flusher: Optional[threading.Thread] = None
+        self._flush_requested = False
+        self._closed = False
+        # Queue slots held by submits writing to the spool
+        self._reserved = 0
+        self.spool = spool
+        # Monotonic time before which a failing spool is not read again
+        self._spool_retry_at = 0.0
+        self.max_queue = max(self.batch_size, max_queue)
+        self.queue_timeout = queue_timeout
+        self.metrics = {
+            'submitted': 0,
+            'rejected': 0,        # queue full on submit
+            'batches': 0,
+            'accepted': 0,
+            'ignored': 0,
+            'failed': 0,
+            'max_queue_depth': 0,
+            'last_batch_seconds': None,
+            'max_wait_seconds': 0.0,  # longest submit-to-send delay seen
+        }
         
-        self._last_scrobble_time = 0
-        self._min_scrobble_interval = 1  # Minimum seconds between scrobbles
+        # Resume plays spooled by an earlier run
+        if spool is not None and spool.pending_count(username):
+            self.logger.info(f"Resuming {spool.pending_count(username)} spooled scrobble(s)")
+            with self._queue_cond:
+                self._start_flusher()
+    
+    def _reauthenticate(self, rejected_key: Optional[str]) -> bool:
+        """Replace a session key Last.fm rejected; False if that isn't possible."""
+        if not self._password_hash:
+            return False
+        with self._auth_lock:
+            if self.network.session_key != rejected_key:
+                return True  # another thread already re-authenticated
+            self.logger.warning("Last.fm rejected the session key - authenticating again")
+            self.session_cache.discard(self._api_key, self.username)
+            self.network.session_key = None  # the auth request must not carry the old key
+            with request_priority(PRIORITY_AUTH):
+                session_key = pylast.SessionKeyGenerator(self.network).get_session_key(
+                    self.username, self._password_hash
+                )
+            self.network.session_key = session_key
+            self.session_cache.set(self._api_key, self.username, session_key)
+        return True
+    
+    def _with_session(self, call: Callable[[], T]) -> T:
+        """Run an authenticated call, re-authenticating once if the key is rejected."""
+        session_key = self.network.session_key
+        try:
+            return call()
+        except pylast.WSError as e:
+            if e.get_id() != str(pylast.STATUS_INVALID_SK) or not self._reauthenticate(session_key):
+                raise
+        return call()
+    
+    def _log_ws_error(self, e: pylast.WSError):
+        error_msg = str(e)
+        self.logger.error(f"Last.fm API error: {error_msg}")
+        # Check for common error types
+        if e.get_id() == str(pylast.STATUS_RATE_LIMIT_EXCEEDED):
+            self.logger.error(f"Last.fm rate limit exceeded - pausing calls on this API key for {RATE_LIMIT_PAUSE:g}s")
+            self.limiter.pause(RATE_LIMIT_PAUSE)
+        elif "Invalid API key" in error_msg or "authentication failed" in error_msg.lower():
+            self.logger.error("Check your Last.fm API credentials - authentication failed")
+        elif "Malformed response" in error_msg:
+            self.logger.error("Last.fm API returned malformed response - check credentials and network")
     
     def scrobble(self, artist: str, title: str, timestamp: Optional[int] = None, 
                  album: Optional[str] = None) -> bool:
@@ -63,39 +252,290 @@ class LastFMClient:
             True if scrobble was successful, False otherwise
         """
         try:
-            # Rate limiting: ensure we don't scrobble too frequently
-            current_time = time.time()
-            if current_time - self._last_scrobble_time < self._min_scrobble_interval:
-                time.sleep(self._min_scrobble_interval - (current_time - self._last_scrobble_time))
-            
             if timestamp is None:
                 timestamp = int(time.time())
             
-            # Scrobble the track
-            self.network.scrobble(
-                artist=artist,
-                title=title,
-                timestamp=timestamp,
-                album=album if album else None
-            )
+            # Scrobble the track (rate limited by the shared limiter, ahead
+            # of metadata calls)
+            with request_priority(PRIORITY_SCROBBLE):
+                self._with_session(lambda: self.network.scrobble(
+                    artist=artist,
+                    title=title,
+                    timestamp=timestamp,
+                    album=album if album else None
+                ))
             
-            self._last_scrobble_time = time.time()
             self.logger.info(f"Scrobbled: {artist} - {title}")
             return True
             
         except pylast.WSError as e:
-            error_msg = str(e)
-            self.logger.error(f"Last.fm API error: {error_msg}")
-            # Check for common error types
-            if "Invalid API key" in error_msg or "authentication failed" in error_msg.lower():
-                self.logger.error("Check your Last.fm API credentials - authentication failed")
-            elif "Malformed response" in error_msg:
-                self.logger.error("Last.fm API returned malformed response - check credentials and network")
+            self._log_ws_error(e)
             return False
         except Exception as e:
             self.logger.error(f"Error scrobbling track: {e}", exc_info=True)
             return False
     
+    def submit(self, artist: str, title: str, timestamp: Optional[int] = None,
+               album: Optional[str] = None) -> Future:
+        """
+        Queue a track for batched scrobbling.
+        
+        Args:
+            artist: Artist name
+            title: Track title
+            timestamp: Unix timestamp (defaults to now)
+            album: Album name (optional)
+            
+        Returns:
+            Future resolving to a ``ScrobbleResult`` once the batch is sent
+        """
+        if timestamp is None:
+            timestamp = int(time.time())
+        pending = _PendingScrobble(artist, title, timestamp, album or None)
+        with self._queue_cond:
+            if self._closed:
+                raise RuntimeError("Last.fm client is closed")
+            self.metrics['submitted'] += 1
+            has_room = self._queue_cond.wait_for(
+                lambda: len(self._queue) + self._reserved < self.max_queue or self._closed,
+                self.queue_timeout,
+            )
+            if has_room:
+                # Hold the slot while the spool is written without the lock
+                self._reserved += 1
+            else:
+                self.metrics['rejected'] += 1
+        
+        if has_room:
+            try:
+                if self.spool is not None:
+                    pending.spool_id = self.spool.add(self.username, artist, title, timestamp, album or None)
+            except Exception:
+                with self._queue_cond:
+                    self._reserved -= 1
+                    self._queue_cond.notify_all()
+                raise
+            with self._queue_cond:
+                self._reserved -= 1
+                self._queue_cond.notify_all()
+                if self.spool is not None and pending.spool_id is None:
+                    result = ScrobbleResult(False, "already spooled", spooled=True)
+                elif self._closed:
+                    result = ScrobbleResult(False, "client closed", spooled=pending.spool_id is not None)
+                else:
+                    self._queue.append(pending)
+                    self.metrics['max_queue_depth'] = max(self.metrics['max_queue_depth'], len(self._queue))
+                    self._start_flusher()
+                    return pending.future
+            # Already spooled: the play is sent from there. Closed meanwhile:
+            # a spooled row is retried by the next run.
+            pending.future.set_result(result)
+            return pending.future
+        
+        # Backpressure: leave the play to the spool, unclaimed, or fail it
+        self.logger.warning(f"Submission queue full ({self.max_queue}); not queueing {artist} - {title}")
+        spooled = False
+        if self.spool is not None:
+            self.spool.add(self.username, artist, title, timestamp, album or None, claim=False)
+            spooled = True
+        pending.future.set_result(ScrobbleResult(False, "submission queue full", spooled=spooled))
+        return pending.future
+    
+    def get_metrics(self) -> dict:
+        """Queue depth and submission counters for this account."""
+        with self._queue_cond:
+            metrics = dict(self.metrics)
+            metrics['queue_depth'] = len(self._queue)
+        if self.spool is not None:
+            metrics['spooled'] = self.spool.pending_count(self.username)
+        return metrics
+    
+    def _start_flusher(self):
+        # Called with _queue_cond held
+        if self._flusher is None:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name=f"scrobble-{self.username}", daemon=True
+            )
+            self._flusher.start()
+    
+    def flush(self):
+        """Send queued scrobbles now instead of waiting for ``batch_delay``."""
+        with self._queue_cond:
+            self._flush_requested = True
+            self._queue_cond.notify()
+    
+    def close(self, timeout: Optional[float] = None):
+        """Send what is queued, then stop the flusher thread."""
+        with self._queue_cond:
+            self._closed = True
+            self._queue_cond.notify()
+            flusher = self._flusher
+        if flusher is not None:
+            flusher.join(timeout)
+    
+    def _next_batch(self) -> Optional[List[_PendingScrobble]]:
+        """Block until a batch is due; None once closed and drained."""
+        with self._queue_cond:
+            while True:
+                if (not self._queue and self.spool is not None and not self._closed
+                        and time.monotonic() >= self._spool_retry_at):
+                    try:
+                        self._load_spooled()
+                    except Exception as e:
+                        self._spool_failed(e)
+                if self._queue:
+                    wait = self._queue[0].queued_at + self.batch_delay - time.monotonic()
+                    if (len(self._queue) >= self.batch_size or wait <= 0
+                            or self._flush_requested or self._closed):
+                        batch = self._queue[:self.batch_size]
+                        del self._queue[:self.batch_size]
+                        if not self._queue:
+                            self._flush_requested = False
+                        self._queue_cond.notify_all()  # room for blocked submits
+                        return batch
+                    self._queue_cond.wait(wait)
+                elif self._closed:
+                    return None
+                else:
+                    self._flush_requested = False
+                    self._queue_cond.wait(self._spool_wait())
+    
+    def _load_spooled(self):
+        """Queue spooled plays whose retry time has come, to be sent at once."""
+        due = self.spool.claim_due(self.username, self.batch_size)
+        for row in due:
+            self._queue.append(_PendingScrobble(
+                row.artist, row.title, row.timestamp, row.album,
+                queued_at=time.monotonic() - self.batch_delay, spool_id=row.id,
+            ))
+        if due:
+            self.logger.info(f"Retrying {len(due)} spooled scrobble(s)")
+    
+    def _spool_wait(self) -> Optional[float]:
+        """Seconds until the next spooled retry is due (None: wait for submit)."""
+        if self.spool is None:
+            return None
+        backoff = self._spool_retry_at - time.monotonic()
+        if backoff > 0:
+            return backoff
+        try:
+            next_due = self.spool.next_due(self.username)
+        except Exception as e:
+            self._spool_failed(e)
+            return SPOOL_ERROR_DELAY
+        if next_due is None:
+            return None
+        return min(max(next_due - time.time(), 1.0), 60.0)
+    
+    def _spool_failed(self, error: Exception):
+        """Log a failed spool read and leave the spool alone for a while."""
+        self._spool_retry_at = time.monotonic() + SPOOL_ERROR_DELAY
+        self.logger.error(
+            f"Reading the scrobble spool failed: {error}; retrying in {SPOOL_ERROR_DELAY:.0f}s",
+            exc_info=True,
+        )
+    
+    def _flush_loop(self):
+        try:
+            self._flush_batches()
+        except Exception as e:
+            self.logger.error(f"Scrobble flusher stopped: {e}", exc_info=True)
+        finally:
+            # A flusher that died is restarted by the next submit
+            with self._queue_cond:
+                self._flusher = None
+    
+    def _flush_batches(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            started = time.monotonic()
+            try:
+                results, sent = self._scrobble_batch(batch)
+            except Exception as e:
+                results, sent = [ScrobbleResult(False, str(e))] * len(batch), False
+            self._record_batch(batch, results, sent, started)
+            if self.spool is not None:
+                results = self._settle_spooled(batch, results, sent)
+            for pending, result in zip(batch, results):
+                pending.future.set_result(result)
+    
+    def _record_batch(self, batch: List[_PendingScrobble], results: List[ScrobbleResult],
+                      sent: bool, started: float):
+        with self._queue_cond:
+            metrics = self.metrics
+            metrics['batches'] += 1
+            metrics['last_batch_seconds'] = round(time.monotonic() - started, 3)
+            metrics['max_wait_seconds'] = round(
+                max(metrics['max_wait_seconds'], started - min(p.queued_at for p in batch)), 3
+            )
+            if not sent:
+                metrics['failed'] += len(batch)
+            else:
+                accepted = sum(result.accepted for result in results)
+                metrics['accepted'] += accepted
+                metrics['ignored'] += len(batch) - accepted
+    
+    def _settle_spooled(self, batch: List[_PendingScrobble], results: List[ScrobbleResult],
+                        sent: bool) -> List[ScrobbleResult]:
+        """Drop answered plays from the spool; keep failed ones for a retry."""
+        ids = [pending.spool_id for pending in batch if pending.spool_id is not None]
+        try:
+            if sent:
+                # Accepted or ignored: either way Last.fm has answered for it
+                self.spool.complete(ids)
+                return results
+            retry_at = self.spool.retry_later(ids, results[0].error or "request failed")
+        except Exception as e:
+            self.logger.error(f"Scrobble spool update failed: {e}", exc_info=True)
+            return results
+        if retry_at is not None:
+            self.logger.warning(
+                f"Kept {len(ids)} scrobble(s) in the spool; next retry in {retry_at - time.time():.0f}s"
+            )
+        return [ScrobbleResult(False, result.error, spooled=pending.spool_id is not None)
+                for pending, result in zip(batch, results)]
+    
+    def _scrobble_batch(self, batch: List[_PendingScrobble]) -> Tuple[List[ScrobbleResult], bool]:
+        """
+        Send one track.scrobble request for up to MAX_BATCH_SIZE plays.
+        
+        Returns:
+            Per-item results, and whether Last.fm answered the request at all
+        """
+        params = {}
+        for i, pending in enumerate(batch):
+            params[f"artist[{i}]"] = pending.artist
+            params[f"track[{i}]"] = pending.title
+            params[f"timestamp[{i}]"] = pending.timestamp
+            if pending.album:
+                params[f"album[{i}]"] = pending.album
+        
+        try:
+            # pylast's scrobble_many discards the response, which carries the
+            # per-item accepted/ignored status, so the request is made directly.
+            with request_priority(PRIORITY_SCROBBLE):
+                doc = self._with_session(
+                    lambda: pylast._Request(self.network, "track.scrobble", params).execute()
+                )
+        except pylast.WSError as e:
+            self._log_ws_error(e)
+            return [ScrobbleResult(False, str(e))] * len(batch), False
+        except Exception as e:
+            self.logger.error(f"Error scrobbling batch of {len(batch)}: {e}", exc_info=True)
+            return [ScrobbleResult(False, str(e))] * len(batch), False
+        
+        results = _batch_results(doc, len(batch))
+        accepted = sum(result.accepted for result in results)
+        self.logger.info(f"Scrobbled batch: {accepted}/{len(batch)} accepted")
+        for pending, result in zip(batch, results):
+            if result.accepted:
+                self.logger.debug(f"Scrobbled: {pending.artist} - {pending.title}")
+            else:
+                self.logger.warning(f"Last.fm ignored {pending.artist} - {pending.title}: {result.error}")
+        return results, True
+    
     def test_connection(self) -> bool:
         """
         Test the connection to Last.fm API.
@@ -112,3 +552,19 @@ class LastFMClient:
         except Exception as e:
             self.logger.error(f"Failed to connect to Last.fm: {e}")
             return False
+
+
+def _batch_results(doc: minidom.Document, count: int) -> List[ScrobbleResult]:
+    """Per-item results from a track.scrobble response, in request order."""
+    results = []
+    for element in doc.getElementsByTagName("scrobble")[:count]:
+        ignored = element.getElementsByTagName("ignoredMessage")
+        code = ignored[0].getAttribute("code") if ignored else "0"
+        if code in ("", "0"):
+            results.append(ScrobbleResult(True))
+        else:
+            message = ignored[0].firstChild.data.strip() if ignored[0].firstChild else ""
+            results.append(ScrobbleResult(False, message or f"ignored (code {code})", ignored=True))
+    # A response without per-item elements still means the request succeeded.
+    results.extend(ScrobbleResult(True) for _ in range(count - len(results)))
+    return results
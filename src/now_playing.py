@@ -0,0 +1,296 @@
+"""Shared now-playing hub.
+
+Every consumer of a station (the multi-station ``RadioScrobbler`` and any
+number of ``PersonalScrobbler`` instances) reads the station through one hub
+instead of owning its own fetcher. The hub keeps a single fetcher per
+station, lets only one fetch per station run at a time, caches the result
+for a short TTL and hands it to every caller and subscriber. Upstream load
+therefore stays flat no matter how many users follow the same station.
+
+The TTL defaults to ``DEFAULT_TTL`` seconds and can be set with the
+``NOW_PLAYING_TTL`` environment variable or ``configure_now_playing_hub``.
+
+Tracks can also be pushed: by a push-style fetcher (``publish``) or by an
+external source through the ingest endpoint (``ingest``). An ingested
+station is served from its pushed plays without any upstream fetch until its
+push lease runs out.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+try:
+    from .stations.base import BaseStationFetcher, TrackInfo
+except ImportError:
+    from stations.base import BaseStationFetcher, TrackInfo
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 10.0
+
+# Seconds an ingest push keeps a station off upstream fetches.
+DEFAULT_PUSH_LEASE = 600.0
+
+# Pushed plays kept per station (newest first).
+MAX_PUSHED_PLAYS = 30
+
+Subscriber = Callable[[str, Optional[TrackInfo]], None]
+
+
+@dataclass
+class _StationState:
+    """Fetcher, last result and subscribers for one station."""
+    fetcher: BaseStationFetcher
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    track: Optional[TrackInfo] = None
+    fetched_at: float = 0.0
+    recent: List[TrackInfo] = field(default_factory=list)
+    recent_fetched_at: float = 0.0
+    pushed: bool = False
+    push_lease_until: float = 0.0
+    subscribers: List[Subscriber] = field(default_factory=list)
+
+
+class NowPlayingHub:
+    """Single-flight, briefly cached access to every station's current track."""
+
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        """
+        Initialize the hub.
+
+        Args:
+            ttl: Seconds a fetched result is shared before the next fetch
+        """
+        self.ttl = ttl
+        self._stations: Dict[str, _StationState] = {}
+        self._lock = threading.Lock()
+
+    def ensure_station(self, name: str, factory: Callable[[], BaseStationFetcher]) -> BaseStationFetcher:
+        """
+        Return the shared fetcher for a station, creating it on first use.
+
+        Args:
+            name: Station name (key in ``STATION_FETCHERS``)
+            factory: Fetcher class or factory function
+
+        Returns:
+            The station's fetcher
+        """
+        with self._lock:
+            state = self._stations.get(name)
+            if state is None:
+                state = _StationState(fetcher=factory())
+                self._stations[name] = state
+                state.pushed = state.fetcher.start_push(
+                    lambda track: self.publish(name, track)
+                )
+            return state.fetcher
+
+    def is_pushed(self, name: str) -> bool:
+        """True if the station's fetcher pushes track changes (see ``publish``)."""
+        state = self._stations.get(name)
+        return state is not None and state.pushed
+
+    def publish(self, name: str, track: Optional[TrackInfo]):
+        """
+        Record a track pushed by a station's fetcher and notify subscribers.
+
+        Push-style fetchers (e.g. ``IcyStreamFetcher``) call this on every
+        change; the track is then served to ``fetch`` callers like a fresh
+        fetch result.
+        """
+        state = self._stations.get(name)
+        if state is None:
+            return
+        with state.lock:
+            state.track = track
+            state.fetched_at = time.time()
+        self._notify(name, state, track)
+
+    def fetch(self, name: str) -> Optional[TrackInfo]:
+        """
+        Return the station's current track, fetching it at most once per TTL.
+
+        Concurrent callers for the same station wait for the fetch already in
+        flight and share its result. A cached track whose ``next_change_at``
+        has passed is treated as stale.
+
+        Args:
+            name: Station name (must have been added with ``ensure_station``)
+
+        Returns:
+            The current track, or None if nothing is playing
+
+        Raises:
+            KeyError: If the station is unknown to the hub
+        """
+        state = self._stations[name]
+        if self._is_fresh(state) or self._is_leased(state):
+            return state.track
+
+        with state.lock:
+            if self._is_fresh(state) or self._is_leased(state):
+                return state.track
+            track = state.fetcher.get_current_track()
+            state.track = track
+            state.fetched_at = time.time()
+
+        self._notify(name, state, track)
+        return track
+
+    def fetch_recent(self, name: str) -> List[TrackInfo]:
+        """
+        Return the station's recent plays, fetching them at most once per TTL.
+
+        The newest play also becomes the station's current track, so callers
+        of ``fetch`` and subscribers share the playlist fetch.
+
+        Args:
+            name: Station name (must have been added with ``ensure_station``)
+
+        Returns:
+            Recent plays, newest first (see ``BaseStationFetcher.get_recent_tracks``)
+
+        Raises:
+            KeyError: If the station is unknown to the hub
+        """
+        state = self._stations[name]
+        if self._is_recent_fresh(state) or self._is_leased(state):
+            return state.recent
+
+        with state.lock:
+            if self._is_recent_fresh(state) or self._is_leased(state):
+                return state.recent
+            recent = state.fetcher.get_recent_tracks()
+            track = recent[0] if recent else None
+            state.recent = recent
+            state.track = track
+            state.fetched_at = state.recent_fetched_at = time.time()
+
+        self._notify(name, state, track)
+        return recent
+
+    def has_station(self, name: str) -> bool:
+        """True if the station has been added with ``ensure_station``."""
+        return name in self._stations
+
+    def ingest(self, name: str, tracks: List[TrackInfo], lease: float = DEFAULT_PUSH_LEASE):
+        """
+        Record plays pushed by an external source and notify subscribers.
+
+        The plays are merged with earlier pushed plays by ``played_at``, so a
+        consumer that reads the station later still sees every play of a
+        burst of pushes. Until ``lease`` seconds after the last push,
+        ``fetch`` and ``fetch_recent`` serve the pushed plays and never call
+        the fetcher.
+
+        Args:
+            name: Station name (must have been added with ``ensure_station``)
+            tracks: Pushed plays, each with ``played_at`` set
+            lease: Seconds the station stays push-fed without further pushes
+
+        Raises:
+            KeyError: If the station is unknown to the hub
+        """
+        state = self._stations[name]
+        now = time.time()
+        with state.lock:
+            previous = state.recent if self._is_leased(state) else []
+            plays = {(track.key, track.played_at): track for track in previous}
+            plays.update(((track.key, track.played_at), track) for track in tracks)
+            recent = sorted(plays.values(), key=lambda track: track.played_at or 0.0, reverse=True)
+            state.recent = recent[:MAX_PUSHED_PLAYS]
+            state.track = state.recent[0] if state.recent else None
+            state.fetched_at = state.recent_fetched_at = now
+            state.push_lease_until = now + lease
+            track = state.track
+
+        self._notify(name, state, track)
+
+    def push_lease_remaining(self, name: str) -> float:
+        """Seconds the station stays fed by ingest pushes (0 if it is polled)."""
+        state = self._stations.get(name)
+        if state is None:
+            return 0.0
+        return max(0.0, state.push_lease_until - time.time())
+
+    def subscribe(self, name: str, callback: Subscriber):
+        """
+        Call ``callback(station_name, track)`` after every fresh result for a station.
+
+        Callbacks run on the thread that produced the result and must not block.
+        """
+        with self._lock:
+            state = self._stations[name]
+            state.subscribers.append(callback)
+
+    def unsubscribe(self, name: str, callback: Subscriber):
+        """Stop delivering results for a station to ``callback``."""
+        with self._lock:
+            state = self._stations.get(name)
+            if state is not None and callback in state.subscribers:
+                state.subscribers.remove(callback)
+
+    def _is_fresh(self, state: _StationState) -> bool:
+        now = time.time()
+        if not state.fetched_at or now - state.fetched_at >= self.ttl:
+            return False
+        track = state.track
+        if track is not None and track.next_change_at is not None and now >= track.next_change_at:
+            return False
+        return True
+
+    @staticmethod
+    def _is_leased(state: _StationState) -> bool:
+        return state.push_lease_until > time.time()
+
+    def _is_recent_fresh(self, state: _StationState) -> bool:
+        # The playlist is only as fresh as the current track taken from it
+        return state.recent_fetched_at == state.fetched_at and self._is_fresh(state)
+
+    def _notify(self, name: str, state: _StationState, track: Optional[TrackInfo]):
+        for callback in list(state.subscribers):
+            try:
+                callback(name, track)
+            except Exception as e:
+                logger.error(f"Now-playing subscriber failed for {name}: {e}", exc_info=True)
+
+
+_hub: Optional[NowPlayingHub] = None
+_hub_lock = threading.Lock()
+
+
+def get_now_playing_hub() -> NowPlayingHub:
+    """Return the process-wide hub, creating it on first use."""
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                ttl = DEFAULT_TTL
+                if os.getenv('NOW_PLAYING_TTL'):
+                    try:
+                        ttl = float(os.getenv('NOW_PLAYING_TTL'))
+                    except ValueError:
+                        logger.warning(f"Ignoring invalid NOW_PLAYING_TTL={os.getenv('NOW_PLAYING_TTL')!r}")
+                _hub = NowPlayingHub(ttl=ttl)
+    return _hub
+
+
+def configure_now_playing_hub(**kwargs) -> NowPlayingHub:
+    """
+    Replace the process-wide hub. Call this at startup, before stations are added.
+
+    Args:
+        **kwargs: Passed to ``NowPlayingHub``
+
+    Returns:
+        The new hub
+    """
+    global _hub
+    with _hub_lock:
+        _hub = NowPlayingHub(**kwargs)
+    return _hub
@@ -10,13 +10,21 @@ from typing import Optional, Dict
 from dataclasses import dataclass
 
 try:
-    from .lastfm_client import LastFMClient
+    from .dedup import RecentPlays
+    from .lastfm_client import LastFMClient, ScrobbleResult
     from .stations.base import BaseStationFetcher, TrackInfo
     from .scrobbler import STATION_FETCHERS
+    from .now_playing import NowPlayingHub, get_now_playing_hub
+    from .scheduler import AdaptiveInterval
+    from .state_store import StateStore, state_key
 except ImportError:
-    from lastfm_client import LastFMClient
+    from dedup import RecentPlays
+    from lastfm_client import LastFMClient, ScrobbleResult
     from stations.base import BaseStationFetcher, TrackInfo
     from scrobbler import STATION_FETCHERS
+    from now_playing import NowPlayingHub, get_now_playing_hub
+    from scheduler import AdaptiveInterval
+    from state_store import StateStore, state_key
 
 logger = logging.getLogger(__name__)
 
@@ -38,8 +46,11 @@ class PersonalScrobbler:
                  lastfm_api_secret: str, lastfm_password: Optional[str] = None,
                  lastfm_password_hash: Optional[str] = None,
                  poll_interval: int = 30,
+                 max_poll_interval: Optional[int] = None,
                  max_consecutive_errors: int = 5,
-                 auto_stop_on_errors: bool = True):
+                 auto_stop_on_errors: bool = True,
+                 hub: Optional[NowPlayingHub] = None,
+                 state_store: Optional[StateStore] = None):
         """
         Initialize personal scrobbler.
         
@@ -50,8 +61,13 @@ class PersonalScrobbler:
             lastfm_password: Plain text password (optional)
             lastfm_password_hash: MD5 hash of password (optional)
             poll_interval: Seconds between polling attempts
+            max_poll_interval: Upper bound for the adaptive polling delay
             max_consecutive_errors: Auto-stop after this many consecutive errors
             auto_stop_on_errors: Whether to auto-stop on repeated errors
+            hub: Now-playing hub shared with other consumers (defaults to the
+                process-wide hub)
+            state_store: Persists the last scrobble per station so a restart
+                doesn't scrobble the current track again (optional)
         """
         self.lastfm_client = LastFMClient(
             username=lastfm_username,
@@ -62,11 +78,15 @@ class PersonalScrobbler:
         )
         
         self.poll_interval = poll_interval
+        self._interval = AdaptiveInterval(poll_interval, max_interval=max_poll_interval)
         self.max_consecutive_errors = max_consecutive_errors
         self.auto_stop_on_errors = auto_stop_on_errors
+        self.hub = hub or get_now_playing_hub()
+        self.state_store = state_store
         self._active_station: Optional[str] = None
         self._fetcher: Optional[BaseStationFetcher] = None
         self._last_track: Optional[TrackInfo] = None
+        self._recent_plays = RecentPlays()
         self._status = ScrobblerStatus(is_active=False)
         self._stop_event = threading.Event()
         self._thread: Optional[threading.Thread] = None
@@ -99,18 +119,17 @@ class PersonalScrobbler:
                 self._status.error = error_msg
                 return False
             
-            # Create fetcher instance
+            # Get the station's shared fetcher from the hub
             try:
                 fetcher_factory = STATION_FETCHERS[station_name]
-                # Handle lambda functions (like fipjazz)
-                if callable(fetcher_factory) and not isinstance(fetcher_factory, type):
-                    fetcher = fetcher_factory()
-                else:
-                    fetcher = fetcher_factory()
+                fetcher = self.hub.ensure_station(station_name, fetcher_factory)
                 
                 self._fetcher = fetcher
                 self._active_station = station_name
                 self._last_track = None
+                self._recent_plays.clear()
+                self._restore_state(station_name)
+                self._interval.reset()
                 self._status = ScrobblerStatus(
                     is_active=True,
                     station_name=station_name,
@@ -170,9 +189,10 @@ class PersonalScrobbler:
         logger.info(f"Polling loop started for {self._active_station}")
         
         while not self._stop_event.is_set():
+            current_track = None
             try:
                 # Fetch current track
-                current_track = self._fetcher.get_current_track()
+                current_track = self.hub.fetch(self._active_station)
                 
                 with self._lock:
                     self._status.current_track = current_track
@@ -183,28 +203,16 @@ class PersonalScrobbler:
                     with self._lock:
                         self._consecutive_errors = 0
                     
-                    # Check if track changed
+                    # Check if track changed (equality is on the normalized
+                    # artist/title)
                     if self._last_track and current_track == self._last_track:
                         logger.debug(f"Track unchanged: {current_track}")
+                    elif self._recent_plays.seen(current_track):
+                        # Flipped back to a track scrobbled a moment ago
+                        logger.debug(f"Track recently scrobbled: {current_track}")
+                        self._last_track = current_track
                     else:
-                        # Normalize for comparison
-                        if self._last_track:
-                            last_normalized = (
-                                self._last_track.artist.lower().strip(),
-                                self._last_track.title.lower().strip()
-                            )
-                            current_normalized = (
-                                current_track.artist.lower().strip(),
-                                current_track.title.lower().strip()
-                            )
-                            if last_normalized == current_normalized:
-                                logger.debug(f"Track unchanged (normalized): {current_track}")
-                            else:
-                                # Scrobble new track
-                                self._scrobble_track(current_track)
-                        else:
-                            # First track, scrobble it
-                            self._scrobble_track(current_track)
+                        self._scrobble_track(current_track)
                 
                 else:
                     logger.debug(f"No track currently playing on {self._active_station}")
@@ -226,25 +234,71 @@ class PersonalScrobbler:
                         self._stop_event.set()
                         break
             
-            # Wait for next poll or stop signal
-            self._stop_event.wait(self.poll_interval)
+            # Wait for next poll (shortly after the expected track change,
+            # if the fetcher knows it) or stop signal
+            self._stop_event.wait(self._interval.next_delay(current_track))
         
         logger.info(f"Polling loop stopped for {self._active_station}")
     
     def _scrobble_track(self, track: TrackInfo):
-        """Scrobble a track."""
+        """Queue a track for scrobbling without waiting for Last.fm."""
         try:
-            success = self.lastfm_client.scrobble(
-                artist=track.artist,
-                title=track.title,
-                album=track.album
+            # Counts as scrobbled right away so the next poll doesn't queue it
+            # again; a rejected scrobble restores the previous track.
+            previous, self._last_track = self._last_track, track
+            self._recent_plays.record(track)
+            try:
+                future = self.lastfm_client.submit(
+                    artist=track.artist,
+                    title=track.title,
+                    album=track.album
+                )
+            except Exception:
+                # Nothing was queued: undo, so the next poll tries again
+                with self._lock:
+                    if self._last_track is track:
+                        self._last_track = previous
+                self._recent_plays.forget(track)
+                raise
+            station_name = self._active_station
+            future.add_done_callback(
+                lambda done: self._on_scrobbled(station_name, track, previous, done.result())
             )
-            
-            if success:
-                self._last_track = track
-                logger.info(f"Scrobbled: {track}")
-            else:
-                logger.warning(f"Failed to scrobble: {track}")
                 
         except Exception as e:
             logger.error(f"Error scrobbling track: {e}", exc_info=True)
+    
+    def _restore_state(self, station_name: str):
+        """Seed the dedup state with the station's last scrobble before a restart."""
+        if self.state_store is None:
+            return
+        saved = self.state_store.last_scrobbled(state_key(station_name, self.lastfm_client.username))
+        if saved is None:
+            return
+        track, scrobbled_at = saved
+        self._recent_plays.record(track, now=scrobbled_at)
+        if self._recent_plays.seen(track):
+            self._last_track = track
+    
+    def _on_scrobbled(self, station_name: str, track: TrackInfo, previous: Optional[TrackInfo],
+                      result: ScrobbleResult):
+        """Handle the Last.fm result for a queued track."""
+        if result.accepted:
+            logger.info(f"Scrobbled: {track}")
+        elif result.spooled:
+            logger.warning(f"Scrobble deferred: {track} ({result.error})")
+        elif result.ignored:
+            # Last.fm answered; sending the play again would be ignored too
+            logger.warning(f"Last.fm ignored: {track} ({result.error})")
+        else:
+            logger.warning(f"Failed to scrobble: {track} ({result.error})")
+            with self._lock:
+                if self._last_track is track:
+                    self._last_track = previous
+            self._recent_plays.forget(track)
+            return
+        
+        if self.state_store is not None:
+            self.state_store.set_last_scrobbled(
+                state_key(station_name, self.lastfm_client.username), track
+            )
@@ -0,0 +1,193 @@
+"""Shared, prioritised rate limiting for Last.fm API calls.
+
+Last.fm enforces its request limits per API key (and per client IP), not per
+``LastFMClient``, and several station accounts often share one key. Every
+client therefore draws from one ``TokenBucket`` per API key, obtained with
+``get_rate_limiter``; if ``LASTFM_IP_RATE_LIMIT`` is set, all keys also draw
+from one process-wide bucket for the host's IP.
+
+Waiting callers are served by priority, so scrobbles go ahead of session
+setup, which goes ahead of ``test_connection`` and other metadata calls.
+Code marks its calls with ``request_priority``; unmarked calls count as
+metadata.
+
+Limits come from the environment: ``LASTFM_RATE_LIMIT`` (requests per second
+per key, default ``DEFAULT_RATE``), ``LASTFM_RATE_BURST`` (default
+``DEFAULT_BURST``) and ``LASTFM_IP_RATE_LIMIT`` (requests per second for the
+whole process, unset by default).
+"""
+
+import heapq
+import itertools
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Lower values are served first.
+PRIORITY_SCROBBLE = 0
+PRIORITY_AUTH = 1
+PRIORITY_METADATA = 2
+
+DEFAULT_RATE = 4.0
+DEFAULT_BURST = 8
+
+_local = threading.local()
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Run the enclosed Last.fm calls (on this thread) at ``priority``."""
+    previous = getattr(_local, 'priority', None)
+    _local.priority = priority
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+def current_priority() -> int:
+    """Priority set by the innermost ``request_priority`` on this thread."""
+    priority = getattr(_local, 'priority', None)
+    return PRIORITY_METADATA if priority is None else priority
+
+
+class TokenBucket:
+    """Token bucket whose waiters are served in priority order.
+
+    Tokens refill at ``rate`` per second up to ``burst``. A token is handed
+    to the highest-priority waiter (first come, first served within a
+    priority). With a ``parent`` bucket, each acquire also takes a token there.
+    """
+
+    def __init__(self, rate: float, burst: float, parent: Optional['TokenBucket'] = None):
+        """
+        Initialize the bucket, full.
+
+        Args:
+            rate: Tokens added per second (must be positive)
+            burst: Bucket capacity
+            parent: Bucket that must also grant every request (optional)
+
+        Raises:
+            ValueError: If ``rate`` is not a positive number
+        """
+        if not (rate > 0 and math.isfinite(rate)):
+            raise ValueError(f"rate must be a positive number, got {rate!r}")
+        self.rate = rate
+        self.capacity = max(1.0, float(burst))
+        self.parent = parent
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def acquire(self, priority: int = PRIORITY_METADATA, timeout: Optional[float] = None) -> bool:
+        """
+        Take one token, waiting behind higher-priority callers if needed.
+
+        Args:
+            priority: Lower values are served first
+            timeout: Give up after this many seconds (None waits forever)
+
+        Returns:
+            True if a token was taken, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        entry = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            self._cond.notify_all()
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = None
+                    if self._waiters[0] == entry:
+                        if now >= self._paused_until and self._tokens >= 1:
+                            self._tokens -= 1
+                            break
+                        wait = max(self._paused_until - now, (1 - self._tokens) / self.rate, 0.001)
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+        if self.parent is not None:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self.parent.acquire(priority, remaining):
+                # The request is not made, so its token here is not spent
+                self._refund()
+                return False
+        return True
+
+    def pause(self, seconds: float):
+        """Hand out no tokens for ``seconds`` (e.g. after a rate-limit error)."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+            self._cond.notify_all()
+        if self.parent is not None:
+            self.parent.pause(seconds)
+
+    def _refund(self):
+        with self._cond:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens + 1)
+            self._cond.notify_all()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    """A positive number from the environment; anything else falls back to ``default``."""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        number = None
+    if number is None or not (number > 0 and math.isfinite(number)):
+        logger.warning(f"Ignoring invalid {name}={value!r} (must be a positive number)")
+        return default
+    return number
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_ip_limiter: Optional[TokenBucket] = None
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(api_key: str) -> TokenBucket:
+    """Return the bucket shared by every client using ``api_key``."""
+    global _ip_limiter
+    with _limiters_lock:
+        limiter = _limiters.get(api_key)
+        if limiter is None:
+            if _ip_limiter is None:
+                ip_rate = _env_float('LASTFM_IP_RATE_LIMIT', None)
+                if ip_rate:
+                    _ip_limiter = TokenBucket(ip_rate, max(1.0, ip_rate * 2))
+            rate = _env_float('LASTFM_RATE_LIMIT', DEFAULT_RATE)
+            burst = _env_float('LASTFM_RATE_BURST', DEFAULT_BURST)
+            limiter = TokenBucket(rate, burst, parent=_ip_limiter)
+            _limiters[api_key] = limiter
+        return limiter
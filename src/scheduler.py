@@ -0,0 +1,247 @@
+"""Deadline scheduler for station polling."""
+
+import heapq
+import itertools
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+try:
+    from .stations.base import TrackInfo
+except ImportError:
+    from stations.base import TrackInfo
+
+logger = logging.getLogger(__name__)
+
+# Default spread (seconds) applied to station start times.
+DEFAULT_START_JITTER = 10.0
+
+# Default per-poll jitter, as a fraction of the station's interval (+/-).
+DEFAULT_POLL_JITTER = 0.1
+
+# Seconds to wait past a fetcher's "next change expected at" hint.
+DEFAULT_HINT_MARGIN = 3.0
+
+# Without a hint, back off up to this multiple of poll_interval.
+DEFAULT_MAX_INTERVAL_FACTOR = 4
+
+
+class PollScheduler:
+    """
+    Min-heap of per-station poll deadlines.
+
+    Each station has at most one pending deadline. The next deadline is
+    derived from the previous *scheduled* time rather than from when the poll
+    finished, so a station does not drift later with every slow poll. When a
+    poll overruns one or more whole intervals the missed slots are skipped
+    (never replayed as a burst) and the station keeps its original phase.
+
+    Jitter is applied on top of that base schedule and never accumulates.
+    """
+
+    def __init__(self, start_jitter: float = DEFAULT_START_JITTER,
+                 poll_jitter: float = DEFAULT_POLL_JITTER,
+                 rng: Optional[random.Random] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            start_jitter: Maximum random delay (seconds) before a station's first
+                poll; capped at the station's interval
+            poll_jitter: Random offset applied to every deadline, as a fraction
+                of the station's interval (e.g. 0.1 = +/-10%)
+            rng: Random generator (for reproducible schedules)
+        """
+        self.start_jitter = max(0.0, start_jitter)
+        self.poll_jitter = min(max(0.0, poll_jitter), 0.5)
+        self._rng = rng or random.Random()
+        self._heap: List[Tuple[float, int, str]] = []
+        self._counter = itertools.count()
+        # Current deadline per station; heap entries that don't match are stale.
+        self._deadlines: Dict[str, float] = {}
+        self._base: Dict[str, float] = {}
+        self._intervals: Dict[str, float] = {}
+        # Stations to poll again as soon as their in-flight poll finishes
+        self._expedited: Set[str] = set()
+        self.missed: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def add(self, name: str, interval: float, now: Optional[float] = None):
+        """Register a station; its first poll is spread by ``start_jitter``."""
+        now = time.time() if now is None else now
+        self._intervals[name] = max(interval, 0.001)
+        self.missed.setdefault(name, 0)
+        offset = self._rng.uniform(0, min(self.start_jitter, self._intervals[name]))
+        self._base[name] = now + offset
+        self._push(name, now + offset)
+
+    def remove(self, name: str):
+        """Forget a station; any pending deadline is dropped."""
+        self._intervals.pop(name, None)
+        self._base.pop(name, None)
+        self._deadlines.pop(name, None)
+        self._expedited.discard(name)
+
+    def expedite(self, name: str, now: Optional[float] = None) -> bool:
+        """
+        Poll a station now instead of at its deadline (e.g. on a pushed change).
+
+        A station whose poll is in flight is polled again as soon as that
+        poll is rescheduled. Its phase is kept either way.
+
+        Returns:
+            True if the station is known
+        """
+        if name not in self._intervals:
+            return False
+        now = time.time() if now is None else now
+        deadline = self._deadlines.get(name)
+        if deadline is None:
+            self._expedited.add(name)
+        elif deadline > now:
+            self._push(name, now)
+        return True
+
+    def pop_due(self, now: Optional[float] = None) -> List[str]:
+        """
+        Pop every station whose deadline has passed.
+
+        Popped stations have no pending deadline until ``reschedule`` is called,
+        which is how the caller marks a poll as in flight.
+        """
+        now = time.time() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, name = heapq.heappop(self._heap)
+            if self._deadlines.get(name) != deadline:
+                continue  # stale entry
+            del self._deadlines[name]
+            due.append(name)
+        return due
+
+    def next_deadline(self) -> Optional[float]:
+        """Return the earliest pending deadline, or None if nothing is pending."""
+        while self._heap:
+            deadline, _, name = self._heap[0]
+            if self._deadlines.get(name) == deadline:
+                return deadline
+            heapq.heappop(self._heap)
+        return None
+
+    def delay_until_next(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until the earliest deadline (0 if overdue, None if idle)."""
+        deadline = self.next_deadline()
+        if deadline is None:
+            return None
+        now = time.time() if now is None else now
+        return max(0.0, deadline - now)
+
+    def reschedule(self, name: str, now: Optional[float] = None,
+                   delay: Optional[float] = None,
+                   interval: Optional[float] = None) -> Optional[float]:
+        """
+        Schedule the next poll after the previous one has finished.
+
+        Args:
+            name: Station name
+            now: Current time (defaults to time.time())
+            delay: Explicit delay until the next poll (e.g. from a track-change
+                hint). Starts a new phase for the station and is not jittered.
+            interval: Interval for this step instead of the station's own
+                (e.g. a backed-off one); counted from the previous scheduled
+                time and jittered like a regular deadline.
+
+        Returns:
+            The new deadline, or None if the station has been removed
+        """
+        if name not in self._intervals:
+            return None
+        now = time.time() if now is None else now
+        if name in self._expedited:
+            self._expedited.discard(name)
+            self._push(name, now)
+            return now
+        if delay is not None:
+            self._base[name] = now + max(0.0, delay)
+            self._push(name, self._base[name])
+            return self._base[name]
+        interval = max(interval, 0.001) if interval is not None else self._intervals[name]
+        base = self._base[name] + interval
+        if base <= now:
+            skipped = int((now - base) // interval) + 1
+            base += skipped * interval
+            self.missed[name] += skipped
+            logger.debug(f"{name}: poll overran, skipped {skipped} missed deadline(s)")
+        self._base[name] = base
+        jitter = self._rng.uniform(-self.poll_jitter, self.poll_jitter) * interval
+        deadline = max(now, base + jitter)
+        self._push(name, deadline)
+        return deadline
+
+    def _push(self, name: str, deadline: float):
+        self._deadlines[name] = deadline
+        heapq.heappush(self._heap, (deadline, next(self._counter), name))
+
+
+class AdaptiveInterval:
+    """
+    Decide how long to wait before polling a station again.
+
+    When the fetcher returned a ``next_change_at`` hint that is still in the
+    future, the next poll lands shortly after it. Otherwise the delay starts at
+    ``base_interval`` and doubles every time the track comes back unchanged,
+    up to ``max_interval``; a new track resets it.
+    """
+
+    def __init__(self, base_interval: float, max_interval: Optional[float] = None,
+                 min_interval: Optional[float] = None,
+                 hint_margin: float = DEFAULT_HINT_MARGIN,
+                 backoff_factor: float = 2.0):
+        """
+        Initialize the interval policy.
+
+        Args:
+            base_interval: Normal seconds between polls (station poll_interval)
+            max_interval: Upper bound for any delay
+                (default: DEFAULT_MAX_INTERVAL_FACTOR * base_interval)
+            min_interval: Lower bound for hint-driven delays (default: min(5, base))
+            hint_margin: Seconds to wait past the hinted change time
+            backoff_factor: Multiplier applied while the track is unchanged
+        """
+        self.base_interval = base_interval
+        self.max_interval = max(max_interval or base_interval * DEFAULT_MAX_INTERVAL_FACTOR,
+                                base_interval)
+        self.min_interval = min_interval if min_interval is not None else min(5.0, base_interval)
+        self.hint_margin = hint_margin
+        self.backoff_factor = backoff_factor
+        self._last_track: Optional[TrackInfo] = None
+        self._unchanged = 0
+        # Whether the last delay came from a track-change hint
+        self.hinted = False
+
+    def reset(self):
+        """Forget the previous track and restart from ``base_interval``."""
+        self._last_track = None
+        self._unchanged = 0
+
+    def next_delay(self, track: Optional[TrackInfo], now: Optional[float] = None) -> float:
+        """Return the delay (seconds) before the next poll, given the latest result."""
+        now = time.time() if now is None else now
+
+        if track is not None and track == self._last_track:
+            self._unchanged += 1
+        else:
+            self._unchanged = 0
+        self._last_track = track
+
+        hint = track.next_change_at if track is not None else None
+        self.hinted = hint is not None and hint + self.hint_margin > now
+        if self.hinted:
+            delay = hint + self.hint_margin - now
+            return min(max(delay, self.min_interval), self.max_interval)
+
+        delay = self.base_interval * (self.backoff_factor ** self._unchanged)
+        return min(delay, self.max_interval)
@@ -1,28 +1,55 @@
 """Main scrobbler service that orchestrates station polling and scrobbling."""
 
+import asyncio
+import concurrent.futures
 import logging
+import threading
 import time
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
 try:
-    from .lastfm_client import LastFMClient
+    from .dedup import RecentPlays
+    from .lastfm_client import LastFMClient, ScrobbleResult
+    from .now_playing import NowPlayingHub, get_now_playing_hub
+    from .scheduler import AdaptiveInterval, PollScheduler, DEFAULT_START_JITTER, DEFAULT_POLL_JITTER
+    from .spool import ScrobbleSpool
+    from .state_store import StateStore, state_key
     from .stations.base import BaseStationFetcher, TrackInfo
     from .stations.fip import FIPFetcher
     from .stations.fm4 import FM4Fetcher
+    from .stations.icy import IcyStreamFetcher
     from .stations.ness import NessFetcher
     from .stations.radionova import RadioNovaFetcher
 except ImportError:
     # Allow imports when running as a module
-    from lastfm_client import LastFMClient
+    from dedup import RecentPlays
+    from lastfm_client import LastFMClient, ScrobbleResult
+    from now_playing import NowPlayingHub, get_now_playing_hub
+    from scheduler import AdaptiveInterval, PollScheduler, DEFAULT_START_JITTER, DEFAULT_POLL_JITTER
+    from spool import ScrobbleSpool
+    from state_store import StateStore, state_key
     from stations.base import BaseStationFetcher, TrackInfo
     from stations.fip import FIPFetcher
     from stations.fm4 import FM4Fetcher
+    from stations.icy import IcyStreamFetcher
     from stations.ness import NessFetcher
     from stations.radionova import RadioNovaFetcher
 
 logger = logging.getLogger(__name__)
 
+# Default cap on how many station polls may be in flight at the same time.
+DEFAULT_MAX_CONCURRENT_POLLS = 8
+
+# Station initialization (Last.fm auth + connection test) runs on this many
+# threads; start-up waits at most DEFAULT_INIT_TIMEOUT seconds for it, and
+# stations that failed or are still initializing are retried in the
+# background every DEFAULT_INIT_RETRY_INTERVAL seconds.
+DEFAULT_INIT_WORKERS = 8
+DEFAULT_INIT_TIMEOUT = 30.0
+DEFAULT_INIT_RETRY_INTERVAL = 60.0
+
 
 # Station fetcher registry.
 #
@@ -40,6 +67,13 @@ STATION_FETCHERS = {
 }
 
 
+def _play_timestamp(track: TrackInfo) -> Optional[int]:
+    """Scrobble time for a play: its listed start time (never in the future), or now."""
+    if track.played_at is None:
+        return None
+    return int(min(track.played_at, time.time()))
+
+
 @dataclass
 class StationConfig:
     """Configuration for a single radio station."""
@@ -50,78 +84,231 @@ class StationConfig:
     lastfm_password_hash: Optional[str] = None
     lastfm_password: Optional[str] = None
     poll_interval: int = 30
+    max_poll_interval: Optional[int] = None
+    # Read the station's recent playlist each poll and scrobble plays that
+    # were missed between polls or while the service was down
+    backfill: bool = False
+    # Icecast/Shoutcast stream whose ICY titles are followed instead of a
+    # registered fetcher; track changes are pushed as they happen
+    stream_url: Optional[str] = None
     enabled: bool = True
 
 
+def station_fetcher_factory(config: StationConfig) -> Optional[Callable[[], BaseStationFetcher]]:
+    """Return the fetcher factory for a configured station, or None if unknown."""
+    if config.stream_url:
+        return lambda: IcyStreamFetcher(config.name.lower(), config.stream_url)
+    return STATION_FETCHERS.get(config.name.lower())
+
+
 class RadioScrobbler:
     """Main service that polls stations and scrobbles tracks to Last.fm."""
     
-    def __init__(self, stations: list[StationConfig]):
+    def __init__(self, stations: list[StationConfig],
+                 max_concurrent_polls: int = DEFAULT_MAX_CONCURRENT_POLLS,
+                 start_jitter: float = DEFAULT_START_JITTER,
+                 poll_jitter: float = DEFAULT_POLL_JITTER,
+                 hub: Optional[NowPlayingHub] = None,
+                 spool: Optional[ScrobbleSpool] = None,
+                 state_store: Optional[StateStore] = None,
+                 init_workers: int = DEFAULT_INIT_WORKERS,
+                 init_timeout: float = DEFAULT_INIT_TIMEOUT,
+                 init_retry_interval: float = DEFAULT_INIT_RETRY_INTERVAL):
         """
         Initialize the scrobbler service.
         
         Args:
             stations: List of station configurations
+            max_concurrent_polls: Maximum number of stations polled at the same time
+            start_jitter: Maximum random delay (seconds) before a station's first poll
+            poll_jitter: Random offset applied to each poll, as a fraction of poll_interval
+            hub: Now-playing hub shared with other consumers (defaults to the
+                process-wide hub)
+            spool: Durable store that keeps scrobbles until Last.fm takes them
+                (optional; without it a failed scrobble is retried on the next
+                poll with a new timestamp)
+            state_store: Persists each station's last scrobble so restarts
+                don't scrobble the current tracks again (optional)
+            init_workers: Stations initialized at the same time
+            init_timeout: Seconds start-up waits for stations to initialize;
+                the rest join the polling schedule when they are ready
+            init_retry_interval: Seconds between initialization attempts for
+                a station that failed
         """
+        self.max_concurrent_polls = max(1, max_concurrent_polls)
+        self.start_jitter = start_jitter
+        self.poll_jitter = poll_jitter
+        self.hub = hub or get_now_playing_hub()
+        self.spool = spool
+        self.state_store = state_store
         self.stations: Dict[str, StationConfig] = {}
         self.fetchers: Dict[str, BaseStationFetcher] = {}
         self.clients: Dict[str, LastFMClient] = {}
+        self.accounts: Dict[Tuple[str, str], LastFMClient] = {}
         self.last_tracks: Dict[str, Optional[TrackInfo]] = {}
+        self.recent_plays: Dict[str, RecentPlays] = {}
+        # Newest playlist time handled per backfilling station
+        self.backfill_marks: Dict[str, float] = {}
+        self.current_tracks: Dict[str, Optional[TrackInfo]] = {}
+        self.poll_intervals: Dict[str, AdaptiveInterval] = {}
         self.station_stats: Dict[str, dict] = {}
         
-        # Initialize stations
+        # Stations configured but not initialized yet
+        self.pending_stations: Dict[str, StationConfig] = {}
+        self.init_retry_interval = init_retry_interval
+        self._init_lock = threading.Lock()
+        self._account_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._on_station_ready = None
+        self._stopped = threading.Event()
+        self._init_executor = ThreadPoolExecutor(
+            max_workers=max(1, init_workers),
+            thread_name_prefix="station-init",
+        )
+        
+        # Initialize stations concurrently
+        futures = []
         for station_config in stations:
             if not station_config.enabled:
                 logger.info(f"Skipping disabled station: {station_config.name}")
                 continue
+            if station_fetcher_factory(station_config) is None:
+                logger.error(f"Unknown station: {station_config.name}")
+                continue
             
-            self._initialize_station(station_config)
+            self.pending_stations[station_config.name] = station_config
+            futures.append(self._start_initialization(station_config))
+        
+        if futures:
+            _, not_done = concurrent.futures.wait(futures, timeout=init_timeout)
+            if not_done:
+                logger.warning(
+                    f"{len(not_done)} station(s) still initializing after {init_timeout:g}s; "
+                    f"they will start polling once ready"
+                )
+    
+    def _start_initialization(self, config: StationConfig) -> concurrent.futures.Future:
+        """Initialize a station on the init pool, retrying later if it fails."""
+        future = self._init_executor.submit(self._initialize_station, config)
+        future.add_done_callback(lambda done: self._initialization_done(config, done))
+        return future
+    
+    def _initialization_done(self, config: StationConfig, future: concurrent.futures.Future):
+        if future.cancelled() or self._stopped.is_set():
+            return
+        if future.exception() is None and future.result():
+            return
+        logger.warning(f"Retrying initialization of {config.name} in {self.init_retry_interval:g}s")
+        
+        def retry():
+            if not self._stopped.wait(self.init_retry_interval):
+                try:
+                    self._start_initialization(config)
+                except RuntimeError:
+                    pass  # init pool already shut down
+        
+        threading.Thread(target=retry, name=f"station-init-retry-{config.name}", daemon=True).start()
     
-    def _initialize_station(self, config: StationConfig):
-        """Initialize a single station."""
+    def _initialize_station(self, config: StationConfig) -> bool:
+        """Initialize a single station; True once it is ready to poll."""
         try:
             # Get fetcher class or factory function
-            fetcher_factory = STATION_FETCHERS.get(config.name.lower())
-            if not fetcher_factory:
-                logger.error(f"Unknown station: {config.name}")
-                return
+            fetcher_factory = station_fetcher_factory(config)
             
-            # Create fetcher (handle both classes and factory functions)
-            if callable(fetcher_factory) and not isinstance(fetcher_factory, type):
-                # It's a factory function (lambda)
-                fetcher = fetcher_factory()
-            else:
-                # It's a class
-                fetcher = fetcher_factory()
-            self.fetchers[config.name] = fetcher
-            
-            # Create Last.fm client
-            client = LastFMClient(
-                username=config.lastfm_username,
-                api_key=config.lastfm_api_key,
-                api_secret=config.lastfm_api_secret,
-                password_hash=config.lastfm_password_hash,
-                password=config.lastfm_password
-            )
+            # Fetchers are shared through the hub, so other consumers of the
+            # same station reuse this station's upstream fetches
+            fetcher = self.hub.ensure_station(config.name.lower(), fetcher_factory)
             
-            # Test connection
-            if not client.test_connection():
+            client = self._account_client(config)
+            if client is None:
                 logger.error(f"Failed to connect to Last.fm for {config.name}")
-                return
-            
-            self.clients[config.name] = client
-            self.stations[config.name] = config
-            self.last_tracks[config.name] = None
-            self.station_stats[config.name] = {
-                'scrobbles': 0,
-                'errors': 0,
-                'last_success': None,
-            }
+                return False
             
+            self._register_station(config, fetcher, client)
             logger.info(f"Initialized station: {config.name} -> {config.lastfm_username}")
+            return True
             
         except Exception as e:
             logger.error(f"Error initializing station {config.name}: {e}")
+            return False
+    
+    def _account_client(self, config: StationConfig) -> Optional[LastFMClient]:
+        """
+        Return the Last.fm client for the station's account, creating it once.
+        
+        One client per account, so stations scrobbling to the same account
+        share its submission queue and batches. Stations of one account
+        initializing at the same time wait for a single login.
+        """
+        account = (config.lastfm_username, config.lastfm_api_key)
+        with self._init_lock:
+            account_lock = self._account_locks.setdefault(account, threading.Lock())
+        with account_lock:
+            client = self.accounts.get(account)
+            if client is None:
+                client = LastFMClient(
+                    username=config.lastfm_username,
+                    api_key=config.lastfm_api_key,
+                    api_secret=config.lastfm_api_secret,
+                    password_hash=config.lastfm_password_hash,
+                    password=config.lastfm_password,
+                    spool=self.spool
+                )
+                
+                # Test connection
+                if not client.test_connection():
+                    # Stop the flusher it may have started for spooled
+                    # plays; the rows stay spooled for the next attempt
+                    client.close(timeout=10)
+                    return None
+                self.accounts[account] = client
+            return client
+    
+    def _register_station(self, config: StationConfig, fetcher: BaseStationFetcher,
+                          client: LastFMClient):
+        """Add an initialized station and its per-station state."""
+        with self._init_lock:
+            self._add_station_state(config, fetcher, client)
+            self.pending_stations.pop(config.name, None)
+            # Start polling right away if the engine is already running
+            if self._on_station_ready is not None:
+                self._on_station_ready(config.name)
+    
+    def _add_station_state(self, config: StationConfig, fetcher: BaseStationFetcher,
+                           client: LastFMClient):
+        self.fetchers[config.name] = fetcher
+        self.clients[config.name] = client
+        self.stations[config.name] = config
+        self.last_tracks[config.name] = None
+        self.recent_plays[config.name] = RecentPlays()
+        self.backfill_marks[config.name] = time.time()
+        self._restore_state(config)
+        self.current_tracks[config.name] = None
+        self.poll_intervals[config.name] = AdaptiveInterval(
+            config.poll_interval, max_interval=config.max_poll_interval
+        )
+        self.station_stats[config.name] = {
+            'scrobbles': 0,
+            'ignored': 0,
+            'errors': 0,
+            'last_success': None,
+        }
+    
+    def _restore_state(self, config: StationConfig):
+        """Seed a station's dedup state with its last scrobble before a restart."""
+        if self.state_store is None:
+            return
+        saved = self.state_store.last_scrobbled(state_key(config.name, config.lastfm_username))
+        if saved is None:
+            return
+        track, scrobbled_at = saved
+        # Plays since the last scrobble were missed while we were down
+        self.backfill_marks[config.name] = min(self.backfill_marks[config.name], scrobbled_at)
+        recent_plays = self.recent_plays[config.name]
+        recent_plays.record(track, now=scrobbled_at)
+        # Only a scrobble still inside its replay window blocks the track
+        if recent_plays.seen(track):
+            self.last_tracks[config.name] = track
+            logger.info(f"Restored last scrobble for {config.name}: {track}")
     
     def poll_station(self, station_name: str) -> bool:
         """
@@ -138,94 +325,264 @@ class RadioScrobbler:
             return False
         
         try:
-            fetcher = self.fetchers[station_name]
             client = self.clients[station_name]
             config = self.stations[station_name]
             
-            # Fetch current track
-            current_track = fetcher.get_current_track()
+            # Fetch current track (with the plays before it when backfilling,
+            # or when the station pushes batches of plays to the ingest endpoint)
+            if config.backfill or self.hub.push_lease_remaining(config.name.lower()):
+                recent = self.hub.fetch_recent(config.name.lower())
+                current_track = recent[0] if recent else None
+                self._backfill(station_name, recent)
+            else:
+                current_track = self.hub.fetch(config.name.lower())
+            self.current_tracks[station_name] = current_track
             
             if not current_track:
                 logger.debug(f"No track currently playing on {station_name}")
                 return False
             
-            # Check if track changed
+            # Check if track changed (TrackInfo equality is on the normalized
+            # artist/title, so formatting differences between sources don't count)
             last_track = self.last_tracks[station_name]
             if last_track and current_track == last_track:
                 logger.debug(f"Track unchanged on {station_name}: {current_track}")
                 return True
             
-            # Additional check: if track is very similar (might be slight variation), still scrobble
-            # This helps catch cases where Online Radio Box shows slightly different formatting
-            if last_track:
-                # Normalize for comparison (case-insensitive, strip whitespace)
-                last_normalized = (last_track.artist.lower().strip(), last_track.title.lower().strip())
-                current_normalized = (current_track.artist.lower().strip(), current_track.title.lower().strip())
-                if last_normalized == current_normalized:
-                    logger.debug(f"Track unchanged (normalized) on {station_name}: {current_track}")
-                    return True
-            
-            # Scrobble new track
-            success = client.scrobble(
-                artist=current_track.artist,
-                title=current_track.title,
-                album=current_track.album
-            )
-            
-            if success:
+            # A source flipping back to a track scrobbled a moment ago (e.g.
+            # ORB losing its Live row) is not a new play
+            recent_plays = self.recent_plays[station_name]
+            if recent_plays.seen(current_track):
+                logger.debug(f"Track recently scrobbled on {station_name}: {current_track}")
                 self.last_tracks[station_name] = current_track
-                self.station_stats[station_name]['scrobbles'] += 1
-                self.station_stats[station_name]['last_success'] = time.time()
-                logger.info(f"Scrobbled {station_name}: {current_track}")
                 return True
-            else:
-                self.station_stats[station_name]['errors'] += 1
-                logger.error(f"Failed to scrobble {station_name}: {current_track}")
-                return False
+            
+            # Queue the new track on the account's submission queue. It counts
+            # as the last track right away so later polls don't queue it
+            # again; a rejected scrobble restores the previous one so the
+            # next poll retries.
+            self.last_tracks[station_name] = current_track
+            recent_plays.record(current_track)
+            try:
+                future = client.submit(
+                    artist=current_track.artist,
+                    title=current_track.title,
+                    timestamp=_play_timestamp(current_track),
+                    album=current_track.album
+                )
+            except Exception:
+                # Nothing was queued: undo, so the next poll tries again
+                self.last_tracks[station_name] = last_track
+                recent_plays.forget(current_track)
+                raise
+            future.add_done_callback(
+                lambda done: self._on_scrobbled(station_name, current_track, last_track, done.result())
+            )
+            logger.debug(f"Queued scrobble for {station_name}: {current_track}")
+            return True
                 
         except Exception as e:
             self.station_stats[station_name]['errors'] += 1
             logger.error(f"Error polling station {station_name}: {e}", exc_info=True)
             return False
     
+    def _backfill(self, station_name: str, recent: List[TrackInfo]):
+        """
+        Queue the plays listed before the current track that were never scrobbled.
+        
+        Plays older than the station's backfill mark, or scrobbled within
+        their replay window, are skipped. The rest are queued oldest first
+        with the time the playlist gives, so the account's flusher sends
+        them in one batch. The current track (``recent[0]``) is left to
+        ``poll_station``.
+        """
+        mark = self.backfill_marks[station_name]
+        recent_plays = self.recent_plays[station_name]
+        client = self.clients[station_name]
+        missed = [
+            track for track in recent[1:]
+            if track.played_at is not None and track.played_at > mark
+            and not recent_plays.seen(track)
+        ]
+        for track in reversed(missed):
+            recent_plays.record(track, now=track.played_at)
+            try:
+                future = client.submit(
+                    artist=track.artist,
+                    title=track.title,
+                    timestamp=_play_timestamp(track),
+                    album=track.album
+                )
+            except Exception:
+                # The mark is not advanced either, so the next poll retries
+                recent_plays.forget(track)
+                raise
+            future.add_done_callback(
+                lambda done, track=track: self._on_scrobbled(station_name, track, None, done.result())
+            )
+        if missed:
+            logger.info(f"Backfilling {len(missed)} missed play(s) on {station_name}")
+        
+        times = [track.played_at for track in recent if track.played_at is not None]
+        if times:
+            self.backfill_marks[station_name] = max(mark, max(times))
+    
+    def _on_scrobbled(self, station_name: str, track: TrackInfo,
+                      previous: Optional[TrackInfo], result: ScrobbleResult):
+        """Record the result of a queued scrobble in the stats and dedup state."""
+        stats = self.station_stats[station_name]
+        if result.accepted:
+            stats['scrobbles'] += 1
+            stats['last_success'] = time.time()
+            logger.info(f"Scrobbled {station_name}: {track}")
+        elif result.spooled:
+            # Kept on disk with its original timestamp; the spool retries it
+            logger.warning(f"Scrobble for {station_name} deferred: {track} ({result.error})")
+        elif result.ignored:
+            # Last.fm answered; sending the play again would be ignored too
+            stats['ignored'] += 1
+            logger.warning(f"Last.fm ignored {station_name}: {track} ({result.error})")
+        else:
+            stats['errors'] += 1
+            if self.last_tracks.get(station_name) is track:
+                self.last_tracks[station_name] = previous
+            self.recent_plays[station_name].forget(track)
+            logger.error(f"Failed to scrobble {station_name}: {track} ({result.error})")
+            return
+        
+        if self.state_store is not None:
+            account = self.stations[station_name].lastfm_username
+            self.state_store.set_last_scrobbled(state_key(station_name, account), track)
+    
     def poll_all_stations(self):
         """Poll all enabled stations."""
-        for station_name in self.stations.keys():
+        for station_name in list(self.stations):
             self.poll_station(station_name)
     
     def run_forever(self):
         """Run the scrobbler service continuously."""
         logger.info("Starting radio scrobbler service...")
         
-        # Calculate next poll times for each station
-        next_polls = {}
-        for station_name, config in self.stations.items():
-            next_polls[station_name] = time.time()
-        
         try:
-            while True:
-                current_time = time.time()
-                
-                # Poll stations that are due
-                for station_name, config in self.stations.items():
-                    if current_time >= next_polls[station_name]:
-                        self.poll_station(station_name)
-                        next_polls[station_name] = current_time + config.poll_interval
-                
-                # Sleep for a short interval before checking again
-                sleep_time = min(
-                    max(0, min(next_polls.values()) - time.time()),
-                    1.0  # Don't sleep more than 1 second at a time
-                )
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
-                    
+            asyncio.run(self._run_async())
         except KeyboardInterrupt:
             logger.info("Shutting down radio scrobbler service...")
         except Exception as e:
             logger.error(f"Fatal error in scrobbler service: {e}", exc_info=True)
             raise
     
+    async def _run_async(self):
+        """
+        Polling engine: start every due station concurrently.
+        
+        Fetchers are blocking, so each poll runs on a worker thread. Polls only
+        hand new tracks to the accounts' submission queues; Last.fm requests
+        run on each account's own flusher thread, so a slow Last.fm never
+        holds up polling. A station is never polled twice at the same time, and at
+        most ``max_concurrent_polls`` polls are in flight across all stations.
+        Deadlines live in a ``PollScheduler`` heap and the loop sleeps until the
+        earliest one, or until a finished poll reschedules its station. Each
+        station's ``AdaptiveInterval`` picks the delay after every poll.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_concurrent_polls)
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent_polls,
+            thread_name_prefix="poll",
+        )
+        scheduler = PollScheduler(start_jitter=self.start_jitter, poll_jitter=self.poll_jitter)
+        wakeup = asyncio.Event()
+        in_flight: Dict[str, asyncio.Task] = {}
+        
+        async def poll(station_name: str):
+            delay = interval = None
+            try:
+                async with semaphore:
+                    await loop.run_in_executor(executor, self.poll_station, station_name)
+                policy = self.poll_intervals[station_name]
+                interval = policy.next_delay(self.current_tracks.get(station_name))
+                # A station pushing to the ingest endpoint is only polled
+                # again if its pushes stop
+                lease = self.hub.push_lease_remaining(self.stations[station_name].name.lower())
+                if policy.hinted or lease > interval:
+                    # Hints and leases name a time: start a new phase there.
+                    # Backoff only stretches the interval, so the phase,
+                    # drift correction and jitter still apply.
+                    delay = max(interval, lease)
+            finally:
+                scheduler.reschedule(station_name, delay=delay, interval=interval)
+                wakeup.set()
+        
+        def expedite(station_name: str):
+            if scheduler.expedite(station_name):
+                wakeup.set()
+        
+        subscriptions = []
+        
+        def add_station(station_name: str):
+            scheduler.add(station_name, self.stations[station_name].poll_interval)
+            wakeup.set()
+            # Pushed tracks (push-style fetchers, ingest endpoint) are handled
+            # right away instead of at the station's next deadline
+            hub_name = self.stations[station_name].name.lower()
+            
+            def on_track(_, track, station_name=station_name, hub_name=hub_name):
+                if self.hub.push_lease_remaining(hub_name):
+                    # Ingested batches may hold earlier plays even if the
+                    # newest one is unchanged
+                    loop.call_soon_threadsafe(expedite, station_name)
+                elif (self.hub.is_pushed(hub_name) and track is not None
+                      and track != self.last_tracks.get(station_name)):
+                    loop.call_soon_threadsafe(expedite, station_name)
+            
+            self.hub.subscribe(hub_name, on_track)
+            subscriptions.append((hub_name, on_track))
+        
+        # Stations that finish initializing later are added from their init
+        # thread; the lock makes sure each station is added exactly once
+        with self._init_lock:
+            for station_name in self.stations:
+                add_station(station_name)
+            self._on_station_ready = lambda name: loop.call_soon_threadsafe(add_station, name)
+        
+        try:
+            while True:
+                wakeup.clear()
+                
+                # Start polls for stations whose deadline has passed
+                for station_name in scheduler.pop_due():
+                    task = asyncio.create_task(poll(station_name))
+                    in_flight[station_name] = task
+                    task.add_done_callback(
+                        lambda _, name=station_name: in_flight.pop(name, None)
+                    )
+                
+                # Sleep until the next deadline or until a poll reschedules
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=scheduler.delay_until_next())
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._init_lock:
+                self._on_station_ready = None
+            for hub_name, callback in subscriptions:
+                self.hub.unsubscribe(hub_name, callback)
+            self._stopped.set()
+            self._init_executor.shutdown(wait=False, cancel_futures=True)
+            for task in in_flight.values():
+                task.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            for client in self.accounts.values():
+                client.close(timeout=10)
+            if self.spool is not None:
+                self.spool.close()
+            if self.state_store is not None:
+                self.state_store.close()
+    
     def get_stats(self) -> Dict[str, dict]:
         """Get statistics for all stations."""
         return self.station_stats.copy()
+    
+    def get_submission_stats(self) -> Dict[str, dict]:
+        """Get submission queue metrics per Last.fm account."""
+        return {username: client.get_metrics() for (username, _), client in self.accounts.items()}
@@ -0,0 +1,104 @@
+"""On-disk cache of Last.fm session keys.
+
+Creating a ``LastFMNetwork`` from a username and password hash costs one
+``auth.getMobileSession`` round-trip per account on every start. Session keys
+do not expire until revoked, so they are cached in a JSON file readable only
+by the owner (mode 0600) and reused across restarts. The directory's mode is
+left alone, since it is usually shared with the spool and state files.
+``LastFMClient`` only authenticates again when Last.fm rejects a cached key.
+
+The file lives at ``DEFAULT_SESSION_CACHE_PATH`` unless the
+``LASTFM_SESSION_CACHE`` environment variable names another path.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_CACHE_PATH = 'data/lastfm_sessions.json'
+
+
+def _cache_key(api_key: str, username: str) -> str:
+    # Session keys are bound to an API key and a user; the API key itself is
+    # not written to the file.
+    digest = hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+    return f"{username.lower()}@{digest}"
+
+
+class SessionKeyCache:
+    """Permission-restricted JSON file of session keys per (API key, user)."""
+
+    def __init__(self, path: str = DEFAULT_SESSION_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._keys: Optional[Dict[str, str]] = None
+
+    def get(self, api_key: str, username: str) -> Optional[str]:
+        """Return the cached session key, or None."""
+        with self._lock:
+            return self._load().get(_cache_key(api_key, username))
+
+    def set(self, api_key: str, username: str, session_key: str):
+        """Store a session key and write the file."""
+        with self._lock:
+            keys = self._load()
+            keys[_cache_key(api_key, username)] = session_key
+            self._save(keys)
+
+    def discard(self, api_key: str, username: str):
+        """Forget a session key Last.fm has rejected."""
+        with self._lock:
+            keys = self._load()
+            if keys.pop(_cache_key(api_key, username), None) is not None:
+                self._save(keys)
+
+    def _load(self) -> Dict[str, str]:
+        if self._keys is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    data = json.load(f)
+                self._keys = data if isinstance(data, dict) else {}
+            except FileNotFoundError:
+                self._keys = {}
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable session cache {self.path}: {e}")
+                self._keys = {}
+        return self._keys
+
+    def _save(self, keys: Dict[str, str]):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # Write a private temp file and rename it over the cache, so the
+            # file is never partially written or briefly world-readable.
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.sessions-')
+            try:
+                os.fchmod(fd, 0o600)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(keys, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning(f"Could not write session cache {self.path}: {e}")
+
+
+_cache: Optional[SessionKeyCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_session_cache() -> SessionKeyCache:
+    """Return the process-wide session key cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SessionKeyCache(os.getenv('LASTFM_SESSION_CACHE') or DEFAULT_SESSION_CACHE_PATH)
+    return _cache
@@ -0,0 +1,218 @@
+"""Durable on-disk spool for scrobbles that have not reached Last.fm yet.
+
+Every queued scrobble is written to a SQLite database (WAL journal) before it
+is sent and deleted once Last.fm has answered for it, so plays survive
+Last.fm outages and process restarts with their original timestamps.
+
+Each row is claimed by the client that sends it: ``next_attempt_at`` is
+pushed ``CLAIM_LEASE`` seconds ahead while the row is in flight and
+``claimed_by`` holds the owning spool's token; the row is moved to an
+exponential backoff deadline if the request fails. A spool file belongs to
+one process at a time, so opening it releases the claims an earlier run left
+behind (e.g. after a crash) and those plays are retried right away instead of
+after the lease. Rows carry an idempotency key derived from the account,
+timestamp and track, so the same play is never spooled twice.
+"""
+
+import hashlib
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPOOL_PATH = 'data/scrobble_spool.db'
+
+# Seconds a claimed row stays reserved for the client sending it.
+CLAIM_LEASE = 600.0
+
+# Retry backoff: BACKOFF_BASE * 2 ** (attempts - 1), capped at BACKOFF_MAX.
+BACKOFF_BASE = 30.0
+BACKOFF_MAX = 3600.0
+
+# Last.fm ignores scrobbles older than 14 days; such rows are dropped.
+MAX_SCROBBLE_AGE = 14 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scrobbles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    account TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    title TEXT NOT NULL,
+    album TEXT,
+    timestamp INTEGER NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    claimed_by TEXT
+);
+CREATE INDEX IF NOT EXISTS scrobbles_due ON scrobbles (account, next_attempt_at);
+"""
+
+
+@dataclass
+class SpooledScrobble:
+    """A spooled play, as claimed for sending."""
+    id: int
+    account: str
+    artist: str
+    title: str
+    album: Optional[str]
+    timestamp: int
+    attempts: int
+
+
+def idempotency_key(account: str, artist: str, title: str, timestamp: int) -> str:
+    """Stable key for one play of one track on one account."""
+    raw = '\x1f'.join((account, str(int(timestamp)), artist.strip().lower(), title.strip().lower()))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ScrobbleSpool:
+    """SQLite-backed store of pending scrobbles, shared by all clients."""
+
+    def __init__(self, path: str = DEFAULT_SPOOL_PATH):
+        """
+        Open (and create if needed) the spool database.
+
+        Args:
+            path: Database file; its directory is created if missing
+        """
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(scrobbles)')}
+        if 'claimed_by' not in columns:
+            self._conn.execute('ALTER TABLE scrobbles ADD COLUMN claimed_by TEXT')
+        # Claims made through this spool; any other claim is left over
+        self.token = uuid.uuid4().hex
+        released = self._conn.execute(
+            'UPDATE scrobbles SET next_attempt_at = ?, claimed_by = NULL WHERE claimed_by IS NOT NULL',
+            (time.time(),),
+        ).rowcount
+        if released:
+            logger.info(f"Released {released} scrobble(s) claimed by an earlier run")
+
+    def add(self, account: str, artist: str, title: str, timestamp: int,
+            album: Optional[str] = None, claim: bool = True) -> Optional[int]:
+        """
+        Spool a play.
+
+        Args:
+            account: Last.fm username the play belongs to
+            artist: Artist name
+            title: Track title
+            timestamp: Unix time the play started
+            album: Album name (optional)
+            claim: Reserve the row for the caller, who is about to send it
+
+        Returns:
+            The row id, or None if the same play is already spooled
+        """
+        now = time.time()
+        key = idempotency_key(account, artist, title, timestamp)
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT OR IGNORE INTO scrobbles '
+                '(idempotency_key, account, artist, title, album, timestamp, next_attempt_at, created_at, '
+                'claimed_by) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, account, artist, title, album, int(timestamp),
+                 now + CLAIM_LEASE if claim else now, now, self.token if claim else None),
+            )
+            return cursor.lastrowid if cursor.rowcount else None
+
+    def claim_due(self, account: str, limit: int) -> List[SpooledScrobble]:
+        """
+        Reserve up to ``limit`` rows whose retry time has come, oldest first.
+
+        Rows too old for Last.fm to accept are deleted instead.
+        """
+        now = time.time()
+        with self._lock:
+            expired = self._conn.execute(
+                'DELETE FROM scrobbles WHERE account = ? AND timestamp < ?',
+                (account, int(now - MAX_SCROBBLE_AGE)),
+            ).rowcount
+            rows = self._conn.execute(
+                'SELECT id, account, artist, title, album, timestamp, attempts FROM scrobbles '
+                'WHERE account = ? AND next_attempt_at <= ? ORDER BY timestamp LIMIT ?',
+                (account, now, limit),
+            ).fetchall()
+            if rows:
+                self._conn.executemany(
+                    'UPDATE scrobbles SET next_attempt_at = ?, claimed_by = ? WHERE id = ?',
+                    [(now + CLAIM_LEASE, self.token, row[0]) for row in rows],
+                )
+        if expired:
+            logger.warning(f"Dropped {expired} spooled scrobble(s) for {account} older than 14 days")
+        return [SpooledScrobble(*row) for row in rows]
+
+    def next_due(self, account: str) -> Optional[float]:
+        """Unix time of the account's next retry, or None if nothing is spooled."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT MIN(next_attempt_at) FROM scrobbles WHERE account = ?', (account,)
+            ).fetchone()
+        return row[0]
+
+    def complete(self, ids: List[int]):
+        """Forget rows Last.fm has answered for (accepted or ignored)."""
+        if not ids:
+            return
+        with self._lock:
+            self._conn.executemany('DELETE FROM scrobbles WHERE id = ?', [(i,) for i in ids])
+
+    def retry_later(self, ids: List[int], error: str) -> Optional[float]:
+        """
+        Schedule failed rows for another attempt with exponential backoff.
+
+        Returns:
+            The earliest new retry time, or None if no row was found
+        """
+        if not ids:
+            return None
+        now = time.time()
+        earliest = None
+        with self._lock:
+            for row_id in ids:
+                row = self._conn.execute('SELECT attempts FROM scrobbles WHERE id = ?', (row_id,)).fetchone()
+                if row is None:
+                    continue
+                attempts = row[0] + 1
+                delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+                retry_at = now + delay * random.uniform(0.8, 1.2)
+                self._conn.execute(
+                    'UPDATE scrobbles SET attempts = ?, next_attempt_at = ?, last_error = ?, claimed_by = NULL '
+                    'WHERE id = ?',
+                    (attempts, retry_at, error[:500], row_id),
+                )
+                earliest = retry_at if earliest is None else min(earliest, retry_at)
+        return earliest
+
+    def pending_count(self, account: Optional[str] = None) -> int:
+        """Number of spooled plays, for one account or all."""
+        with self._lock:
+            if account is None:
+                row = self._conn.execute('SELECT COUNT(*) FROM scrobbles').fetchone()
+            else:
+                row = self._conn.execute(
+                    'SELECT COUNT(*) FROM scrobbles WHERE account = ?', (account,)
+                ).fetchone()
+        return row[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,129 @@
+"""Persistent dedup state: the last scrobbled track per station and account.
+
+Without it every restart (deploy, crash, Railway redeploy) scrobbles the
+track currently playing on every station once more. ``StateStore`` keeps the
+state in memory, loads it from a JSON snapshot at start-up and writes the
+snapshot from a background thread, so recording a scrobble never waits on
+the disk. Writes are coalesced and atomic (temp file + rename); a crash
+loses at most the last ``DEFAULT_WRITE_DELAY`` seconds of updates.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+try:
+    from .stations.base import TrackInfo
+except ImportError:
+    from stations.base import TrackInfo
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = 'data/state.json'
+
+# Seconds the writer waits to batch further updates into one write.
+DEFAULT_WRITE_DELAY = 1.0
+
+
+def state_key(station: str, account: str) -> str:
+    """Key of one station's state for one Last.fm account."""
+    return f"{station}:{account}"
+
+
+class StateStore:
+    """Last scrobbled track per station/account, snapshotted to a JSON file."""
+
+    def __init__(self, path: str = DEFAULT_STATE_PATH, write_delay: float = DEFAULT_WRITE_DELAY):
+        """
+        Load the snapshot (if any) and start the writer thread.
+
+        Args:
+            path: Snapshot file; its directory is created on first write
+            write_delay: Seconds to coalesce updates before writing
+        """
+        self.path = path
+        self.write_delay = write_delay
+        self._entries: Dict[str, dict] = self._load()
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="state-writer", daemon=True)
+        self._writer.start()
+
+    def last_scrobbled(self, key: str) -> Optional[Tuple[TrackInfo, float]]:
+        """Return ``(track, scrobbled_at)`` for ``key``, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry:
+            return None
+        try:
+            track = TrackInfo(artist=entry['artist'], title=entry['title'], album=entry.get('album'))
+            return track, float(entry['scrobbled_at'])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def set_last_scrobbled(self, key: str, track: TrackInfo, scrobbled_at: Optional[float] = None):
+        """Record the last scrobbled track; written to disk shortly after."""
+        entry = {
+            'artist': track.artist,
+            'title': track.title,
+            'album': track.album,
+            'scrobbled_at': time.time() if scrobbled_at is None else scrobbled_at,
+        }
+        with self._lock:
+            self._entries[key] = entry
+        self._dirty.set()
+
+    def close(self):
+        """Write pending updates and stop the writer."""
+        self._closed = True
+        self._dirty.set()
+        self._writer.join(timeout=5)
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable state file {self.path}: {e}")
+            return {}
+        entries = data.get('last_scrobbled') if isinstance(data, dict) else None
+        if not isinstance(entries, dict):
+            return {}
+        logger.info(f"Loaded dedup state for {len(entries)} station(s) from {self.path}")
+        return entries
+
+    def _write_loop(self):
+        while True:
+            self._dirty.wait()
+            if not self._closed:
+                time.sleep(self.write_delay)  # let more updates pile up
+            self._dirty.clear()
+            self._write()
+            if self._closed:
+                return
+
+    def _write(self):
+        with self._lock:
+            snapshot = json.dumps({'version': 1, 'last_scrobbled': self._entries})
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.state-')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(snapshot)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.error(f"Could not write state file {self.path}: {e}")
@@ -1,21 +1,81 @@
 """Base class for radio station track fetchers."""
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
 import logging
-import requests
 import re
+import time
+import unicodedata
+
+try:
+    from ..http_client import HttpClient, get_http_client
+except ImportError:
+    from http_client import HttpClient, get_http_client
+
+try:
+    from .html_stream import RowCell, extract_rows
+    from .rules import RegexRules, RowRule, RowRules
+except ImportError:
+    from html_stream import RowCell, extract_rows
+    from rules import RegexRules, RowRule, RowRules
 
 logger = logging.getLogger(__name__)
 
+# Online Radio Box extraction rules, compiled once at import.
+#
+# Text anchors for a "| Live | Artist - Title |" rendering of the playlist.
+# Gaps are bounded so a scan never runs away across a large page.
+ORB_LIVE_PATTERNS = RegexRules([
+    r'\| Live\s+\|[^\[]{0,200}\[([^\]]{1,300})\][^|]{0,300}\|',  # [Artist - Title]
+    r'\| Live\s+\|([^|]{1,300})\|',  # Artist - Title (no link)
+    r'Live[^\[]{0,200}\[([^\]]{1,300})\]',  # More flexible
+], re.IGNORECASE)
+
+# Playlist table rows: the "Live" row, or a time-stamped ("HH:MM") row.
+ORB_ROWS = RowRules([
+    RowRule('live', r'live', {'time': 0, 'track': 1}, prefer_link=True),
+    RowRule('recent', r'(?=.*:).{1,6}', {'time': 0, 'track': 1}, prefer_link=True),
+])
+
+# Plays read from a playlist page for backfilling.
+HISTORY_LIMIT = 30
+
+_CLOCK_RE = re.compile(r'(\d{1,2}):(\d{2})')
+
+ORB_SKIP_WORDS = ('www.', 'podcast', 'jingle', 'programmation', 'shop', 'articles',
+                  'empfiehlt', 'verrät', 'ist unser')
+
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def normalize_key(text: str) -> str:
+    """Caseless, Unicode-normalized form of ``text`` with whitespace collapsed."""
+    text = unicodedata.normalize('NFKC', unicodedata.normalize('NFKC', text).casefold())
+    return ' '.join(text.split())
 
-@dataclass
+
+@dataclass(frozen=True, slots=True, eq=False)
 class TrackInfo:
-    """Information about a currently playing track."""
+    """Information about a currently playing track.
+    
+    Immutable. Tracks compare and hash by ``key``, the normalized
+    (artist, title) pair computed once at creation, so they can be used in
+    sets and as dict keys.
+    """
     artist: str
     title: str
     album: Optional[str] = None
+    # Unix time at which the source expects the next track to start, if known.
+    next_change_at: Optional[float] = None
+    # Unix time the track started, when the source lists it (playlists).
+    played_at: Optional[float] = None
+    key: Tuple[str, str] = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        object.__setattr__(self, 'key', (normalize_key(self.artist), normalize_key(self.title)))
     
     def __str__(self) -> str:
         if self.album:
@@ -23,16 +83,45 @@ class TrackInfo:
         return f"{self.artist} - {self.title}"
     
     def __eq__(self, other) -> bool:
-        """Compare tracks by artist and title only."""
+        """Compare tracks by normalized artist and title only."""
         if not isinstance(other, TrackInfo):
-            return False
-        return (self.artist.lower() == other.artist.lower() and 
-                self.title.lower() == other.title.lower())
+            return NotImplemented
+        return self.key == other.key
+    
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+
+def local_time_to_timestamp(clock: str, tz_name: str, now: Optional[float] = None) -> Optional[float]:
+    """
+    Convert a playlist's "HH:MM" in the station's time zone to a Unix time.
+    
+    Playlists only show the time of day, so the most recent such moment is
+    used (a time a few minutes ahead of ``now`` is taken as clock skew).
+    
+    Returns:
+        Unix time, or None if ``clock`` holds no time of day
+    """
+    match = _CLOCK_RE.search(clock)
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2))
+    if hour > 23 or minute > 59:
+        return None
+    tz = ZoneInfo(tz_name)
+    local_now = datetime.fromtimestamp(time.time() if now is None else now, tz)
+    played = local_now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if played - local_now > timedelta(minutes=5):
+        played -= timedelta(days=1)
+    return played.timestamp()
 
 
 class BaseStationFetcher(ABC):
     """Abstract base class for fetching current track info from radio stations."""
     
+    # Time zone of the times shown on the station's playlist pages.
+    timezone = 'UTC'
+    
     def __init__(self, station_name: str):
         """
         Initialize the station fetcher.
@@ -43,6 +132,11 @@ class BaseStationFetcher(ABC):
         self.station_name = station_name
         self.logger = logging.getLogger(f"{__name__}.{station_name}")
     
+    @property
+    def http(self) -> HttpClient:
+        """Shared, pooled HTTP client (see ``http_client``)."""
+        return get_http_client()
+    
     @abstractmethod
     def get_current_track(self) -> Optional[TrackInfo]:
         """
@@ -53,6 +147,32 @@ class BaseStationFetcher(ABC):
         """
         pass
     
+    def get_recent_tracks(self) -> List[TrackInfo]:
+        """
+        Fetch the station's recent plays, newest (the current track) first.
+        
+        Fetchers whose source lists a playlist override this and set
+        ``played_at`` on each play; the default returns the current track only.
+        
+        Returns:
+            Recent plays, newest first (empty if nothing is playing)
+        """
+        track = self.get_current_track()
+        return [track] if track else []
+    
+    def start_push(self, publish: Callable[[Optional[TrackInfo]], None]) -> bool:
+        """
+        Start delivering track changes as they happen, for push-style sources.
+        
+        Args:
+            publish: Called with the new track (or None) on every change
+            
+        Returns:
+            True if the fetcher pushes changes; False (the default) if it
+            must be polled
+        """
+        return False
+    
     def normalize_artist(self, artist: str) -> str:
         """Normalize artist name (strip whitespace, etc.)."""
         return artist.strip()
@@ -72,119 +192,134 @@ class BaseStationFetcher(ABC):
             TrackInfo if found, None otherwise
         """
         try:
-            url = f"https://onlineradiobox.com/{station_path}/playlist/?lang=en"
-            session = requests.Session()
-            session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (compatible; RadioScrobbler/1.0)'
-            })
-            
-            response = session.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                html = response.text
-                
-                # Look for the "Live" track in the playlist table
-                # Pattern: | Live  | [Artist - Title](/track/...) |
-                live_patterns = [
-                    r'\| Live\s+\|.*?\[([^\]]+)\].*?\|',  # [Artist - Title]
-                    r'\| Live\s+\|([^|]+)\|',  # Artist - Title (no link)
-                    r'Live.*?\[([^\]]+)\]',  # More flexible
-                ]
-                
-                for pattern in live_patterns:
-                    match = re.search(pattern, html, re.IGNORECASE | re.DOTALL)
-                    if match:
-                        track_text = match.group(1).strip()
-                        # Parse "Artist - Title" format
-                        if ' - ' in track_text:
-                            parts = track_text.split(' - ', 1)
-                            artist = parts[0].strip()
-                            title = parts[1].strip()
-                            
-                            # Clean up any HTML entities or extra characters
-                            artist = re.sub(r'<[^>]+>', '', artist)
-                            title = re.sub(r'<[^>]+>', '', title)
-                            
-                            if artist and title:
-                                self.logger.debug(f"Found Live track from Online Radio Box: {artist} - {title}")
-                                return TrackInfo(
-                                    artist=self.normalize_artist(artist),
-                                    title=self.normalize_title(title)
-                                )
-                
-                # Alternative: Use BeautifulSoup if available
-                try:
-                    from bs4 import BeautifulSoup
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Find table rows
-                    rows = soup.find_all('tr')
-                    live_track = None
-                    most_recent_track = None
-                    
-                    for row in rows:
-                        cells = row.find_all('td')
-                        if len(cells) < 2:
-                            continue
-                            
-                        first_cell = cells[0].get_text(strip=True)
-                        track_cell = cells[1]
-                        
-                        # Try to find link text or cell text
-                        link = track_cell.find('a')
-                        if link:
-                            track_text = link.get_text(strip=True)
-                        else:
-                            track_text = track_cell.get_text(strip=True)
-                        
-                        # Skip non-music entries
-                        if any(skip in track_text.lower() for skip in ['www.', 'podcast', 'jingle', 'programmation', 'shop', 'articles', 'empfiehlt', 'verrät', 'ist unser']):
-                            continue
-                        
-                        # Remove extra info like "| FM4 Musik Podcast" or "| FM4 OKFM4"
-                        if ' | ' in track_text:
-                            track_text = track_text.split(' | ')[0].strip()
-                        
-                        if ' - ' not in track_text:
-                            continue
-                            
-                        parts = track_text.split(' - ', 1)
-                        artist = parts[0].strip()
-                        title = parts[1].strip()
-                        
-                        # Skip if artist or title is too short (likely not a real track)
-                        if len(artist) < 2 or len(title) < 2:
-                            continue
-                        
-                        track_info = TrackInfo(
-                            artist=self.normalize_artist(artist),
-                            title=self.normalize_title(title)
-                        )
-                        
-                        # Check for "Live" row first
-                        if first_cell.lower() == 'live':
-                            live_track = track_info
-                            self.logger.debug(f"Found Live track via BeautifulSoup: {artist} - {title}")
-                            break  # Live row takes priority
-                        
-                        # Track time-based rows (most recent track)
-                        # Format: "HH:MM | Artist - Title"
-                        elif first_cell and ':' in first_cell and len(first_cell) <= 6:
-                            # Only use first time-based row as most recent
-                            if most_recent_track is None:
-                                most_recent_track = track_info
-                    
-                    # Return Live track if found, otherwise most recent
-                    if live_track:
-                        return live_track
-                    elif most_recent_track:
-                        self.logger.debug(f"Found most recent track via BeautifulSoup: {most_recent_track.artist} - {most_recent_track.title}")
-                        return most_recent_track
-                except ImportError:
-                    # BeautifulSoup not available, continue with regex
-                    pass
-                
+            return self._fetch_onlineradiobox(station_path)
         except Exception as e:
             self.logger.debug(f"Error fetching from Online Radio Box ({station_path}): {e}")
         
         return None
+    
+    def _fetch_onlineradiobox(self, station_path: str) -> Optional[TrackInfo]:
+        """``get_from_onlineradiobox`` with transport and HTTP errors propagating (for source chains)."""
+        url = f"https://onlineradiobox.com/{station_path}/playlist/?lang=en"
+        return self.http.get_streamed(url, self._extract_onlineradiobox, raise_for_status=True)
+    
+    def _extract_onlineradiobox(self, chunks: Iterable[str]) -> Optional[TrackInfo]:
+        """
+        Extract the Live (or most recent) track from a streamed Online Radio Box page.
+        
+        The playlist table lists the newest row first, so reading stops at the
+        Live row or the first timestamped row; the rest of the page is skipped.
+        Rows are matched by ``ORB_ROWS`` and the legacy text anchors by
+        ``ORB_LIVE_PATTERNS``.
+        """
+        consumed: List[str] = []
+        found: Dict[str, TrackInfo] = {}
+        
+        def read():
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+        
+        def on_row(cells: List[RowCell]) -> bool:
+            matched = ORB_ROWS.match(cells)
+            if matched is None:
+                return False
+            kind, fields = matched
+            track_info = self._parse_orb_track_text(fields['track'])
+            if track_info is None:
+                return False
+            found[kind] = track_info
+            return True
+        
+        extract_rows(read(), on_row)
+        
+        # Legacy text anchors (| Live | [Artist - Title] |) take priority
+        track_text = ORB_LIVE_PATTERNS.search(''.join(consumed), accept=lambda text: ' - ' in text)
+        if track_text:
+            artist, title = (_HTML_TAG_RE.sub('', part).strip() for part in track_text.strip().split(' - ', 1))
+            if artist and title:
+                self.logger.debug(f"Found Live track from Online Radio Box: {artist} - {title}")
+                return TrackInfo(
+                    artist=self.normalize_artist(artist),
+                    title=self.normalize_title(title)
+                )
+        
+        # Return Live track if found, otherwise most recent
+        if 'live' in found:
+            self.logger.debug(f"Found Live track on Online Radio Box: {found['live']}")
+            return found['live']
+        elif 'recent' in found:
+            self.logger.debug(f"Found most recent track on Online Radio Box: {found['recent']}")
+            return found['recent']
+        
+        return None
+    
+    def get_history_from_onlineradiobox(self, station_path: str) -> List[TrackInfo]:
+        """
+        Get the recent plays from an Online Radio Box playlist page.
+        
+        Args:
+            station_path: The station path on Online Radio Box (e.g., 'at/fm4')
+            
+        Returns:
+            Plays newest first; the Live row (if any) first, without ``played_at``
+        """
+        url = f"https://onlineradiobox.com/{station_path}/playlist/?lang=en"
+        try:
+            return self.http.get_streamed(url, self._extract_onlineradiobox_history) or []
+        except Exception as e:
+            self.logger.debug(f"Error fetching history from Online Radio Box ({station_path}): {e}")
+        
+        return []
+    
+    def _extract_onlineradiobox_history(self, chunks: Iterable[str]) -> List[TrackInfo]:
+        """Collect up to ``HISTORY_LIMIT`` plays from a streamed Online Radio Box page."""
+        plays: List[TrackInfo] = []
+        now = time.time()
+        
+        def on_row(cells: List[RowCell]) -> bool:
+            matched = ORB_ROWS.match(cells)
+            if matched is None:
+                return False
+            kind, fields = matched
+            track_info = self._parse_orb_track_text(fields['track'])
+            if track_info is None:
+                return False
+            if kind == 'live':
+                if not plays:
+                    plays.append(track_info)
+            else:
+                played_at = local_time_to_timestamp(fields['time'], self.timezone, now)
+                if played_at is not None:
+                    plays.append(TrackInfo(
+                        artist=track_info.artist, title=track_info.title, played_at=played_at
+                    ))
+            return len(plays) >= HISTORY_LIMIT
+        
+        extract_rows(chunks, on_row)
+        return plays
+    
+    def _parse_orb_track_text(self, track_text: str) -> Optional[TrackInfo]:
+        """Turn an Online Radio Box "Artist - Title" cell into a TrackInfo, skipping non-music rows."""
+        # Skip non-music entries
+        lowered = track_text.lower()
+        if any(skip in lowered for skip in ORB_SKIP_WORDS):
+            return None
+        
+        # Remove extra info like "| FM4 Musik Podcast" or "| FM4 OKFM4"
+        if ' | ' in track_text:
+            track_text = track_text.split(' | ')[0].strip()
+        
+        if ' - ' not in track_text:
+            return None
+        
+        artist, title = (part.strip() for part in track_text.split(' - ', 1))
+        
+        # Skip if artist or title is too short (likely not a real track)
+        if len(artist) < 2 or len(title) < 2:
+            return None
+        
+        return TrackInfo(
+            artist=self.normalize_artist(artist),
+            title=self.normalize_title(title)
+        )
@@ -14,11 +14,19 @@ working source is found).
 """
 
 import requests
-from typing import Optional
+from typing import Iterable, List, Optional
 try:
-    from .base import BaseStationFetcher, TrackInfo
+    from .base import HISTORY_LIMIT, BaseStationFetcher, TrackInfo
+    from .html_stream import RowCell, extract_rows
+    from .json_decode import LivemetaDocument, decode_livemeta
+    from .rules import KeyPathRules, RowRule, RowRules
+    from .sources import SourceChain, TrackSource
 except ImportError:
-    from base import BaseStationFetcher, TrackInfo
+    from base import HISTORY_LIMIT, BaseStationFetcher, TrackInfo
+    from html_stream import RowCell, extract_rows
+    from json_decode import LivemetaDocument, decode_livemeta
+    from rules import KeyPathRules, RowRule, RowRules
+    from sources import SourceChain, TrackSource
 
 
 # Genre name (as registered in scrobbler.STATION_FETCHERS) -> livemeta id.
@@ -34,6 +42,21 @@ LIVEMETA_IDS = {
     # "monde": 69, "nouveautes": 70,
 }
 
+# Fields of a livemeta step (a json_decode.LivemetaStep), with fallbacks in
+# order of preference.
+LIVEMETA_STEP_FIELDS = KeyPathRules(
+    title=("title", "titre"),
+    artist=("authors", "interpreteMorceau", "performers"),
+    album=("titreAlbum", "album"),
+    start=("start",),
+    end=("end",),
+)
+
+# RecentTracks.com rows: "HH:MM | Artist | Title".
+RECENTTRACKS_ROWS = RowRules([
+    RowRule("played", r"(?=.*:).{1,6}", {"artist": 1, "title": 2}, cell_tags=("td", "th")),
+])
+
 
 class FIPFetcher(BaseStationFetcher):
     """Fetcher for Radio FIP and its thematic webradios via the livemeta API.
@@ -46,71 +69,41 @@ class FIPFetcher(BaseStationFetcher):
         super().__init__(station_name)
         self.station_name = station_name
         self.livemeta_id = LIVEMETA_IDS.get(station_name)
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (compatible; RadioScrobbler/1.0)',
-            'Accept': 'application/json'
-        })
+
+        sources = []
+        if self.livemeta_id is not None:
+            sources.append(TrackSource("livemeta", lambda: self._fetch_livemeta(self.livemeta_id)))
+        # RecentTracks.com fallback for the main station only.
+        if station_name == "fip":
+            sources.append(TrackSource("recenttracks", self._fetch_recenttracks))
+        self.sources = SourceChain(sources, station_name=station_name)
 
     def get_current_track(self) -> Optional[TrackInfo]:
         """Fetch the currently playing track from Radio FIP."""
-        if self.livemeta_id is not None:
-            track = self.get_from_livemeta(self.livemeta_id)
-            if track:
-                self.logger.debug(f"Found FIP track via livemeta id={self.livemeta_id}")
-                return track
-
-        # Fallback for the main station only.
-        if self.station_name == "fip":
-            track = self.get_from_recenttracks()
-            if track:
-                self.logger.debug("Found FIP track from RecentTracks.com")
-                return track
+        track = self.sources.fetch()
+        if track:
+            return track
 
         self.logger.warning(f"Could not fetch track from FIP ({self.station_name})")
         return None
 
+    def get_recent_tracks(self) -> List[TrackInfo]:
+        """Fetch the recent plays from livemeta, newest first."""
+        if self.livemeta_id is not None:
+            plays = self.get_history_from_livemeta(self.livemeta_id)
+            if plays:
+                return plays
+        return super().get_recent_tracks()
+
     def get_from_livemeta(self, station_id: int) -> Optional[TrackInfo]:
         """Fetch the current track from Radio France's livemeta API."""
-        url = f"https://api.radiofrance.fr/livemeta/pull/{station_id}"
+        plays = self.get_history_from_livemeta(station_id)
+        return plays[0] if plays else None
+
+    def get_history_from_livemeta(self, station_id: int) -> List[TrackInfo]:
+        """Fetch the current and earlier tracks from livemeta, newest first."""
         try:
-            response = self.session.get(url, timeout=10)
-            if response.status_code != 200:
-                self.logger.debug(f"livemeta returned {response.status_code} for id={station_id}")
-                return None
-
-            data = response.json()
-            steps = data.get("steps") or {}
-            levels = data.get("levels") or []
-            if not steps or not levels:
-                return None
-
-            # The first level tracks the live stream; its position points at
-            # the track playing now.
-            level = levels[0]
-            items = level.get("items") or []
-            if not items:
-                return None
-            pos = level.get("position")
-            if pos is None or not (0 <= pos < len(items)):
-                pos = len(items) - 1
-
-            step = steps.get(items[pos]) or {}
-            title = (step.get("title") or step.get("titre") or "").strip()
-            artist = (
-                step.get("authors")
-                or step.get("interpreteMorceau")
-                or step.get("performers")
-                or ""
-            ).strip()
-            album = (step.get("titreAlbum") or step.get("album") or "").strip() or None
-
-            if artist and title:
-                return TrackInfo(
-                    artist=self.normalize_artist(artist),
-                    title=self.normalize_title(title),
-                    album=album,
-                )
+            return self._fetch_livemeta_history(station_id)
         except requests.exceptions.RequestException as e:
             self.logger.debug(f"Error fetching livemeta id={station_id}: {e}")
         except ValueError as e:
@@ -118,42 +111,117 @@ class FIPFetcher(BaseStationFetcher):
         except Exception as e:
             self.logger.debug(f"Unexpected error fetching livemeta id={station_id}: {e}")
 
+        return []
+
+    def _fetch_livemeta(self, station_id: int) -> Optional[TrackInfo]:
+        """``get_from_livemeta`` with transport, HTTP and JSON errors propagating."""
+        plays = self._fetch_livemeta_history(station_id)
+        return plays[0] if plays else None
+
+    def _fetch_livemeta_history(self, station_id: int) -> List[TrackInfo]:
+        url = f"https://api.radiofrance.fr/livemeta/pull/{station_id}"
+        # One parse per response serves both the current track and the
+        # history, so polling and backfill share the cached result.
+        return self.http.get_parsed(
+            url,
+            self._parse_livemeta_response,
+            headers={'Accept': 'application/json'},
+            raise_for_status=True,
+        ) or []
+
+    def _parse_livemeta_response(self, response) -> List[TrackInfo]:
+        return self._parse_livemeta_history(decode_livemeta(response.content))
+
+    def _parse_livemeta(self, document: LivemetaDocument) -> Optional[TrackInfo]:
+        """Pick the step playing now out of a decoded livemeta payload."""
+        plays = self._parse_livemeta_history(document, limit=1)
+        return plays[0] if plays else None
+
+    def _parse_livemeta_history(self, document: LivemetaDocument,
+                                limit: int = HISTORY_LIMIT) -> List[TrackInfo]:
+        """Return the step playing now and up to ``limit - 1`` earlier ones, newest first."""
+        if not document.has_steps or not document.levels:
+            return []
+
+        # The first level tracks the live stream; its position points at
+        # the track playing now.
+        level = document.levels[0]
+        items = level.items
+        if not items:
+            return []
+        pos = level.position
+        if pos is None or not (0 <= pos < len(items)):
+            pos = len(items) - 1
+
+        # Only these steps are decoded; later (upcoming) steps and the rest
+        # of ``steps`` are never parsed.
+        plays = []
+        for uid in items[pos::-1]:
+            track = self._livemeta_track(document.step(uid))
+            if track is not None:
+                plays.append(track)
+            elif not plays:
+                # Nothing usable is playing now (e.g. a talk segment)
+                return []
+            if len(plays) >= limit:
+                break
+        return plays
+
+    def _livemeta_track(self, raw_step) -> Optional[TrackInfo]:
+        """Turn one decoded livemeta step into a TrackInfo (None if incomplete)."""
+        step = LIVEMETA_STEP_FIELDS.extract(raw_step)
+        title = str(step["title"] or "").strip()
+        artist = str(step["artist"] or "").strip()
+        album = str(step["album"] or "").strip() or None
+        # Steps carry their scheduled start/end as Unix timestamps; the end
+        # tells the scheduler when to look for the next track.
+        start, end = step["start"], step["end"]
+        played_at = float(start) if isinstance(start, (int, float)) else None
+        next_change_at = float(end) if isinstance(end, (int, float)) else None
+
+        if artist and title:
+            return TrackInfo(
+                artist=self.normalize_artist(artist),
+                title=self.normalize_title(title),
+                album=album,
+                next_change_at=next_change_at,
+                played_at=played_at,
+            )
         return None
 
     def get_from_recenttracks(self) -> Optional[TrackInfo]:
         """Fallback for the main FIP station via RecentTracks.com."""
         try:
-            url = "https://recenttracks.com/stations/fip/recently-played"
-            response = self.session.get(url, timeout=10)
-            if response.status_code != 200:
-                return None
-            try:
-                from bs4 import BeautifulSoup
-            except ImportError:
-                self.logger.debug("BeautifulSoup not available for RecentTracks.com parsing")
-                return None
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            for table in soup.find_all('table'):
-                for row in table.find_all('tr'):
-                    cells = row.find_all(['td', 'th'])
-                    if len(cells) < 3:
-                        continue
-                    time_cell = cells[0].get_text(strip=True)
-                    artist = cells[1].get_text(strip=True)
-                    title = cells[2].get_text(strip=True)
-                    if artist.lower() in ['artist', 'time'] or title.lower() in ['title', 'time']:
-                        continue
-                    if not artist or not title:
-                        continue
-                    if ':' in time_cell and len(time_cell) <= 6:
-                        return TrackInfo(
-                            artist=self.normalize_artist(artist),
-                            title=self.normalize_title(title),
-                        )
+            return self._fetch_recenttracks()
         except requests.exceptions.RequestException as e:
             self.logger.debug(f"Error fetching from RecentTracks.com: {e}")
         except Exception as e:
             self.logger.debug(f"Unexpected error fetching from RecentTracks.com: {e}")
 
         return None
+
+    def _fetch_recenttracks(self) -> Optional[TrackInfo]:
+        url = "https://recenttracks.com/stations/fip/recently-played"
+        return self.http.get_streamed(url, self._extract_recenttracks, raise_for_status=True)
+
+    def _extract_recenttracks(self, chunks: Iterable[str]) -> Optional[TrackInfo]:
+        """Return the first timestamped row of a streamed RecentTracks.com page."""
+        found = []
+
+        def on_row(cells: List[RowCell]) -> bool:
+            matched = RECENTTRACKS_ROWS.match(cells)
+            if matched is None:
+                return False
+            artist, title = matched[1]["artist"], matched[1]["title"]
+            if artist.lower() in ['artist', 'time'] or title.lower() in ['title', 'time']:
+                return False
+            if not artist or not title:
+                return False
+            found.append(TrackInfo(
+                artist=self.normalize_artist(artist),
+                title=self.normalize_title(title),
+            ))
+            return True
+
+        extract_rows(chunks, on_row)
+        return found[0] if found else None
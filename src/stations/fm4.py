@@ -1,22 +1,48 @@
 """ORF FM4 radio station fetcher."""
 
-import requests
-from typing import Optional
+from typing import List, Optional
 try:
     from .base import BaseStationFetcher, TrackInfo
+    from .json_decode import loads
+    from .rules import KeyPathRules
+    from .sources import SourceChain, TrackSource
 except ImportError:
     from base import BaseStationFetcher, TrackInfo
+    from json_decode import loads
+    from rules import KeyPathRules
+    from sources import SourceChain, TrackSource
+
+
+# Track fields in the ORF now-playing APIs ("interpret"/"titel" are German).
+FM4_API_FIELDS = KeyPathRules(
+    artist=('artist', 'interpret', 'interpreter', 'current.artist', 'current.interpret'),
+    title=('title', 'titel', 'song', 'current.title', 'current.titel', 'current.song'),
+)
+
+
+# ORF FM4's own now-playing endpoints, fallbacks for Online Radio Box.
+ORF_API_ENDPOINTS = (
+    "https://audioapi.orf.at/fm4/api/json/current/live",
+    "https://api.orf.at/fm4/now-playing",
+    "https://fm4.orf.at/api/now-playing",
+)
 
 
 class FM4Fetcher(BaseStationFetcher):
     """Fetcher for ORF FM4 radio."""
     
+    timezone = 'Europe/Vienna'
+    
     def __init__(self):
         super().__init__("fm4")
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (compatible; RadioScrobbler/1.0)'
-        })
+        # Online Radio Box first (most reliable), then ORF FM4's own APIs;
+        # the chain reorders them by observed success and latency
+        self.sources = SourceChain(
+            [TrackSource("onlineradiobox", lambda: self._fetch_onlineradiobox("at/fm4"))]
+            + [TrackSource(endpoint, lambda endpoint=endpoint: self._get_from_api(endpoint))
+               for endpoint in ORF_API_ENDPOINTS],
+            station_name="fm4",
+        )
     
     def get_current_track(self) -> Optional[TrackInfo]:
         """
@@ -24,61 +50,34 @@ class FM4Fetcher(BaseStationFetcher):
         
         Uses Online Radio Box playlist page as the primary source.
         """
-        # Try Online Radio Box first (most reliable)
-        track_info = self.get_from_onlineradiobox("at/fm4")
+        track_info = self.sources.fetch()
         if track_info:
             return track_info
         
-        # Fallback: Try ORF FM4's own API endpoints
-        endpoints = [
-            "https://audioapi.orf.at/fm4/api/json/current/live",
-            "https://api.orf.at/fm4/now-playing",
-            "https://fm4.orf.at/api/now-playing",
-        ]
-        
-        for endpoint in endpoints:
-            try:
-                response = self.session.get(endpoint, timeout=10)
-                if response.status_code == 200:
-                    data = response.json()
-                    track_info = self._parse_response(data)
-                    if track_info:
-                        return track_info
-            except requests.exceptions.RequestException:
-                continue
-            except Exception as e:
-                self.logger.debug(f"Error trying {endpoint}: {e}")
-                continue
-        
         self.logger.warning("Could not fetch track from FM4")
         return None
     
+    def _get_from_api(self, endpoint: str) -> Optional[TrackInfo]:
+        """Fetch the current track from one ORF now-playing endpoint (errors propagate)."""
+        return self.http.get_parsed(endpoint, self._parse_api_response, raise_for_status=True)
+    
+    def _parse_api_response(self, response) -> Optional[TrackInfo]:
+        return self._parse_response(loads(response.content))
+    
+    def get_recent_tracks(self) -> List[TrackInfo]:
+        """Fetch the recent plays from the Online Radio Box playlist."""
+        plays = self.get_history_from_onlineradiobox("at/fm4")
+        return plays or super().get_recent_tracks()
+    
     def _parse_response(self, data: dict) -> Optional[TrackInfo]:
         """Parse API response to extract track info."""
-        artist = None
-        title = None
-        
         # ORF FM4 common structure
         if isinstance(data, list) and len(data) > 0:
             data = data[0]
         
-        if 'artist' in data:
-            artist = data['artist']
-        elif 'interpret' in data:  # German for artist
-            artist = data['interpret']
-        elif 'interpreter' in data:
-            artist = data['interpreter']
-        elif 'current' in data and isinstance(data['current'], dict):
-            artist = data['current'].get('artist') or data['current'].get('interpret')
-        
-        if 'title' in data:
-            title = data['title']
-        elif 'titel' in data:  # German for title
-            title = data['titel']
-        elif 'song' in data:
-            title = data['song']
-        elif 'current' in data and isinstance(data['current'], dict):
-            title = data['current'].get('title') or data['current'].get('titel') or data['current'].get('song')
+        fields = FM4_API_FIELDS.extract(data)
+        artist = fields['artist']
+        title = fields['title']
         
         if artist and title:
             return TrackInfo(
@@ -0,0 +1,141 @@
+"""Incremental extraction of table rows from streamed HTML pages.
+
+Online Radio Box and recenttracks.com list the track playing now in the first
+rows of a playlist table, yet the full page is large. ``TableRowExtractor``
+is an ``html.parser`` based parser that is fed the response chunk by chunk and
+hands each completed ``<tr>`` to a callback; the callback decides when enough
+has been seen, parsing stops there and the rest of the page is never
+downloaded. Only the row being built is kept in memory.
+"""
+
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Callable, Iterable, List, Optional
+
+# Tags whose start implicitly closes an open cell or row (as browsers do).
+_CELL_TAGS = ('td', 'th')
+
+
+@dataclass
+class RowCell:
+    """Text of one table cell, whitespace-stripped like bs4's ``get_text(strip=True)``."""
+    tag: str
+    text: str
+    link_text: Optional[str] = None
+
+
+RowCallback = Callable[[List[RowCell]], bool]
+
+
+class TableRowExtractor(HTMLParser):
+    """Feed HTML in chunks; every finished table row is passed to ``on_row``.
+
+    ``on_row`` returns True to stop; ``done`` is then set and further input is
+    ignored.
+    """
+
+    def __init__(self, on_row: RowCallback):
+        super().__init__(convert_charrefs=True)
+        self.on_row = on_row
+        self.done = False
+        self._row: Optional[List[RowCell]] = None
+        self._cell: Optional[str] = None
+        self._cell_parts: List[str] = []
+        self._link_parts: Optional[List[str]] = None
+        self._in_link = False
+        # Raw pieces of the current text node; HTMLParser splits a node
+        # wherever a fed chunk ends, so it is only stripped once complete
+        self._text: List[str] = []
+
+    def feed(self, data: str):
+        if not self.done:
+            super().feed(data)
+
+    def close(self):
+        super().close()
+        if not self.done:
+            self._end_row()
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        self._end_text()
+        if tag == 'tr':
+            self._end_row()
+            self._row = []
+        elif tag in _CELL_TAGS:
+            if self._row is None:
+                self._row = []
+            self._end_cell()
+            self._cell = tag
+            self._cell_parts = []
+            self._link_parts = None
+        elif tag == 'a' and self._cell is not None and self._link_parts is None:
+            self._link_parts = []
+            self._in_link = True
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        self._end_text()
+        if tag == 'a':
+            self._in_link = False
+        elif tag in _CELL_TAGS:
+            self._end_cell()
+        elif tag in ('tr', 'table', 'tbody', 'thead'):
+            self._end_row()
+
+    def handle_data(self, data):
+        if self._cell is None or self.done:
+            return
+        self._text.append(data)
+
+    def handle_comment(self, data):
+        self._end_text()
+
+    def _end_text(self):
+        """Add the finished text node, stripped, to the cell (and link)."""
+        if not self._text:
+            return
+        text = ''.join(self._text).strip()
+        self._text = []
+        if not text:
+            return
+        self._cell_parts.append(text)
+        if self._in_link and self._link_parts is not None:
+            self._link_parts.append(text)
+
+    def _end_cell(self):
+        self._end_text()
+        if self._cell is None:
+            return
+        link_text = ''.join(self._link_parts) if self._link_parts is not None else None
+        self._row.append(RowCell(self._cell, ''.join(self._cell_parts), link_text))
+        self._cell = None
+        self._cell_parts = []
+        self._link_parts = None
+        self._in_link = False
+
+    def _end_row(self):
+        self._end_cell()
+        row, self._row = self._row, None
+        if row and self.on_row(row):
+            self.done = True
+
+
+def extract_rows(chunks: Iterable[str], on_row: RowCallback) -> bool:
+    """
+    Run ``on_row`` over the table rows of a chunked HTML document.
+
+    Consumption of ``chunks`` stops as soon as ``on_row`` returns True.
+
+    Returns:
+        True if ``on_row`` asked to stop, False if the document ran out first
+    """
+    parser = TableRowExtractor(on_row)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            return True
+    parser.close()
+    return parser.done
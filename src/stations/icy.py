@@ -0,0 +1,187 @@
+"""Push-style fetcher for Icecast/Shoutcast streams with ICY metadata.
+
+A client that sends ``Icy-MetaData: 1`` gets an ``icy-metaint`` header and
+a metadata block after every ``metaint`` bytes of audio: one length byte
+(times 16), then ``StreamTitle='Artist - Title';...`` padded with NULs.
+``IcyStreamFetcher`` keeps one stream connection open on a background
+thread, reads past the audio bytes without decoding them and parses only
+the metadata blocks. Title changes are pushed to the now-playing hub as they
+happen, so a change is seen within one metadata interval (a few seconds)
+instead of at the next poll.
+
+Servers that answer with a Shoutcast v1 ``ICY 200 OK`` status line instead
+of HTTP are not supported by the HTTP stack, and streams without
+``icy-metaint`` (e.g. Radio France's, see PARKING_LOT.md) carry no titles.
+"""
+
+import re
+import threading
+from typing import Callable, Optional
+
+try:
+    from .base import BaseStationFetcher, TrackInfo
+except ImportError:
+    from base import BaseStationFetcher, TrackInfo
+
+# Seconds to connect, and to wait for stream bytes before reconnecting.
+ICY_CONNECT_TIMEOUT = 10.0
+ICY_READ_TIMEOUT = 30.0
+
+# Reconnect backoff (seconds), doubled after each failed connection.
+ICY_RECONNECT_DELAY = 5.0
+ICY_MAX_RECONNECT_DELAY = 300.0
+
+# Audio is skipped in reads of at most this many bytes.
+ICY_SKIP_CHUNK = 16 * 1024
+
+_STREAM_TITLE_RE = re.compile(r"StreamTitle='(.*?)';(?=[A-Za-z]+=|$)", re.DOTALL)
+
+
+class IcyError(Exception):
+    """The stream ended or does not carry ICY metadata."""
+
+
+def parse_stream_title(block: bytes) -> Optional[str]:
+    """Return the ``StreamTitle`` of one metadata block, or None if it has none."""
+    try:
+        text = block.rstrip(b'\0').decode('utf-8')
+    except UnicodeDecodeError:
+        text = block.rstrip(b'\0').decode('latin-1')
+    match = _STREAM_TITLE_RE.search(text)
+    return match.group(1).strip() if match else None
+
+
+def _read_exact(raw, size: int) -> bytes:
+    """Read exactly ``size`` undecoded bytes from a urllib3 response."""
+    data = raw.read(size, decode_content=False)
+    while len(data) < size:
+        more = raw.read(size - len(data), decode_content=False)
+        if not more:
+            raise IcyError("stream ended")
+        data += more
+    return data
+
+
+def _skip(raw, size: int):
+    """Read past ``size`` bytes of audio without keeping them."""
+    while size > 0:
+        data = raw.read(min(size, ICY_SKIP_CHUNK), decode_content=False)
+        if not data:
+            raise IcyError("stream ended")
+        size -= len(data)
+
+
+class IcyStreamFetcher(BaseStationFetcher):
+    """Fetcher that follows a stream's in-band ``StreamTitle`` metadata."""
+
+    def __init__(self, station_name: str, stream_url: str, separator: str = ' - '):
+        """
+        Initialize the fetcher; the stream is opened on first use.
+
+        Args:
+            station_name: Name of the radio station
+            stream_url: Icecast/Shoutcast stream URL
+            separator: Separator between artist and title in ``StreamTitle``
+        """
+        super().__init__(station_name)
+        self.stream_url = stream_url
+        self.separator = separator
+        self._track: Optional[TrackInfo] = None
+        self._title: Optional[str] = None
+        self._publish: Optional[Callable[[Optional[TrackInfo]], None]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        # Set once the current connection has delivered a metadata block
+        self._streaming = False
+
+    def get_current_track(self) -> Optional[TrackInfo]:
+        """Return the track of the latest ``StreamTitle`` (no request is made)."""
+        self._ensure_reader()
+        return self._track
+
+    def start_push(self, publish: Callable[[Optional[TrackInfo]], None]) -> bool:
+        """Open the stream and call ``publish(track)`` on every title change."""
+        self._publish = publish
+        self._ensure_reader()
+        return True
+
+    def stop(self):
+        """Stop following the stream (it is closed at the next read)."""
+        self._stop.set()
+
+    def _ensure_reader(self):
+        with self._lock:
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(
+                    target=self._run, name=f"icy-{self.station_name}", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        delay = ICY_RECONNECT_DELAY
+        while not self._stop.is_set():
+            self._streaming = False
+            try:
+                self._follow_stream()
+            except IcyError as e:
+                self.logger.warning(f"ICY stream {self.stream_url}: {e}")
+            except Exception as e:
+                self.logger.warning(f"ICY stream {self.stream_url} failed: {e}")
+            if self._streaming:
+                # A working stream that dropped is reopened quickly
+                delay = ICY_RECONNECT_DELAY
+            if self._stop.wait(delay):
+                break
+            if not self._streaming:
+                delay = min(delay * 2, ICY_MAX_RECONNECT_DELAY)
+
+    def _follow_stream(self):
+        """Read one stream connection until it ends or ``stop`` is called."""
+        response = self.http.get(
+            self.stream_url,
+            headers={'Icy-MetaData': '1'},
+            stream=True,
+            timeout=(ICY_CONNECT_TIMEOUT, ICY_READ_TIMEOUT),
+        )
+        with response:
+            response.raise_for_status()
+            try:
+                metaint = int(response.headers.get('icy-metaint', 0))
+            except ValueError:
+                metaint = 0
+            if metaint <= 0:
+                raise IcyError("server sends no icy-metaint, so no track titles")
+
+            raw = response.raw
+            while not self._stop.is_set():
+                _skip(raw, metaint)
+                length = _read_exact(raw, 1)[0] * 16
+                self._streaming = True
+                if length:
+                    # An empty block means the title has not changed
+                    self._on_title(parse_stream_title(_read_exact(raw, length)))
+
+    def _on_title(self, title: Optional[str]):
+        if title is None or title == self._title:
+            return
+        self._title = title
+        track = self._parse_title(title)
+        if track == self._track:
+            return
+        self._track = track
+        self.logger.debug(f"StreamTitle changed: {title!r}")
+        if self._publish is not None:
+            self._publish(track)
+
+    def _parse_title(self, title: str) -> Optional[TrackInfo]:
+        """Split ``Artist - Title``; titles without both parts (ads, jingles) are None."""
+        if self.separator not in title:
+            return None
+        artist, track_title = (part.strip() for part in title.split(self.separator, 1))
+        if not artist or not track_title:
+            return None
+        return TrackInfo(
+            artist=self.normalize_artist(artist),
+            title=self.normalize_title(track_title),
+        )
@@ -0,0 +1,147 @@
+"""Fast, typed JSON decoding for the JSON now-playing APIs.
+
+The livemeta payload carries every step of the programme in ``steps`` but we
+only ever read the one the live level points at. With msgspec installed the
+document is decoded into typed structs with ``steps`` left as raw, undecoded
+JSON; only the current step is decoded afterwards. Otherwise orjson (or the
+standard library) decodes the whole document and the same typed view is
+built on top of it.
+
+Both msgspec and orjson are optional; ``BACKEND`` names the one in use.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if msgspec is not None:
+    BACKEND = 'msgspec'
+elif orjson is not None:
+    BACKEND = 'orjson'
+else:
+    BACKEND = 'json'
+
+
+def loads(body: bytes) -> Any:
+    """Decode a JSON document with the fastest available backend."""
+    if orjson is not None:
+        return orjson.loads(body)
+    if msgspec is not None:
+        return msgspec.json.decode(body)
+    return json.loads(body)
+
+
+@dataclass(frozen=True)
+class LivemetaStep:
+    """The fields of a livemeta step that fetchers read."""
+    title: Optional[str] = None
+    titre: Optional[str] = None
+    authors: Optional[str] = None
+    interpreteMorceau: Optional[str] = None
+    performers: Optional[str] = None
+    titreAlbum: Optional[str] = None
+    album: Optional[str] = None
+    start: Optional[float] = None
+    end: Optional[float] = None
+
+
+_STEP_FIELDS = tuple(LivemetaStep.__dataclass_fields__)
+
+
+@dataclass(frozen=True)
+class LivemetaLevel:
+    """A livemeta level: step uids in order and the index playing now."""
+    items: List[str]
+    position: Optional[int] = None
+
+
+class LivemetaDocument:
+    """Typed view of a livemeta payload; steps are decoded on demand."""
+
+    def __init__(self, levels: List[LivemetaLevel], steps: Dict[str, Any], raw_steps: bool):
+        self.levels = levels
+        self._steps = steps
+        self._raw_steps = raw_steps
+
+    def __contains__(self, uid: str) -> bool:
+        return uid in self._steps
+
+    @property
+    def has_steps(self) -> bool:
+        return bool(self._steps)
+
+    def step(self, uid: str) -> Optional[LivemetaStep]:
+        """Decode and return one step, or None if the uid is unknown."""
+        value = self._steps.get(uid)
+        if value is None:
+            return None
+        if self._raw_steps:
+            value = msgspec.json.decode(value)
+        if not isinstance(value, dict):
+            return None
+        return LivemetaStep(**{name: _scalar(value.get(name)) for name in _STEP_FIELDS})
+
+
+def _scalar(value: Any) -> Any:
+    # Keep strings and numbers; lists/objects are not usable as track fields.
+    return value if isinstance(value, (str, int, float)) and not isinstance(value, bool) else None
+
+
+if msgspec is not None:
+    class _Level(msgspec.Struct):
+        items: List[Any] = []
+        position: Optional[int] = None
+
+    class _Document(msgspec.Struct):
+        steps: Dict[str, msgspec.Raw] = {}
+        levels: List[_Level] = []
+
+    _document_decoder = msgspec.json.Decoder(_Document)
+
+
+def decode_livemeta(body: bytes) -> LivemetaDocument:
+    """
+    Decode a livemeta payload without decoding steps nobody reads.
+
+    Args:
+        body: Raw response body
+
+    Returns:
+        The typed document
+
+    Raises:
+        ValueError: If the body is not valid JSON
+    """
+    if msgspec is not None:
+        try:
+            document = _document_decoder.decode(body)
+        except msgspec.ValidationError:
+            pass  # unexpected shape; fall back to the generic path below
+        else:
+            levels = [LivemetaLevel([str(uid) for uid in level.items], level.position)
+                      for level in document.levels]
+            return LivemetaDocument(levels, document.steps, raw_steps=True)
+
+    data = loads(body)
+    if not isinstance(data, dict):
+        return LivemetaDocument([], {}, raw_steps=False)
+    levels = []
+    for level in data.get('levels') or []:
+        if isinstance(level, dict):
+            position = level.get('position')
+            levels.append(LivemetaLevel(
+                [str(uid) for uid in level.get('items') or []],
+                position if isinstance(position, int) else None,
+            ))
+    steps = data.get('steps')
+    return LivemetaDocument(levels, steps if isinstance(steps, dict) else {}, raw_steps=False)
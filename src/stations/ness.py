@@ -1,7 +1,6 @@
 """Ness Radio station fetcher."""
 
-import requests
-from typing import Optional
+from typing import List, Optional
 try:
     from .base import BaseStationFetcher, TrackInfo
 except ImportError:
@@ -11,12 +10,10 @@ except ImportError:
 class NessFetcher(BaseStationFetcher):
     """Fetcher for Ness Radio."""
     
+    timezone = 'Africa/Casablanca'
+    
     def __init__(self):
         super().__init__("ness")
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (compatible; RadioScrobbler/1.0)'
-        })
     
     def get_current_track(self) -> Optional[TrackInfo]:
         """
@@ -31,3 +28,7 @@ class NessFetcher(BaseStationFetcher):
         
         self.logger.warning("Could not fetch track from Ness Radio")
         return None
+    
+    def get_recent_tracks(self) -> List[TrackInfo]:
+        """Fetch the recent plays from the Online Radio Box playlist."""
+        return self.get_history_from_onlineradiobox("ma/ness")
@@ -1,22 +1,33 @@
 """Radio Nova station fetcher."""
 
+import time
 import requests
-from typing import Optional
+from typing import Iterable, List, Optional
 try:
-    from .base import BaseStationFetcher, TrackInfo
+    from .base import HISTORY_LIMIT, BaseStationFetcher, TrackInfo, local_time_to_timestamp
+    from .html_stream import RowCell, extract_rows
+    from .rules import RowRule, RowRules
 except ImportError:
-    from base import BaseStationFetcher, TrackInfo
+    from base import HISTORY_LIMIT, BaseStationFetcher, TrackInfo, local_time_to_timestamp
+    from html_stream import RowCell, extract_rows
+    from rules import RowRule, RowRules
+
+
+# recenttracks.com rows: "HH:MM | Artist | Title", or the same without a
+# usable time (in case the format differs).
+NOVA_ROWS = RowRules([
+    RowRule('played', r'(?=.*:).{1,6}', {'time': 0, 'artist': 1, 'title': 2}, cell_tags=('td', 'th')),
+    RowRule('untimed', r'.*', {'artist': 1, 'title': 2}, cell_tags=('td', 'th')),
+])
 
 
 class RadioNovaFetcher(BaseStationFetcher):
     """Fetcher for Radio Nova using recenttracks.com."""
     
+    timezone = 'Europe/Paris'
+    
     def __init__(self):
         super().__init__("radionova")
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (compatible; RadioScrobbler/1.0)'
-        })
     
     def get_current_track(self) -> Optional[TrackInfo]:
         """
@@ -27,61 +38,9 @@ class RadioNovaFetcher(BaseStationFetcher):
         """
         try:
             url = "https://recenttracks.com/stations/radio-nova/recently-played"
-            response = self.session.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                try:
-                    from bs4 import BeautifulSoup
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Find all tables - the track data might be in a different table
-                    tables = soup.find_all('table')
-                    
-                    for table in tables:
-                        rows = table.find_all('tr')
-                        
-                        # Look for rows with track data (skip header rows)
-                        for row in rows:
-                            cells = row.find_all(['td', 'th'])
-                            
-                            if len(cells) >= 3:
-                                time_cell = cells[0].get_text(strip=True)
-                                artist = cells[1].get_text(strip=True)
-                                title = cells[2].get_text(strip=True)
-                                
-                                # Skip header rows
-                                if artist.lower() in ['artist', 'time'] or title.lower() in ['title', 'time']:
-                                    continue
-                                
-                                # Skip if empty
-                                if not artist or not title:
-                                    continue
-                                
-                                # Check if time looks like a timestamp (HH:MM format)
-                                # This helps identify actual track rows vs headers
-                                if ':' in time_cell and len(time_cell) <= 6:
-                                    # This looks like a real track row
-                                    if artist and title:
-                                        self.logger.debug(f"Found Radio Nova track: {artist} - {title}")
-                                        return TrackInfo(
-                                            artist=self.normalize_artist(artist),
-                                            title=self.normalize_title(title)
-                                        )
-                                
-                                # Also try rows without time validation (in case format differs)
-                                if artist and title and len(artist) > 1 and len(title) > 1:
-                                    # Make sure it's not a header
-                                    if artist[0].isupper() or title[0].isupper():  # Likely a real track
-                                        self.logger.debug(f"Found Radio Nova track (no time): {artist} - {title}")
-                                        return TrackInfo(
-                                            artist=self.normalize_artist(artist),
-                                            title=self.normalize_title(title)
-                                        )
-                                        
-                except ImportError:
-                    self.logger.warning("BeautifulSoup not available for Radio Nova")
-                except Exception as e:
-                    self.logger.debug(f"Error parsing Radio Nova page: {e}")
+            track_info = self.http.get_streamed(url, self._extract_page)
+            if track_info:
+                return track_info
             
         except requests.exceptions.RequestException as e:
             self.logger.debug(f"Error fetching Radio Nova: {e}")
@@ -90,3 +49,70 @@ class RadioNovaFetcher(BaseStationFetcher):
         
         self.logger.warning("Could not fetch track from Radio Nova")
         return None
+    
+    def get_recent_tracks(self) -> List[TrackInfo]:
+        """Fetch the timestamped plays listed on recenttracks.com, newest first."""
+        try:
+            url = "https://recenttracks.com/stations/radio-nova/recently-played"
+            plays = self.http.get_streamed(url, self._extract_history)
+            if plays:
+                return plays
+        except requests.exceptions.RequestException as e:
+            self.logger.debug(f"Error fetching Radio Nova history: {e}")
+        except Exception as e:
+            self.logger.debug(f"Unexpected error fetching Radio Nova history: {e}")
+        
+        return []
+    
+    def _extract_history(self, chunks: Iterable[str]) -> List[TrackInfo]:
+        return self._extract_page(chunks, HISTORY_LIMIT)
+    
+    def _extract_page(self, chunks: Iterable[str], limit: Optional[int] = None):
+        """
+        Read track rows from a streamed recenttracks.com page.
+        
+        Returns the first track row, or with ``limit`` a list of up to that
+        many rows, newest first, with ``played_at`` set from their times.
+        """
+        found = []
+        now = time.time()
+        
+        def on_row(cells: List[RowCell]) -> bool:
+            # Look for rows with track data (skip header rows)
+            matched = NOVA_ROWS.match(cells)
+            if matched is None:
+                return False
+            kind, fields = matched
+            artist, title = fields['artist'], fields['title']
+            
+            # Skip header rows
+            if artist.lower() in ['artist', 'time'] or title.lower() in ['title', 'time']:
+                return False
+            
+            # Skip if empty
+            if not artist or not title:
+                return False
+            
+            if kind == 'played':
+                # A timestamped row is a real track row
+                self.logger.debug(f"Found Radio Nova track: {artist} - {title}")
+            elif len(artist) > 1 and len(title) > 1 and (artist[0].isupper() or title[0].isupper()):
+                # Untimed row: make sure it's not a header
+                self.logger.debug(f"Found Radio Nova track (no time): {artist} - {title}")
+            else:
+                return False
+            
+            played_at = None
+            if kind == 'played':
+                played_at = local_time_to_timestamp(fields['time'], self.timezone, now)
+            found.append(TrackInfo(
+                artist=self.normalize_artist(artist),
+                title=self.normalize_title(title),
+                played_at=played_at
+            ))
+            return limit is None or len(found) >= limit
+        
+        extract_rows(chunks, on_row)
+        if limit is not None:
+            return found
+        return found[0] if found else None
@@ -0,0 +1,152 @@
+"""Declarative extraction rules for now-playing sources.
+
+Fetchers declare *what* to pull out of a response instead of scanning it by
+hand. Rule sets are compiled once, at import time, and each one runs in a
+single pass over a response:
+
+- ``RegexRules``: an ordered list of regex anchors, tried by priority; the
+  first match of the highest-priority rule whose captured text passes the
+  caller's check wins.
+- ``RowRules``: CSS-like row selectors for rows produced by
+  ``html_stream.TableRowExtractor`` -- which cell tags count, a pattern the
+  first cell must match, and which cells hold which field.
+- ``KeyPathRules``: dotted JSON key paths with fallbacks per field
+  (``'current.artist'`` means ``data['current']['artist']``).
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+try:
+    from .html_stream import RowCell
+except ImportError:
+    from html_stream import RowCell
+
+
+class RegexRules:
+    """Regex anchors in priority order, each with one capture group."""
+
+    def __init__(self, patterns: Sequence[str], flags: int = 0):
+        """
+        Compile the rules.
+
+        Args:
+            patterns: Regexes with exactly one capturing group holding the
+                text, most specific first
+            flags: ``re`` flags applied to every pattern
+        """
+        self.patterns = [re.compile(pattern, flags) for pattern in patterns]
+        for compiled in self.patterns:
+            if compiled.groups != 1:
+                raise ValueError(f"Rule must have exactly one capture group: {compiled.pattern!r}")
+
+    def search(self, text: str, accept: Callable[[str], bool] = bool) -> Optional[str]:
+        """
+        Return the capture of the highest-priority rule that ``accept`` allows.
+
+        Each rule contributes its first match in the text; a rejected capture
+        moves on to the next rule, so a loose fallback earlier in the page
+        never wins over a specific rule that matches further down.
+
+        Args:
+            text: Text to scan
+            accept: Predicate applied to each candidate capture
+        """
+        for pattern in self.patterns:
+            match = pattern.search(text)
+            if match is not None and accept(match.group(1)):
+                return match.group(1)
+        return None
+
+
+@dataclass(frozen=True)
+class RowRule:
+    """Select table rows by their first cell and map cells to fields."""
+    name: str
+    first_cell: str
+    fields: Mapping[str, int]
+    cell_tags: Tuple[str, ...] = ('td',)
+    prefer_link: bool = False
+    _first_cell_re: Any = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, '_first_cell_re', re.compile(self.first_cell, re.IGNORECASE))
+
+    @property
+    def min_cells(self) -> int:
+        return max(self.fields.values()) + 1
+
+    def match(self, cells: Sequence[RowCell]) -> Optional[Dict[str, str]]:
+        """Return the row's fields if the row matches this rule, else None."""
+        cells = [cell for cell in cells if cell.tag in self.cell_tags]
+        if len(cells) < self.min_cells:
+            return None
+        if not self._first_cell_re.fullmatch(cells[0].text):
+            return None
+        values = {}
+        for name, index in self.fields.items():
+            cell = cells[index]
+            if self.prefer_link and cell.link_text is not None:
+                values[name] = cell.link_text
+            else:
+                values[name] = cell.text
+        return values
+
+
+class RowRules:
+    """Ordered row selectors; a row is claimed by the first rule it matches."""
+
+    def __init__(self, rules: Iterable[RowRule]):
+        self.rules = tuple(rules)
+
+    def match(self, cells: Sequence[RowCell]) -> Optional[Tuple[str, Dict[str, str]]]:
+        """Return ``(rule name, fields)`` for the first matching rule, else None."""
+        for rule in self.rules:
+            values = rule.match(cells)
+            if values is not None:
+                return rule.name, values
+        return None
+
+
+class KeyPathRules:
+    """Per-field JSON key paths, tried in order until one yields a value."""
+
+    def __init__(self, **fields: Sequence[str]):
+        """
+        Compile the rules.
+
+        Args:
+            **fields: Field name -> dotted key paths, in order of preference
+        """
+        self.fields: Dict[str, Tuple[Tuple[str, ...], ...]] = {
+            name: tuple(tuple(path.split('.')) for path in paths)
+            for name, paths in fields.items()
+        }
+
+    def extract(self, data: Any) -> Dict[str, Any]:
+        """
+        Resolve every field against ``data``.
+
+        Mappings are read by key and other objects by attribute, so typed
+        structs work as well as dicts. Empty strings and None count as missing.
+
+        Returns:
+            Field name -> first non-empty value found (or None)
+        """
+        return {name: self._first(data, paths) for name, paths in self.fields.items()}
+
+    @staticmethod
+    def _first(data: Any, paths: Tuple[Tuple[str, ...], ...]) -> Any:
+        for path in paths:
+            value = data
+            for key in path:
+                if isinstance(value, Mapping):
+                    value = value.get(key)
+                else:
+                    value = getattr(value, key, None)
+                if value is None:
+                    break
+            if value is not None and value != '':
+                return value
+        return None
@@ -0,0 +1,388 @@
+"""Fallback chains of track sources with circuit breakers and learned ordering.
+
+Several fetchers have more than one source for the same answer (FM4: the
+Online Radio Box page and ORF's APIs; FIP: livemeta and recenttracks.com)
+and used to try them in a fixed order on every poll. A dead endpoint then
+cost a full request timeout on each poll.
+
+``SourceChain`` wraps such a list. Every source has a ``CircuitBreaker``:
+after ``failure_threshold`` failures in a row (a transport or HTTP error, or
+an answer that cannot be parsed) it opens and the source is skipped without
+a request; after ``reset_timeout`` one probe is let through (half-open), and
+the breaker closes on success or opens again for twice as long on failure.
+An answer without a track (a talk segment, a jingle row) comes from a
+healthy source and never opens the breaker. Each source also keeps rolling
+stats over its last ``window`` attempts, and the chain tries the sources
+with the lowest expected cost first (mean latency divided by the share of
+attempts that gave a track). Sources without history keep their configured
+order.
+
+With hedging on, the chain does not wait for a slow source to fail: if the
+best source has not answered within its latency budget (its p95 latency),
+the next source is started as well, and the first valid track wins. The
+requests still running are then cancelled (see ``http_client.cancellable``).
+Since the budget is the p95, only about one fetch in twenty sends a second
+request. Hedging is on unless ``SOURCE_HEDGING`` is set to ``0``.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+try:
+    from ..http_client import cancellable
+except ImportError:
+    from http_client import cancellable
+
+try:
+    from .base import TrackInfo
+except ImportError:
+    from base import TrackInfo
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Failures in a row that open a source's breaker.
+DEFAULT_FAILURE_THRESHOLD = 3
+
+# Seconds a breaker stays open before a probe; doubled on every failed
+# probe, up to the maximum.
+DEFAULT_RESET_TIMEOUT = 60.0
+DEFAULT_MAX_RESET_TIMEOUT = 15 * 60.0
+
+# Attempts per source the ranking is computed over.
+DEFAULT_WINDOW = 20
+
+# Latency assumed for a source that has no successful attempt yet (seconds).
+PRIOR_LATENCY = 1.0
+
+# Hedging budget: the source's p95 latency once it has this many successful
+# attempts, DEFAULT_HEDGE_BUDGET before that, never below MIN_HEDGE_BUDGET.
+HEDGE_QUANTILE = 0.95
+HEDGE_MIN_SAMPLES = 5
+DEFAULT_HEDGE_BUDGET = 2.0
+MIN_HEDGE_BUDGET = 0.25
+
+# Threads shared by all chains for hedged source calls.
+HEDGE_WORKERS = 16
+
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _hedging_enabled() -> bool:
+    return os.getenv('SOURCE_HEDGING', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_executor_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="hedge")
+    return _hedge_executor
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one source."""
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+                 max_reset_timeout: float = DEFAULT_MAX_RESET_TIMEOUT):
+        """
+        Initialize a closed breaker.
+
+        Args:
+            failure_threshold: Failures in a row that open the breaker
+            reset_timeout: Seconds the breaker first stays open
+            max_reset_timeout: Upper bound for the doubled open time
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max(reset_timeout, max_reset_timeout)
+        self.state = CLOSED
+        self.failures = 0
+        self.open_until = 0.0
+        self._timeout = reset_timeout
+        self._lock = threading.Lock()
+
+    def allow(self, now: Optional[float] = None) -> bool:
+        """
+        True if a request may be sent now.
+
+        An open breaker whose timeout has passed lets exactly one probe
+        through and turns half-open until the probe's outcome is recorded.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and now >= self.open_until:
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._timeout = self.reset_timeout
+
+    def release(self):
+        """Forget an abandoned probe, so the next call may probe again."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.state = OPEN
+
+    def record_failure(self, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                # The probe failed: stay away twice as long
+                self._timeout = min(self._timeout * 2, self.max_reset_timeout)
+            elif self.failures < self.failure_threshold:
+                return
+            self.state = OPEN
+            self.open_until = now + self._timeout
+
+
+class SourceStats:
+    """Outcomes of a source's last ``window`` attempts."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self._outcomes = deque(maxlen=max(1, window))
+
+    def record(self, ok: bool, latency: float, has_track: bool = True):
+        """Record one attempt: ``ok`` if the source answered, ``has_track`` if the answer had one."""
+        self._outcomes.append((ok, latency, ok and has_track))
+
+    @property
+    def attempts(self) -> int:
+        return len(self._outcomes)
+
+    @property
+    def success_rate(self) -> float:
+        """Share of successful attempts (1.0 while there is no history)."""
+        if not self._outcomes:
+            return 1.0
+        return sum(1 for ok, _, _ in self._outcomes if ok) / len(self._outcomes)
+
+    @property
+    def track_rate(self) -> float:
+        """Share of attempts that gave a track (1.0 while there is no history)."""
+        if not self._outcomes:
+            return 1.0
+        return sum(1 for _, _, has_track in self._outcomes if has_track) / len(self._outcomes)
+
+    @property
+    def mean_latency(self) -> float:
+        """Mean latency of successful attempts (``PRIOR_LATENCY`` if none)."""
+        latencies = [latency for ok, latency, _ in self._outcomes if ok]
+        if not latencies:
+            return PRIOR_LATENCY
+        return sum(latencies) / len(latencies)
+
+    def latency_quantile(self, q: float) -> Optional[float]:
+        """Latency below which ``q`` of the successful attempts finished (None if none)."""
+        latencies = sorted(latency for ok, latency, _ in self._outcomes if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    @property
+    def successes(self) -> int:
+        return sum(1 for ok, _, _ in self._outcomes if ok)
+
+    def expected_cost(self) -> float:
+        """Seconds expected per useful answer: mean latency over track rate."""
+        return self.mean_latency / max(self.track_rate, 0.05)
+
+
+@dataclass
+class TrackSource:
+    """One way of getting a station's current track.
+
+    ``fetch`` should raise on transport and HTTP errors, which count as a
+    failure, and return None when the source has no track right now, which
+    does not.
+    """
+    name: str
+    fetch: Callable[[], Optional[TrackInfo]]
+
+
+class SourceChain:
+    """Tries a station's sources best-first, skipping those whose breaker is open."""
+
+    def __init__(self, sources: Sequence[TrackSource], window: int = DEFAULT_WINDOW,
+                 failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+                 max_reset_timeout: float = DEFAULT_MAX_RESET_TIMEOUT,
+                 station_name: str = '',
+                 hedge: Optional[bool] = None):
+        """
+        Initialize the chain.
+
+        Args:
+            sources: Sources in their preferred order (used until there is
+                history to rank them by)
+            window: Attempts per source the ranking looks at
+            failure_threshold: Failures in a row that open a source's breaker
+            reset_timeout: Seconds a breaker first stays open
+            max_reset_timeout: Upper bound for a breaker's open time
+            station_name: Used in log messages
+            hedge: Start the next source when one is slower than its p95
+                (default: on unless ``SOURCE_HEDGING=0``)
+        """
+        self.sources = list(sources)
+        self.station_name = station_name
+        self.hedge = _hedging_enabled() if hedge is None else hedge
+        self.breakers: Dict[str, CircuitBreaker] = {
+            source.name: CircuitBreaker(failure_threshold, reset_timeout, max_reset_timeout)
+            for source in self.sources
+        }
+        self.stats: Dict[str, SourceStats] = {source.name: SourceStats(window) for source in self.sources}
+
+    def ranked(self) -> List[TrackSource]:
+        """Sources by expected cost; ties keep the configured order."""
+        return sorted(self.sources, key=lambda source: self.stats[source.name].expected_cost())
+
+    def fetch(self) -> Optional[TrackInfo]:
+        """
+        Return the first track a source delivers, trying sources best-first.
+
+        Sources whose breaker is open are skipped without a request. With
+        hedging, a source slower than its budget gets company from the next one.
+
+        Returns:
+            TrackInfo from the first source that has one, None otherwise
+        """
+        if self.hedge and len(self.sources) > 1:
+            return self._fetch_hedged()
+        for source in self.ranked():
+            track = self.try_source(source)
+            if track is not None:
+                logger.debug(f"{self.station_name}: track from {source.name}")
+                return track
+        return None
+
+    def hedge_budget(self, source: TrackSource) -> float:
+        """Seconds to wait for ``source`` before starting the next one."""
+        stats = self.stats[source.name]
+        if stats.successes < HEDGE_MIN_SAMPLES:
+            return DEFAULT_HEDGE_BUDGET
+        return max(MIN_HEDGE_BUDGET, stats.latency_quantile(HEDGE_QUANTILE))
+
+    def _fetch_hedged(self) -> Optional[TrackInfo]:
+        remaining = self.ranked()
+        pending: Dict[Future, TrackSource] = {}
+        started: Dict[Future, float] = {}
+        cancel = threading.Event()
+
+        def launch_next() -> bool:
+            while remaining:
+                source = remaining.pop(0)
+                if not self.breakers[source.name].allow():
+                    logger.debug(f"{self.station_name}: skipping {source.name} (circuit open)")
+                    continue
+                future = _executor().submit(self._call, source, cancel)
+                pending[future] = source
+                started[future] = time.monotonic()
+                return True
+            return False
+
+        try:
+            launch_next()
+            while pending:
+                # Wait for any result, or until the newest source has used
+                # up its budget (counted from when it started)
+                timeout = None
+                if remaining:
+                    newest = next(reversed(pending))
+                    timeout = max(0.0, started[newest] + self.hedge_budget(pending[newest]) - time.monotonic())
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    source = pending.pop(future)
+                    track = future.result()
+                    if track is not None:
+                        logger.debug(f"{self.station_name}: track from {source.name}")
+                        return track
+                if not done:
+                    logger.debug(f"{self.station_name}: {pending[next(reversed(pending))].name} "
+                                 f"over budget, hedging")
+                if not done or not pending:
+                    launch_next()
+            return None
+        finally:
+            # Losing requests stop at their next request or body chunk
+            cancel.set()
+
+    def _call(self, source: TrackSource, cancel: threading.Event) -> Optional[TrackInfo]:
+        """
+        Run one hedged source call.
+
+        A call that finishes after the race was won still counts for the
+        source's latency stats (so a source that is always beaten gets a p95
+        budget of its own), but not for its breaker; a cancelled one is not
+        counted at all.
+        """
+        started = time.monotonic()
+        ok = True
+        try:
+            with cancellable(cancel):
+                track = source.fetch()
+        except Exception as e:
+            logger.debug(f"{self.station_name}: {source.name} failed: {e}")
+            track, ok = None, False
+        if cancel.is_set():
+            self.breakers[source.name].release()
+            if ok:
+                self.stats[source.name].record(ok, time.monotonic() - started, track is not None)
+            return None
+        self.record(source, ok, time.monotonic() - started, track is not None)
+        return track
+
+    def try_source(self, source: TrackSource) -> Optional[TrackInfo]:
+        """Call one source (unless its breaker is open) and record the outcome."""
+        breaker = self.breakers[source.name]
+        if not breaker.allow():
+            logger.debug(f"{self.station_name}: skipping {source.name} (circuit open)")
+            return None
+
+        started = time.monotonic()
+        ok = True
+        try:
+            track = source.fetch()
+        except Exception as e:
+            logger.debug(f"{self.station_name}: {source.name} failed: {e}")
+            track, ok = None, False
+        self.record(source, ok, time.monotonic() - started, track is not None)
+        return track
+
+    def record(self, source: TrackSource, ok: bool, latency: float, has_track: bool = True):
+        """
+        Feed one attempt's outcome into the source's stats and breaker.
+
+        Only failed attempts (``ok`` False) count against the breaker; an
+        answer without a track only lowers the source's rank.
+        """
+        self.stats[source.name].record(ok, latency, has_track)
+        breaker = self.breakers[source.name]
+        if ok:
+            breaker.record_success()
+            return
+        was_open = breaker.state == OPEN
+        breaker.record_failure()
+        if breaker.state == OPEN and not was_open:
+            logger.info(
+                f"{self.station_name}: {source.name} failing, skipping it for "
+                f"{breaker.open_until - time.time():.0f}s"
+            )
@@ -0,0 +1,6 @@
+"""Put ``src`` on the import path, as the entry points and benchmarks do."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,41 @@
+"""Row extraction must not depend on where the page is split into chunks."""
+
+from stations.html_stream import RowCell, extract_rows
+
+PAGE = (
+    '<html><body><table><tbody>'
+    '<tr><td class="time">Live</td>'
+    '<td><a href="/track/1/">Daft Punk - One More Time</a></td></tr>'
+    '<tr><td> 12:04 </td><td>\n  Air &amp; Friends - La Femme d\'Argent\n</td></tr>'
+    '</tbody></table></body></html>'
+)
+
+EXPECTED = [
+    [RowCell('td', 'Live'), RowCell('td', 'Daft Punk - One More Time', 'Daft Punk - One More Time')],
+    [RowCell('td', '12:04'), RowCell('td', "Air & Friends - La Femme d'Argent")],
+]
+
+
+def _rows(chunks):
+    rows = []
+    extract_rows(chunks, lambda cells: rows.append(cells) and False)
+    return rows
+
+
+def test_whole_page():
+    assert _rows([PAGE]) == EXPECTED
+
+
+def test_split_at_every_offset():
+    for offset in range(1, len(PAGE)):
+        assert _rows([PAGE[:offset], PAGE[offset:]]) == EXPECTED, offset
+
+
+def test_one_character_chunks():
+    assert _rows(list(PAGE)) == EXPECTED
+
+
+def test_text_nodes_are_stripped_separately():
+    # Like bs4's get_text(strip=True): each text node is stripped on its own
+    page = '<table><tr><td><b> Artist </b> - <i> Title </i></td></tr></table>'
+    assert _rows([page]) == [[RowCell('td', 'Artist-Title')]]
@@ -0,0 +1,60 @@
+"""Response cache of the shared HTTP client, against a local server."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_client import HttpClient
+
+PAGE = b'<table><tr><td>Live</td><td>A - B</td></tr><tr><td>12:00</td><td>C - D</td></tr></table>'
+
+
+@pytest.fixture
+def server():
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(PAGE)))
+            self.send_header('Cache-Control', 'max-age=60')
+            self.end_headers()
+            self.wfile.write(PAGE)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/playlist", hits
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class _Parsers:
+    def first(self, chunks):
+        return ''.join(chunks)[:10]
+
+    def whole(self, chunks):
+        return [''.join(chunks)]
+
+
+def test_parsers_of_one_url_are_cached_apart(server):
+    url, hits = server
+    client = HttpClient(host_min_spacing=0)
+    parsers = _Parsers()
+
+    assert client.get_streamed(url, parsers.first) == PAGE.decode()[:10]
+    assert client.get_streamed(url, parsers.whole) == [PAGE.decode()]
+    assert len(hits) == 2
+
+    # Each parser's result is still fresh; bound methods made anew still match
+    assert client.get_streamed(url, parsers.first) == PAGE.decode()[:10]
+    assert client.get_parsed(url, lambda response: response.text) == PAGE.decode()
+    assert client.get_streamed(url, parsers.whole) == [PAGE.decode()]
+    assert len(hits) == 3
+    client.close()
@@ -0,0 +1,131 @@
+"""ICY metadata reading against a local socket-based stream server."""
+
+import socketserver
+import threading
+import time
+
+import pytest
+
+from stations import icy
+from stations.icy import IcyStreamFetcher, parse_stream_title
+
+METAINT = 1000
+
+
+def _block(title=None):
+    """One metadata block: length byte (x16) and NUL-padded StreamTitle."""
+    if title is None:
+        return b'\0'
+    meta = f"StreamTitle='{title}';StreamUrl='';".encode('utf-8')
+    meta += b'\0' * (-len(meta) % 16)
+    return bytes([len(meta) // 16]) + meta
+
+
+class _StreamServer(socketserver.ThreadingTCPServer):
+    """Serves ``connections[i]`` (a list of metadata blocks) to the i-th client."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, connections):
+        self.connections = list(connections)
+        self.requests_seen = []
+        super().__init__(('127.0.0.1', 0), _StreamHandler)
+
+
+class _StreamHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        headers = []
+        while True:
+            line = self.rfile.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            headers.append(line.decode('latin-1').strip().lower())
+        index = len(self.server.requests_seen)
+        self.server.requests_seen.append(headers)
+        blocks = self.server.connections[index] if index < len(self.server.connections) else []
+        self.wfile.write(
+            b'HTTP/1.0 200 OK\r\n'
+            b'Content-Type: audio/mpeg\r\n'
+            + f'icy-metaint: {METAINT}\r\n\r\n'.encode()
+        )
+        for block in blocks:
+            # Audio split over two writes, so reads see partial chunks
+            self.wfile.write(b'\xff' * (METAINT // 3))
+            self.wfile.flush()
+            self.wfile.write(b'\xff' * (METAINT - METAINT // 3) + block)
+            self.wfile.flush()
+            time.sleep(0.05)
+        # Closing the connection ends the stream
+
+
+@pytest.fixture
+def stream_server():
+    servers = []
+
+    def start(*connections):
+        server = _StreamServer(connections)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server, f"http://127.0.0.1:{server.server_address[1]}/stream"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _follow(url, expected_count, timeout=5.0):
+    fetcher = IcyStreamFetcher('test', url)
+    published = []
+    done = threading.Event()
+
+    def publish(track):
+        published.append(track)
+        if len(published) >= expected_count:
+            done.set()
+
+    fetcher.start_push(publish)
+    done.wait(timeout)
+    fetcher.stop()
+    return fetcher, published
+
+
+def test_parse_stream_title():
+    assert parse_stream_title(b"StreamTitle='A - B';StreamUrl='';\0\0") == 'A - B'
+    assert parse_stream_title(b"StreamTitle='It's Me - Don't';\0") == "It's Me - Don't"
+    assert parse_stream_title("StreamTitle='Björk - Jóga';".encode('latin-1')) == 'Björk - Jóga'
+    assert parse_stream_title(b"StreamUrl='x';\0") is None
+
+
+def test_titles_are_read_between_audio_blocks(stream_server):
+    server, url = stream_server([
+        _block('Daft Punk - One More Time'),
+        _block(),                                # empty: title unchanged
+        _block('Daft Punk - One More Time'),     # repeated: not published again
+        _block('Station Jingle'),                # no artist/title: published as None
+        _block('Air - La Femme d\'Argent'),
+    ])
+    fetcher, published = _follow(url, 3)
+
+    assert [(t.artist, t.title) if t else None for t in published] == [
+        ('Daft Punk', 'One More Time'),
+        None,
+        ('Air', "La Femme d'Argent"),
+    ]
+    assert fetcher.get_current_track() == published[-1]
+    assert 'icy-metadata: 1' in server.requests_seen[0]
+
+
+def test_reconnects_after_the_stream_ends(stream_server, monkeypatch):
+    monkeypatch.setattr(icy, 'ICY_RECONNECT_DELAY', 0.05)
+    server, url = stream_server(
+        [_block('Artist One - Song A')],
+        [_block('Artist One - Song A'), _block('Artist Two - Song B')],
+    )
+    _, published = _follow(url, 2)
+
+    assert [(t.artist, t.title) for t in published] == [
+        ('Artist One', 'Song A'),
+        ('Artist Two', 'Song B'),
+    ]
+    assert len(server.requests_seen) >= 2
@@ -0,0 +1,39 @@
+"""Submission queue of the Last.fm client (no requests are sent)."""
+
+import threading
+
+from lastfm_client import LastFMClient, ScrobbleResult
+from spool import ScrobbleSpool
+
+
+class _Client(LastFMClient):
+    def _scrobble_batch(self, batch):
+        return [ScrobbleResult(True)] * len(batch), True
+
+
+def test_spool_is_written_outside_the_queue_lock(tmp_path):
+    spool = ScrobbleSpool(str(tmp_path / 'spool.db'))
+    client = _Client('user', 'key', 'secret', spool=spool, batch_delay=0.01)
+    add = spool.add
+    lock_free = []
+
+    def probe():
+        if client._queue_cond.acquire(timeout=1):
+            client._queue_cond.release()
+            lock_free.append(True)
+        else:
+            lock_free.append(False)
+
+    def slow_add(*args, **kwargs):
+        # Another thread must be able to take the queue lock meanwhile
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        return add(*args, **kwargs)
+
+    spool.add = slow_add
+    future = client.submit('Air', 'Playground Love')
+    assert future.result(5).accepted
+    assert lock_free == [True]
+    assert spool.pending_count('user') == 0
+    client.close(5)
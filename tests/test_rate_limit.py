@@ -0,0 +1,27 @@
+"""Token buckets: invalid rates and refunds when the parent times out."""
+
+import pytest
+
+import rate_limit
+from rate_limit import TokenBucket
+
+
+def test_non_positive_rate_is_rejected():
+    with pytest.raises(ValueError):
+        TokenBucket(0, 8)
+    with pytest.raises(ValueError):
+        TokenBucket(-1, 8)
+
+
+def test_zero_rate_from_environment_uses_default(monkeypatch):
+    monkeypatch.setenv('LASTFM_RATE_LIMIT', '0')
+    monkeypatch.setattr(rate_limit, '_limiters', {})
+    assert rate_limit.get_rate_limiter('key').rate == rate_limit.DEFAULT_RATE
+
+
+def test_child_token_is_refunded_when_parent_times_out():
+    parent = TokenBucket(0.001, 1)
+    child = TokenBucket(0.001, 2, parent=parent)
+    assert child.acquire(timeout=0.05)          # takes from both
+    assert not child.acquire(timeout=0.05)      # parent is empty
+    assert child._tokens >= 0.99                # child's token was given back
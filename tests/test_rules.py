@@ -0,0 +1,31 @@
+"""Regex rules keep their priority regardless of where they match."""
+
+from stations.base import ORB_LIVE_PATTERNS, BaseStationFetcher, TrackInfo
+from stations.rules import RegexRules
+
+PAGE = (
+    "Listen Live now [Radio FM4 - Homepage] and more\n"
+    "| Time | Track |\n"
+    "| Live | [Daft Punk - One More Time](/track/1) |\n"
+)
+
+
+class _Fetcher(BaseStationFetcher):
+    def get_current_track(self):
+        return None
+
+
+def test_specific_rule_beats_earlier_loose_match():
+    assert ORB_LIVE_PATTERNS.search(PAGE, accept=lambda text: ' - ' in text) == 'Daft Punk - One More Time'
+
+
+def test_orb_page_scrobbles_the_live_row():
+    track = _Fetcher('fm4')._extract_onlineradiobox([PAGE])
+    assert track == TrackInfo(artist='Daft Punk', title='One More Time')
+
+
+def test_rejected_capture_falls_through_to_lower_rules():
+    rules = RegexRules([r'first=(\w+)', r'second=(\w+)'])
+    assert rules.search('second=yes first=no', accept=lambda text: text != 'no') == 'yes'
+    assert rules.search('first=x second=y') == 'x'
+    assert rules.search('nothing here') is None
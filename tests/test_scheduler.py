@@ -0,0 +1,37 @@
+"""Backed-off polls keep the station's phase and jitter."""
+
+import random
+
+from scheduler import AdaptiveInterval, PollScheduler
+from stations.base import TrackInfo
+
+
+def test_backoff_interval_is_jittered_from_the_scheduled_time():
+    scheduler = PollScheduler(start_jitter=0, poll_jitter=0.1, rng=random.Random(1))
+    scheduler.add('fip', 60, now=0)
+    scheduler.pop_due(now=0)
+
+    deadlines = set()
+    for poll in range(1, 6):
+        # Each poll takes 5s; the backed-off interval is 120s
+        now = (poll - 1) * 120 + 5
+        deadline = scheduler.reschedule('fip', now=now, interval=120)
+        assert abs(deadline - poll * 120) <= 12
+        deadlines.add(round(deadline - poll * 120, 6))
+        scheduler.pop_due(now=deadline)
+    assert len(deadlines) > 1
+
+
+def test_hinted_delay_starts_a_new_phase():
+    scheduler = PollScheduler(start_jitter=0, poll_jitter=0.1)
+    scheduler.add('fip', 60, now=0)
+    scheduler.pop_due(now=0)
+    assert scheduler.reschedule('fip', now=5, delay=30) == 35
+
+
+def test_adaptive_interval_reports_hints():
+    policy = AdaptiveInterval(60)
+    assert policy.next_delay(TrackInfo(artist='A', title='B'), now=0) == 60
+    assert not policy.hinted
+    policy.next_delay(TrackInfo(artist='A', title='C', next_change_at=100), now=0)
+    assert policy.hinted
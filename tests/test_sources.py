@@ -0,0 +1,94 @@
+"""Circuit breakers open on errors only, not on sources that have no track."""
+
+import time
+
+from stations import sources
+from stations.base import TrackInfo
+from stations.sources import CLOSED, OPEN, SourceChain, TrackSource
+
+
+class _Source:
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_empty_answers_keep_the_breaker_closed():
+    talk, other = _Source(), _Source()
+    chain = SourceChain(
+        [TrackSource('livemeta', talk), TrackSource('recenttracks', other)],
+        failure_threshold=3, hedge=False,
+    )
+    for _ in range(10):
+        assert chain.fetch() is None
+    assert talk.calls == other.calls == 10
+    assert chain.breakers['livemeta'].state == CLOSED
+    assert chain.breakers['recenttracks'].state == CLOSED
+
+    # Music is back: the next poll gets it at once
+    talk.result = TrackInfo(artist='Air', title='Playground Love')
+    assert chain.fetch() == talk.result
+
+
+def test_errors_open_the_breaker():
+    dead = _Source(error=ConnectionError('refused'))
+    source = TrackSource('dead', dead)
+    chain = SourceChain([source], failure_threshold=3, hedge=False)
+    for _ in range(6):
+        assert chain.try_source(source) is None
+    assert dead.calls == 3
+    assert chain.breakers['dead'].state == OPEN
+
+
+def test_sources_with_tracks_rank_first():
+    empty = _Source()
+    full = _Source(TrackInfo(artist='Air', title='Playground Love'))
+    chain = SourceChain([TrackSource('empty', empty), TrackSource('full', full)], hedge=False)
+    chain.fetch()
+    assert [source.name for source in chain.ranked()] == ['full', 'empty']
+
+
+class _Slow(_Source):
+    def __init__(self, delay, result=None, error=None):
+        super().__init__(result, error)
+        self.delay = delay
+
+    def __call__(self):
+        time.sleep(self.delay)
+        return super().__call__()
+
+
+def test_late_answers_count_for_latency_stats(monkeypatch):
+    monkeypatch.setattr(sources, 'DEFAULT_HEDGE_BUDGET', 0.05)
+    track = TrackInfo(artist='Air', title='Playground Love')
+    slow, fast = _Slow(0.2, track), _Source(track)
+    chain = SourceChain([TrackSource('slow', slow), TrackSource('fast', fast)], hedge=True)
+    primary = chain.sources[0]
+    for _ in range(sources.HEDGE_MIN_SAMPLES):
+        # Keep the configured order so the slow source always starts first
+        monkeypatch.setattr(chain, 'ranked', lambda: list(chain.sources))
+        assert chain.fetch() == track
+        time.sleep(0.25)  # let the losing call finish
+    assert chain.stats['slow'].successes == sources.HEDGE_MIN_SAMPLES
+    assert chain.hedge_budget(primary) >= 0.2
+
+
+def test_hedge_budget_runs_from_the_newest_start(monkeypatch):
+    monkeypatch.setattr(sources, 'DEFAULT_HEDGE_BUDGET', 0.3)
+    track = TrackInfo(artist='Air', title='Playground Love')
+    chain = SourceChain([
+        TrackSource('a', _Slow(0.45, error=ConnectionError('reset'))),  # fails after b started
+        TrackSource('b', _Slow(2.0, track)),
+        TrackSource('c', _Source(track)),
+    ], hedge=True)
+    started = time.monotonic()
+    assert chain.fetch() == track
+    # c starts when b's budget is up (0.6s), not a full budget after a failed (0.75s)
+    assert time.monotonic() - started < 0.7
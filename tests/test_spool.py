@@ -0,0 +1,45 @@
+"""Spool claims left by a crashed process are released on the next start."""
+
+import sqlite3
+import time
+
+from spool import ScrobbleSpool
+
+
+def test_claims_of_an_earlier_run_are_released(tmp_path):
+    path = str(tmp_path / 'spool.db')
+    crashed = ScrobbleSpool(path)
+    crashed.add('user', 'Air', 'Playground Love', int(time.time()))      # claimed on add
+    crashed.add('user', 'Air', 'Kelly Watch the Stars', int(time.time()) - 60, claim=False)
+    assert [row.title for row in crashed.claim_due('user', 10)] == ['Kelly Watch the Stars']
+    assert crashed.claim_due('user', 10) == []
+    # The process dies without completing or retrying its rows
+
+    restarted = ScrobbleSpool(path)
+    assert sorted(row.title for row in restarted.claim_due('user', 10)) == [
+        'Kelly Watch the Stars', 'Playground Love',
+    ]
+
+
+def test_backoff_is_kept_across_restarts(tmp_path):
+    path = str(tmp_path / 'spool.db')
+    spool = ScrobbleSpool(path)
+    row_id = spool.add('user', 'Air', 'Playground Love', int(time.time()))
+    spool.retry_later([row_id], 'timeout')
+    assert ScrobbleSpool(path).claim_due('user', 10) == []
+
+
+def test_spool_without_claim_column_is_migrated(tmp_path):
+    path = str(tmp_path / 'spool.db')
+    conn = sqlite3.connect(path)
+    conn.execute(
+        'CREATE TABLE scrobbles (id INTEGER PRIMARY KEY AUTOINCREMENT, idempotency_key TEXT NOT NULL UNIQUE, '
+        'account TEXT NOT NULL, artist TEXT NOT NULL, title TEXT NOT NULL, album TEXT, '
+        'timestamp INTEGER NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL, '
+        'last_error TEXT, created_at REAL NOT NULL)'
+    )
+    conn.commit()
+    conn.close()
+    spool = ScrobbleSpool(path)
+    assert spool.add('user', 'Air', 'Playground Love', int(time.time()), claim=False) is not None
+    assert len(spool.claim_due('user', 10)) == 1
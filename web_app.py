@@ -1,14 +1,17 @@
 """Flask web application for personal radio scrobbler."""
 
 import logging
+import os
 from typing import Optional
 from flask import Flask, render_template, jsonify, request
 from flask_cors import CORS
 
 try:
+    from src.ingest import IngestEndpoint
     from src.personal_scrobbler import PersonalScrobbler, ScrobblerStatus
     from src.scrobbler import STATION_FETCHERS
 except ImportError:
+    from ingest import IngestEndpoint
     from personal_scrobbler import PersonalScrobbler, ScrobblerStatus
     from scrobbler import STATION_FETCHERS
 
@@ -61,10 +64,44 @@ def get_status():
             'artist': status.last_scrobbled.artist if status.last_scrobbled else None,
             'title': status.last_scrobbled.title if status.last_scrobbled else None,
         } if status.last_scrobbled else None,
-        'error': status.error
+        'error': status.error,
+        'submission': scrobbler.lastfm_client.get_metrics()
     })
 
 
+@app.route('/api/ingest', methods=['POST'])
+def ingest():
+    """Accept a batch of pushed now-playing events (bearer token: INGEST_TOKEN)."""
+    if scrobbler is None:
+        return jsonify({
+            'error': 'Scrobbler not initialized'
+        }), 500
+    
+    authorization = request.headers.get('Authorization')
+    endpoint = IngestEndpoint(scrobbler.hub, os.getenv('INGEST_TOKEN'))
+    if not endpoint.authorized(authorization):
+        status, body = endpoint.handle(authorization, None)
+        return jsonify(body), status
+    
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return jsonify({
+            'error': 'Body is not valid JSON'
+        }), 400
+    
+    # Known stations nobody follows yet get a hub entry, so their pushes are
+    # there when someone starts scrobbling them
+    events = payload.get('events') if isinstance(payload, dict) else payload
+    for event in events if isinstance(events, list) else []:
+        station = event.get('station') if isinstance(event, dict) else None
+        if isinstance(station, str) and station.strip().lower() in STATION_FETCHERS:
+            name = station.strip().lower()
+            scrobbler.hub.ensure_station(name, STATION_FETCHERS[name])
+    
+    status, body = endpoint.handle(authorization, payload)
+    return jsonify(body), status
+
+
 @app.route('/api/start', methods=['POST'])
 def start_scrobbling():
     """Start scrobbling a station."""
@@ -13,6 +13,7 @@ sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
 from web_app import app
 from src.personal_scrobbler import PersonalScrobbler
+from src.state_store import StateStore, DEFAULT_STATE_PATH
 from src.utils import setup_logging
 
 
@@ -43,6 +44,7 @@ def load_personal_config(config_path=None):
     return {
         'lastfm': lastfm_config,
         'poll_interval': config.get('poll_interval', 30),
+        'max_poll_interval': config.get('max_poll_interval'),
         'server': config.get('server', {
             'host': '0.0.0.0',
             'port': 5000
@@ -96,6 +98,7 @@ def main():
             config = {
                 'lastfm': lastfm_config,
                 'poll_interval': int(os.getenv('POLL_INTERVAL', '30')),
+                'max_poll_interval': int(os.getenv('MAX_POLL_INTERVAL')) if os.getenv('MAX_POLL_INTERVAL') else None,
                 'server': {
                     'host': os.getenv('HOST', '0.0.0.0'),
                     'port': int(os.getenv('PORT', '5000'))
@@ -125,7 +128,10 @@ def main():
             lastfm_api_secret=lastfm_config['api_secret'],
             lastfm_password=lastfm_config.get('password'),
             lastfm_password_hash=lastfm_config.get('password_hash'),
-            poll_interval=config.get('poll_interval', 30)
+            poll_interval=config.get('poll_interval', 30),
+            max_poll_interval=config.get('max_poll_interval'),
+            # Last scrobble per station survives restarts and redeploys
+            state_store=StateStore(os.getenv('STATE_FILE') or DEFAULT_STATE_PATH)
         )
         
         # Set global scrobbler instance for Flask routes